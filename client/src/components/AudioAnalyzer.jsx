@@ -66,7 +66,7 @@ const AudioAnalyzer = ({ isAnalyzing, onEmotionDetected }) => {
           const tracks = stream.getTracks();
           tracks.forEach(track => track.stop());
           
-          const blob = new Blob(audioChunks);
+          const blob = new Blob(audioChunks, { type: mediaRecorder.mimeType });
           await analyzeEmotion(blob);
           setIsRecording(false);
         });
@@ -87,9 +87,11 @@ const AudioAnalyzer = ({ isAnalyzing, onEmotionDetected }) => {
   const analyzeEmotion = async (blob) => {
     try {
       const base64Audio = await convertToBase64(blob);
+      // MediaRecorder produces webm/ogg/mp4 (e.g. "audio/webm;codecs=opus"), not wav
+      const fileFormat = (blob.type.split(';')[0].split('/')[1]) || 'webm';
       const response = await axios.post('http://127.0.0.1:5002/predict_emotion', {
         audio_data: base64Audio.split(',')[1],
-        file_format: 'wav'
+        file_format: fileFormat
       });
       
       // Calculate engagement score based on emotion
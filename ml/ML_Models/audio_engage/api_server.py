@@ -105,58 +105,51 @@
 
 from flask import Flask, request, jsonify 
 from flask_cors import CORS
-import tempfile
 import os
+import sys
 import base64
 import joblib
 import numpy as np
 import json
 import datetime
-import librosa
-from predict_emotion import predict_emotion_from_audio
+from concurrent.futures import ProcessPoolExecutor
+from predict_emotion import predict_emotion_from_signal, extract_features_from_bytes, predict_emotions_from_features
+from model_registry import registry
+from audio_io import decode_audio
+
+# Add the ML_Models shared directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../shared')))
+from event_log import append_event, start_compactor
 
 app = Flask(__name__)
 CORS(app)
 
 # Set the default model path
 MODEL_PATH = os.path.join(os.path.dirname(__file__), 'emotion_detection_model.joblib')
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
 
-# Create data directory if it doesn't exist
-os.makedirs(DATA_DIR, exist_ok=True)
+# Load the model once at startup instead of on the first request
+if os.path.exists(MODEL_PATH):
+    registry.warm(MODEL_PATH)
 
-def write_to_json_file(data_type, data):
-    """Write data to a JSON file in the data directory"""
-    try:
-        file_path = os.path.join(DATA_DIR, f"{data_type}.json")
-        
-        # Read existing data if available
-        existing_data = []
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                try:
-                    existing_data = json.load(f)
-                except json.JSONDecodeError:
-                    existing_data = []
-        
-        # Ensure existing_data is a list
-        if not isinstance(existing_data, list):
-            existing_data = []
-        
-        # Add timestamp to the data
-        data['timestamp'] = datetime.datetime.now().isoformat()
-        
-        # Append new data
-        existing_data.append(data)
-        
-        # Write updated data back to the file
-        with open(file_path, 'w') as f:
-            json.dump(existing_data, f, indent=2)
-            
-        return True
-    except Exception as e:
-        print(f"Error writing to JSON file: {e}")
-        return False
+# Batch endpoint limits
+MAX_BATCH_CLIPS = int(os.environ.get('AUDIO_MAX_BATCH_CLIPS', 64))
+EXTRACT_WORKERS = int(os.environ.get('AUDIO_EXTRACT_WORKERS', os.cpu_count() or 1))
+
+# Worker pool for feature extraction, created on the first batch request
+feature_pool = None
+
+def get_feature_pool():
+    global feature_pool
+    if feature_pool is None:
+        feature_pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS)
+    return feature_pool
+
+def to_engagement(emotion):
+    """Map emotion to 'engaged' or 'distracted'"""
+    engaged_emotions = {'happy', 'neutral', 'surprised'}  # adjust as needed
+    if emotion.lower() in engaged_emotions:
+        return 'engaged'
+    return 'distracted'
 
 @app.route('/predict_emotion', methods=['POST'])
 def predict_emotion():
@@ -182,39 +175,29 @@ def predict_emotion():
                 'emotion': 'unknown'
             }), 400
         
-        # Save audio data to temporary file
-        with tempfile.NamedTemporaryFile(suffix=f'.{file_format}', delete=False) as temp_file:
-            temp_path = temp_file.name
-            temp_file.write(audio_bytes)
+        # Decode the clip in memory ('pcm' clips also need sample_rate)
+        y, sr = decode_audio(audio_bytes, file_format,
+                             request.json.get('sample_rate'), request.json.get('channels', 1))
+
+        # Predict emotion
+        emotion = predict_emotion_from_signal(y, sr, MODEL_PATH)
+
+        # Map emotion to 'engaged' or 'distracted'
+        engagement = to_engagement(emotion)
         
-        try:
-            # Predict emotion
-            emotion = predict_emotion_from_audio(temp_path, MODEL_PATH)
-
-            # Map emotion to 'engaged' or 'distracted'
-            engaged_emotions = {'happy', 'neutral', 'surprised'}  # adjust as needed
-            if emotion.lower() in engaged_emotions:
-                engagement = 'engaged'
-            else:
-                engagement = 'distracted'
-            
-            # Save to JSON file
-            audio_data = {
-                'emotion': emotion,
-                'engagement': engagement,
-                'userId': request.json.get('userId', 'unknown')
-            }
-            write_to_json_file('audio', audio_data)
+        # Save to JSON file
+        audio_data = {
+            'emotion': emotion,
+            'engagement': engagement,
+            'userId': request.json.get('userId', 'unknown')
+        }
+        append_event('audio', audio_data)
 
-            return jsonify({
-                'success': True,
-                'message': 'Emotion predicted successfully',
-                'emotion': engagement
-            })
-        finally:
-            # Always clean up the temporary file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+        return jsonify({
+            'success': True,
+            'message': 'Emotion predicted successfully',
+            'emotion': engagement
+        })
                 
     except Exception as e:
         return jsonify({
@@ -223,6 +206,90 @@ def predict_emotion():
             'emotion': 'unknown'
         }), 500
 
+@app.route('/predict_emotion/batch', methods=['POST'])
+def predict_emotion_batch():
+    """
+    Predict emotions for several clips in one request
+
+    Expected input:
+    {
+        "clips": [{"audio_data": "...", "file_format": "wav", "sample_rate": 16000}, ...],
+        "userId": "...",
+        "return_proba": false
+    }
+
+    Features are extracted in parallel across a process pool and the model
+    runs once over the stacked feature matrix. Results keep the clip order.
+    """
+    clips = request.json.get('clips') if request.json else None
+    if not clips or not isinstance(clips, list):
+        return jsonify({
+            'success': False,
+            'message': 'Missing clips in request',
+            'results': []
+        }), 400
+    if len(clips) > MAX_BATCH_CLIPS:
+        return jsonify({
+            'success': False,
+            'message': f'Too many clips in one batch (max {MAX_BATCH_CLIPS})',
+            'results': []
+        }), 400
+
+    try:
+        user_id = request.json.get('userId', 'unknown')
+        return_proba = bool(request.json.get('return_proba', False))
+
+        # Decode base64 up front so a bad clip fails on its own
+        results = [None] * len(clips)
+        jobs = []  # (clip index, future)
+        pool = get_feature_pool()
+        for i, clip in enumerate(clips):
+            try:
+                audio_bytes = base64.b64decode(clip['audio_data'])
+            except Exception:
+                results[i] = {'success': False, 'message': 'Invalid audio data encoding', 'emotion': 'unknown'}
+                continue
+            jobs.append((i, pool.submit(
+                extract_features_from_bytes, audio_bytes,
+                clip.get('file_format', 'wav'), clip.get('sample_rate'), clip.get('channels', 1)
+            )))
+
+        # Collect feature vectors, remembering which clip each row belongs to
+        rows, row_indices = [], []
+        for i, future in jobs:
+            features = future.result()
+            if features is None:
+                results[i] = {'success': False, 'message': 'Error processing audio', 'emotion': 'unknown'}
+                continue
+            rows.append(features)
+            row_indices.append(i)
+
+        # One scaler.transform / model.predict for the whole batch
+        emotions, probabilities = predict_emotions_from_features(rows, MODEL_PATH, return_proba)
+        for j, i in enumerate(row_indices):
+            engagement = to_engagement(emotions[j])
+            results[i] = {'success': True, 'emotion': engagement}
+            if probabilities is not None:
+                results[i]['probabilities'] = probabilities[j]
+            append_event('audio', {
+                'emotion': emotions[j],
+                'engagement': engagement,
+                'userId': user_id
+            })
+
+        return jsonify({
+            'success': True,
+            'message': f'Predicted {len(row_indices)} of {len(clips)} clips',
+            'results': results
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error processing request: {str(e)}',
+            'results': []
+        }), 500
+
 @app.route('/predict_engagement_spike', methods=['POST'])
 def predict_engagement_spike():
     if not request.json or 'audio_data' not in request.json:
@@ -242,39 +309,33 @@ def predict_engagement_spike():
                 'message': 'Invalid audio data encoding',
                 'engagement': 'unknown'
             }), 400
-        with tempfile.NamedTemporaryFile(suffix=f'.{file_format}', delete=False) as temp_file:
-            temp_path = temp_file.name
-            temp_file.write(audio_bytes)
-        try:
-            # Load audio and calculate amplitude
-            y, sr = librosa.load(temp_path, sr=None)
-            rms = np.sqrt(np.mean(y**2))
-            max_amp = np.max(np.abs(y))
-            # Thresholds (tune as needed)
-            RMS_THRESHOLD = 0.1
-            MAX_AMP_THRESHOLD = 0.3
-            if rms > RMS_THRESHOLD or max_amp > MAX_AMP_THRESHOLD:
-                engagement = 'distracted'
-            else:
-                engagement = 'engaged'
-            # Save to JSON file
-            audio_data_obj = {
-                'rms': float(rms),
-                'max_amplitude': float(max_amp),
-                'engagement': engagement,
-                'userId': request.json.get('userId', 'unknown')
-            }
-            write_to_json_file('audio', audio_data_obj)
-            return jsonify({
-                'success': True,
-                'message': 'Engagement predicted by spike logic',
-                'engagement': engagement,
-                'rms': float(rms),
-                'max_amplitude': float(max_amp)
-            })
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+        # Decode in memory and calculate amplitude
+        y, sr = decode_audio(audio_bytes, file_format,
+                             request.json.get('sample_rate'), request.json.get('channels', 1))
+        rms = np.sqrt(np.mean(y**2))
+        max_amp = np.max(np.abs(y))
+        # Thresholds (tune as needed)
+        RMS_THRESHOLD = 0.1
+        MAX_AMP_THRESHOLD = 0.3
+        if rms > RMS_THRESHOLD or max_amp > MAX_AMP_THRESHOLD:
+            engagement = 'distracted'
+        else:
+            engagement = 'engaged'
+        # Save to JSON file
+        audio_data_obj = {
+            'rms': float(rms),
+            'max_amplitude': float(max_amp),
+            'engagement': engagement,
+            'userId': request.json.get('userId', 'unknown')
+        }
+        append_event('audio', audio_data_obj)
+        return jsonify({
+            'success': True,
+            'message': 'Engagement predicted by spike logic',
+            'engagement': engagement,
+            'rms': float(rms),
+            'max_amplitude': float(max_amp)
+        })
     except Exception as e:
         return jsonify({
             'success': False,
@@ -295,6 +356,9 @@ if __name__ == '__main__':
     if not os.path.exists(MODEL_PATH):
         print(f"Warning: Model file not found at {MODEL_PATH}")
         print("You need to train a model first using train_emotion_model.py")
+
+    # Fold audio.jsonl back into audio.json in the background
+    start_compactor(['audio'])
     
     # Run the Flask app
     app.run(host='0.0.0.0', port=5002)
\ No newline at end of file
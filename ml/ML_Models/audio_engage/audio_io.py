@@ -0,0 +1,122 @@
+import io
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import numpy as np
+import soundfile as sf
+import librosa
+
+# Formats that carry bare little-endian int16 samples with no container
+PCM_FORMATS = {'pcm', 'pcm_s16le', 's16le', 'raw'}
+
+# Containers libsndfile reads; anything else goes through ffmpeg
+SOUNDFILE_FORMATS = {'wav', 'flac', 'ogg'}
+
+FFMPEG_BINARY = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+
+_FFMPEG_RATE = re.compile(r'Audio: .*?(\d+) Hz')
+
+
+def sniff_format(audio_bytes):
+    """
+    Container of audio_bytes from its magic bytes, or None if unknown.
+    Browsers' MediaRecorder output is webm/ogg/mp4 whatever the client labels it.
+    """
+    head = bytes(audio_bytes[:12])
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return 'wav'
+    if head[:4] == b'fLaC':
+        return 'flac'
+    if head[:4] == b'OggS':
+        return 'ogg'
+    if head[:4] == b'\x1a\x45\xdf\xa3':
+        return 'webm'
+    if head[4:8] == b'ftyp':
+        return 'mp4'
+    return None
+
+
+def decode_with_ffmpeg(audio_bytes):
+    """
+    Decode any container ffmpeg understands through pipes, without a temp file
+
+    Returns:
+        tuple: (float32 mono signal at the stream's own sample rate, sample rate)
+    """
+    proc = subprocess.run(
+        [FFMPEG_BINARY, '-hide_banner', '-i', 'pipe:0', '-vn', '-ac', '1', '-f', 'f32le', 'pipe:1'],
+        input=bytes(audio_bytes), stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    stderr = proc.stderr.decode('utf-8', 'replace')
+    match = _FFMPEG_RATE.search(stderr)
+    if proc.returncode != 0 or not match:
+        raise ValueError(f"ffmpeg could not decode audio: {stderr.strip().splitlines()[-1] if stderr.strip() else proc.returncode}")
+    return np.frombuffer(proc.stdout, dtype='<f4').copy(), int(match.group(1))
+
+
+def decode_pcm16(audio_bytes, sample_rate, channels=1):
+    """
+    Decode raw little-endian int16 PCM without touching the disk
+
+    Parameters:
+        audio_bytes (bytes): Interleaved int16 samples
+        sample_rate (int): Sample rate of the stream in Hz
+        channels (int): Number of interleaved channels
+
+    Returns:
+        tuple: (float32 mono signal in [-1, 1], sample rate)
+    """
+    # frombuffer is a view over the request bytes, no copy
+    samples = np.frombuffer(audio_bytes, dtype='<i2', count=len(audio_bytes) // 2)
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels)
+        y = samples.mean(axis=1, dtype=np.float32) / 32768.0
+    else:
+        y = samples.astype(np.float32) / 32768.0
+    return y, int(sample_rate)
+
+
+def decode_audio(audio_bytes, file_format='wav', sample_rate=None, channels=1):
+    """
+    Decode an uploaded clip in memory, matching librosa.load(path, sr=None)
+
+    The container is sniffed from the bytes, so a mislabelled upload still
+    decodes. WAV/FLAC/OGG are read by soundfile straight from a BytesIO;
+    webm/mp4 (browser MediaRecorder output) are piped through ffmpeg. Raw
+    PCM int16 (file_format 'pcm') needs sample_rate. Only when ffmpeg isn't
+    installed do other containers fall back to librosa's audioread path,
+    which works on files, so those are spilled to a temporary file.
+
+    Returns:
+        tuple: (float32 mono signal, sample rate)
+    """
+    file_format = (file_format or 'wav').lower()
+
+    if file_format in PCM_FORMATS:
+        if not sample_rate:
+            raise ValueError("sample_rate is required for raw PCM audio")
+        return decode_pcm16(audio_bytes, sample_rate, channels)
+
+    container = sniff_format(audio_bytes) or file_format
+    if container in SOUNDFILE_FORMATS:
+        try:
+            y, sr = sf.read(io.BytesIO(audio_bytes), dtype='float32', always_2d=False)
+            if y.ndim > 1:
+                y = np.mean(y, axis=1)
+            return y, sr
+        except RuntimeError:
+            pass
+
+    if shutil.which(FFMPEG_BINARY):
+        return decode_with_ffmpeg(audio_bytes)
+
+    with tempfile.NamedTemporaryFile(suffix=f'.{container}', delete=False) as temp_file:
+        temp_path = temp_file.name
+        temp_file.write(audio_bytes)
+    try:
+        return librosa.load(temp_path, sr=None)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,64 @@
+import os
+import threading
+import joblib
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded model files.
+
+    Each path is deserialized once and reused until the file's mtime changes,
+    at which point the next lookup reloads it.
+    """
+
+    def __init__(self, loader=joblib.load):
+        self._loader = loader
+        self._models = {}  # abs path: (mtime, model)
+        self._lock = threading.Lock()
+
+    def get(self, model_path):
+        """
+        Return the loaded model for model_path, loading or reloading as needed
+
+        Parameters:
+            model_path (str): Path to the saved model file
+
+        Returns:
+            object: Whatever the loader returned for the file
+        """
+        path = os.path.abspath(model_path)
+        mtime = os.path.getmtime(path)
+
+        cached = self._models.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with self._lock:
+            # Another thread may have loaded it while we waited
+            cached = self._models.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            model = self._loader(path)
+            self._models[path] = (mtime, model)
+            return model
+
+    def warm(self, *model_paths):
+        """Load the given model files ahead of the first request"""
+        for model_path in model_paths:
+            self.get(model_path)
+
+    def evict(self, model_path=None):
+        """Drop one cached model, or all of them when no path is given"""
+        with self._lock:
+            if model_path is None:
+                self._models.clear()
+            else:
+                self._models.pop(os.path.abspath(model_path), None)
+
+
+# Shared registry used by predict_emotion and api_server
+registry = ModelRegistry()
+
+
+def get_model(model_path):
+    return registry.get(model_path)
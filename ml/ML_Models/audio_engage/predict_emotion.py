@@ -1,8 +1,9 @@
 import os
 import numpy as np
 import librosa
-import joblib
 import argparse
+from model_registry import get_model
+from audio_io import decode_audio
 
 def extract_features(file_path, n_mfcc=13, n_chroma=12, n_mel=128):
     """
@@ -20,7 +21,27 @@ def extract_features(file_path, n_mfcc=13, n_chroma=12, n_mel=128):
     try:
         # Load audio file
         y, sr = librosa.load(file_path, sr=None)
+    except Exception as e:
+        print(f"Error extracting features from {file_path}: {e}")
+        return None
+
+    return extract_features_from_signal(y, sr, n_mfcc, n_chroma, n_mel)
+
+def extract_features_from_signal(y, sr, n_mfcc=13, n_chroma=12, n_mel=128):
+    """
+    Extract audio features from an already decoded signal
+    
+    Parameters:
+        y (np.array): Mono audio signal
+        sr (int): Sample rate of the signal
+        n_mfcc (int): Number of MFCCs to extract
+        n_chroma (int): Number of chroma features
+        n_mel (int): Number of mel bands
         
+    Returns:
+        np.array: Feature vector
+    """
+    try:
         # Extract features
         # MFCCs
         mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
@@ -47,9 +68,24 @@ def extract_features(file_path, n_mfcc=13, n_chroma=12, n_mel=128):
         return features
     
     except Exception as e:
-        print(f"Error extracting features from {file_path}: {e}")
+        print(f"Error extracting features from signal: {e}")
         return None
 
+def extract_features_from_bytes(audio_bytes, file_format='wav', sample_rate=None, channels=1):
+    """
+    Decode an uploaded clip in memory and extract its feature vector.
+    Top-level so it can run in a process pool worker.
+    
+    Returns:
+        np.array: Feature vector, or None if the clip could not be processed
+    """
+    try:
+        y, sr = decode_audio(audio_bytes, file_format, sample_rate, channels)
+    except Exception as e:
+        print(f"Error decoding audio clip: {e}")
+        return None
+    return extract_features_from_signal(y, sr)
+
 # Map model output to 'Engaged' or 'Distracted'
 ENGAGED_EMOTIONS = {'neutral', 'happy', 'surprised'}  # adjust as needed
 
@@ -70,16 +106,66 @@ def predict_emotion_from_audio(audio_file_path, model_path='emotion_detection_mo
     Returns:
         str: Predicted emotion ('distress', 'confusion', 'boredom', or 'neutral')
     """
-    # Load the model dict
-    model_data = joblib.load(model_path)
-    model = model_data['model']
-    scaler = model_data['scaler']
-    
     # Extract features from the audio file
     features = extract_features(audio_file_path)
+    return _predict_from_features(features, model_path)
+
+def predict_emotion_from_signal(y, sr, model_path='emotion_detection_model.joblib'):
+    """
+    Predict emotion from a decoded audio signal using the trained model
     
+    Parameters:
+        y (np.array): Mono audio signal
+        sr (int): Sample rate of the signal
+        model_path (str): Path to the saved model file
+        
+    Returns:
+        str: Predicted emotion, same labels as predict_emotion_from_audio
+    """
+    features = extract_features_from_signal(y, sr)
+    return _predict_from_features(features, model_path)
+
+def predict_emotions_from_features(feature_rows, model_path='emotion_detection_model.joblib', return_proba=False):
+    """
+    Predict emotions for many clips with one scaler/model call
+    
+    Parameters:
+        feature_rows (list): Feature vectors (np.array), one per clip
+        model_path (str): Path to the saved model file
+        return_proba (bool): Also return class probabilities if the model supports them
+        
+    Returns:
+        tuple: (list of engagement labels, list of {class: probability} dicts or None)
+    """
+    if not feature_rows:
+        return [], None
+
+    model_data = get_model(model_path)
+    model = model_data['model']
+    scaler = model_data['scaler']
+
+    # Stack into one (n_clips, n_features) matrix
+    features = scaler.transform(np.vstack(feature_rows))
+    predictions = model.predict(features)
+    engagements = [map_to_engagement(p) for p in predictions]
+
+    probabilities = None
+    if return_proba and hasattr(model, 'predict_proba'):
+        probs = model.predict_proba(features)
+        probabilities = [
+            {str(label): float(p) for label, p in zip(model.classes_, row)}
+            for row in probs
+        ]
+    return engagements, probabilities
+
+def _predict_from_features(features, model_path):
     if features is None:
         return "Error processing audio"
+
+    # Get the model dict (loaded once per process, reloaded if the file changes)
+    model_data = get_model(model_path)
+    model = model_data['model']
+    scaler = model_data['scaler']
     
     # Reshape and scale features for prediction
     features = features.reshape(1, -1)
@@ -96,49 +96,15 @@ import base64
 import json
 import datetime
 import os
+import sys
+
+# Add the ML_Models shared directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../shared')))
+from event_log import append_event
 
 app = Flask(__name__)
 CORS(app)
 
-# Directory to save data
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
-
-# Create data directory if it doesn't exist
-os.makedirs(DATA_DIR, exist_ok=True)
-
-def write_to_json_file(data_type, data):
-    """Write data to a JSON file in the data directory"""
-    try:
-        file_path = os.path.join(DATA_DIR, f"{data_type}.json")
-        
-        # Read existing data if available
-        existing_data = []
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                try:
-                    existing_data = json.load(f)
-                except json.JSONDecodeError:
-                    existing_data = []
-        
-        # Ensure existing_data is a list
-        if not isinstance(existing_data, list):
-            existing_data = []
-        
-        # Add timestamp to the data
-        data['timestamp'] = datetime.datetime.now().isoformat()
-        
-        # Append new data
-        existing_data.append(data)
-        
-        # Write updated data back to the file
-        with open(file_path, 'w') as f:
-            json.dump(existing_data, f, indent=2)
-            
-        return True
-    except Exception as e:
-        print(f"Error writing to JSON file: {e}")
-        return False
-
 # Load face detector and landmark detector here
 class FaceDetector:
     def __init__(self):
@@ -240,7 +206,7 @@ def analyze_engagement():
             'engagement_score': result['engagement_score'],
             'face_detected': result['face_detected']
         }
-        write_to_json_file('video', user_data)
+        append_event('video', user_data)
         
         return jsonify(result)
     except Exception as e:
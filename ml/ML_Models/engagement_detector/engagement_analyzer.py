@@ -1,72 +1,125 @@
 import cv2
 import numpy as np
 import time
+from collections import OrderedDict
+
+
+class _StreamState:
+    """Smoothing state for one face/user stream"""
+
+    def __init__(self, max_history):
+        # Fixed-size ring buffer of recent scores with a running sum
+        self.scores = np.zeros(max_history, dtype=np.float64)
+        self.count = 0
+        self.index = 0
+        self.total = 0.0
+        self.last_landmarks = None
+
+    def push(self, score):
+        """Add a score and return the mean over the buffered history"""
+        size = len(self.scores)
+        if self.count == size:
+            self.total -= self.scores[self.index]
+        else:
+            self.count += 1
+        self.scores[self.index] = score
+        self.total += score
+        self.index = (self.index + 1) % size
+
+        # Re-sum once per lap so floating point drift can't build up
+        if self.index == 0:
+            self.total = float(self.scores[:self.count].sum())
+
+        return self.total / self.count
+
+    def history(self):
+        """Buffered scores, oldest first"""
+        if self.count < len(self.scores):
+            return self.scores[:self.count].copy()
+        return np.roll(self.scores, -self.index)
 
 
 class EngagementAnalyzer:
-    def __init__(self):
+    def __init__(self, max_history=30, max_streams=256):
         # Parameters
-        self.attention_history = []
-        self.max_history = 30  # frames to keep for smoothing
+        self.max_history = max_history  # frames to keep for smoothing
+        self.max_streams = max_streams  # streams to keep state for, least recently used dropped
         self.last_blink_time = time.time()
         self.blink_interval = 0.0  # time between blinks
-        
-    def analyze(self, frame, landmarks):
+
+        # Per-stream state, keyed by face/user id (None for a single stream)
+        self._streams = OrderedDict()
+
+    def _state(self, stream_id):
+        state = self._streams.get(stream_id)
+        if state is None:
+            state = _StreamState(self.max_history)
+            self._streams[stream_id] = state
+            if len(self._streams) > self.max_streams:
+                self._streams.popitem(last=False)
+        else:
+            self._streams.move_to_end(stream_id)
+        return state
+
+    @property
+    def attention_history(self):
+        """Smoothing history of the default stream, oldest first"""
+        state = self._streams.get(None)
+        return [] if state is None else state.history().tolist()
+
+    def reset(self, stream_id=None):
+        """Forget the history of one stream"""
+        self._streams.pop(stream_id, None)
+
+    def analyze(self, frame, landmarks, stream_id=None):
         """
         Analyze engagement based on simplified facial landmarks
-        
+
         Args:
             frame: Input image frame
             landmarks: Facial landmarks as numpy array
-            
+            stream_id: Face/user the landmarks belong to, so one analyzer
+                can smooth many streams independently
+
         Returns:
             Engagement score (0.0 to 1.0)
         """
         if landmarks is None or len(landmarks) < 3:
             return 0.0
-        
+
+        landmarks = np.asarray(landmarks, dtype=np.float64)
+        state = self._state(stream_id)
+
         # Calculate engagement based on eye detection
         eyes_detected = len(landmarks) > 5
-        
+
         # Check if the person is facing forward by comparing eye positions
         facing_forward = True
         if len(landmarks) >= 7:  # We have at least two eyes
             # Simple check if eyes are roughly at the same height
             eye1 = landmarks[2]  # First eye center
             eye2 = landmarks[6]  # Second eye center (if detected)
-            
+
             # If eyes have very different y positions, person may not be facing forward
             if abs(eye1[1] - eye2[1]) > 20:
                 facing_forward = False
-        
+
         # Calculate position stability (less movement indicates more engagement)
         stable_position = 1.0
-        if len(self.attention_history) > 0:
-            # Only do this check if we have previous data
-            if len(landmarks) > 0 and 'last_landmarks' in dir(self):
-                if len(self.last_landmarks) > 0:
-                    # Calculate average movement of landmarks
-                    movement = 0
-                    points_to_compare = min(len(landmarks), len(self.last_landmarks))
-                    for i in range(points_to_compare):
-                        if i < len(landmarks) and i < len(self.last_landmarks):
-                            movement += np.linalg.norm(landmarks[i] - self.last_landmarks[i])
-                    
-                    avg_movement = movement / points_to_compare if points_to_compare > 0 else 0
-                    
-                    # Normalize: less movement = higher stability score
-                    stable_position = max(0, 1.0 - avg_movement / 50.0)
-        
+        last = state.last_landmarks
+        if state.count > 0 and last is not None and len(last) > 0:
+            # Average movement of the landmarks both frames have
+            n = min(len(landmarks), len(last))
+            avg_movement = np.linalg.norm(landmarks[:n] - last[:n], axis=1).mean()
+
+            # Normalize: less movement = higher stability score
+            stable_position = max(0, 1.0 - avg_movement / 50.0)
+
         # Store current landmarks for next frame comparison
-        self.last_landmarks = landmarks
-        
+        state.last_landmarks = landmarks
+
         # Calculate raw engagement score
         engagement_score = 0.4 * float(eyes_detected) + 0.3 * float(facing_forward) + 0.3 * stable_position
-        
-        # Add to history for smoothing
-        self.attention_history.append(engagement_score)
-        if len(self.attention_history) > self.max_history:
-            self.attention_history.pop(0)
-        
-        # Return smoothed engagement score
-        return sum(self.attention_history) / len(self.attention_history)
\ No newline at end of file
+
+        # Add to history and return the smoothed engagement score
+        return state.push(engagement_score)
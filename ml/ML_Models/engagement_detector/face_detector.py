@@ -1,9 +1,21 @@
+import os
+import sys
 import cv2
 import numpy as np
 
+# Add the ML_Models shared directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../shared')))
+from face_tracker import FaceTracker
+
 
 class FaceDetector:
-    def __init__(self):
+    def __init__(self, track=False, detect_every=10):
+        """
+        Args:
+            track: Treat consecutive frames as one stream and search near the
+                last face instead of the full frame
+            detect_every: With tracking, frames between full-frame detections
+        """
         # Initialize face detector using Haar Cascade
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 
                                                  'haarcascade_frontalface_default.xml')
@@ -11,6 +23,9 @@ class FaceDetector:
         # Initialize eye detector
         self.eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 
                                                'haarcascade_eye.xml')
+
+        # Optional tracker so most frames skip the full-frame scan
+        self.tracker = FaceTracker(self.face_cascade, detect_every=detect_every) if track else None
         
     def detect_faces(self, frame):
         """
@@ -24,6 +39,9 @@ class FaceDetector:
         """
         # Convert to grayscale for face detection
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        if self.tracker is not None:
+            return self.tracker.detect(gray)
         
         # Detect faces
         faces = self.face_cascade.detectMultiScale(
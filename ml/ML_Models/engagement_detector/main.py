@@ -10,7 +10,8 @@ def main():
     print("Starting Engagement Analysis System...")
     
     # Initialize components
-    face_detector = FaceDetector()
+    # Webcam frames form one stream, so track the face between frames
+    face_detector = FaceDetector(track=True)
     engagement_analyzer = EngagementAnalyzer()
     
     # Video capture (0 for webcam, or provide video file path)
@@ -33,15 +34,15 @@ def main():
         faces = face_detector.detect_faces(frame)
         
         # Process each face
-        for face_rect in faces:
+        for face_index, face_rect in enumerate(faces):
             # Get facial landmarks
             landmarks = face_detector.detect_landmarks(frame, face_rect)
             
             # Draw landmarks
             draw_landmarks(frame, landmarks)
             
-            # Analyze engagement
-            engagement_score = engagement_analyzer.analyze(frame, landmarks)
+            # Analyze engagement, smoothing each face separately
+            engagement_score = engagement_analyzer.analyze(frame, landmarks, stream_id=face_index)
             
             # Draw face rectangle
             x, y, w, h = face_rect
@@ -196,10 +196,17 @@ from flask_cors import CORS
 import json
 import time
 import os
+import sys
+import threading
 from datetime import datetime
 # Import recommendation engine components
 from engine import RecommendationEngine
-from llm_recommender import generate_gemini_recommendations, build_user_profile_string, build_content_list_string
+from llm_recommender import prefiltered_gemini_recommendations, prompt_stats, response_cache
+from terminal_parser import TailFollower, iter_lines, parse_terminal_output
+
+# Add the ML_Models shared directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../shared')))
+from event_log import append_event, start_compactor
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 CORS(app)  # Enable CORS for all routes
@@ -208,44 +215,27 @@ CORS(app)  # Enable CORS for all routes
 engine = RecommendationEngine()
 engine.add_user("student_001")
 
-# Directory to save data
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
-
-# Create data directory if it doesn't exist
-os.makedirs(DATA_DIR, exist_ok=True)
+# Catalogue snapshot (see catalogue.py), memory-mapped instead of re-extracted on start
+CATALOGUE_PATH = os.environ.get(
+    'CATALOGUE_PATH',
+    os.path.abspath(os.path.join(os.path.dirname(__file__), 'catalogue'))
+)
+# One catalogue writer at a time, so each delta holds exactly its request's items;
+# readers are protected by engine.lock, which add_item and ranking take
+catalogue_lock = threading.Lock()
+CONTENT_REQUIRED_FIELDS = ('url', 'title', 'content_type')
+if os.path.isfile(os.path.join(CATALOGUE_PATH, 'meta.json')):
+    _load_start = time.time()
+    _loaded = engine.load_snapshot(CATALOGUE_PATH)
+    print(f"Loaded {_loaded} catalogue items from {CATALOGUE_PATH} in {time.time() - _load_start:.2f}s")
 
-def write_to_json_file(data_type, data):
-    """Write data to a JSON file in the data directory"""
-    try:
-        file_path = os.path.join(DATA_DIR, f"{data_type}.json")
-        
-        # Read existing data if available
-        existing_data = []
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                try:
-                    existing_data = json.load(f)
-                except json.JSONDecodeError:
-                    existing_data = []
-        
-        # Ensure existing_data is a list
-        if not isinstance(existing_data, list):
-            existing_data = []
-        
-        # Add timestamp to the data
-        data['timestamp'] = datetime.now().isoformat()
-        
-        # Append new data
-        existing_data.append(data)
-        
-        # Write updated data back to the file
-        with open(file_path, 'w') as f:
-            json.dump(existing_data, f, indent=2)
-            
-        return True
-    except Exception as e:
-        print(f"Error writing to JSON file: {e}")
-        return False
+# Analyzer log followed by /api/parse-screen-log, one read position per user
+SCREEN_LOG_PATH = os.environ.get(
+    'SCREEN_ANALYZER_LOG',
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '../screen-analyzer/output.txt'))
+)
+log_followers = {}
+log_followers_lock = threading.Lock()
 
 # Add sample content
 # engine.add_content(
@@ -302,15 +292,14 @@ def get_recommendations():
         # Generate recommendations
         recommendations = engine.generate_recommendations(user_id, 0.5)  # Use a mid-range attentiveness score
         
-        # Get LLM recommendations
-        user_profile_str = build_user_profile_string(user)
-        content_list_str = build_content_list_string(engine.content_database)
-        llm_output = generate_gemini_recommendations(user_profile_str, content_list_str, top_n=3)
+        # Get LLM recommendations from the engine's top candidates (cached while the profile and catalogue are unchanged)
+        llm_output, llm_prompt_stats = prefiltered_gemini_recommendations(engine, user, top_n=3)
         
         response_data = {
             'success': True,
             'recommendations': recommendations,
-            'llm_recommendations': llm_output
+            'llm_recommendations': llm_output,
+            'llm_prompt_stats': llm_prompt_stats
         }
         
         # Save to JSON file
@@ -319,110 +308,142 @@ def get_recommendations():
             'recommendations': recommendations,
             'llm_recommendations': llm_output
         }
-        write_to_json_file('content', content_data)
+        append_event('content', content_data)
         
         return jsonify(response_data)
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def process_screen_data(user_id, screen_data):
+    """Score screen_data, update the user's profile and build the recommendation response"""
+    user = engine.users[user_id]
+    score = user.calculate_attentiveness_score(screen_data)
+    user.update_profile(screen_data, score)
+    
+    # Generate recommendations
+    recommendations = engine.generate_recommendations(user_id, score)
+    
+    # Get LLM recommendations from the engine's top candidates (cached while the profile and catalogue are unchanged)
+    llm_output, llm_prompt_stats = prefiltered_gemini_recommendations(engine, user, top_n=3)
+    
+    response_data = {
+        'success': True,
+        'recommendations': recommendations,
+        'llm_recommendations': llm_output,
+        'llm_prompt_stats': llm_prompt_stats,
+        'attentiveness_score': score,
+        'user_profile': {
+            'topics': dict(user.attentive_topics),
+            'content_types': dict(user.preferred_content_types),
+            'active_time': user.average_active_time,
+            'idle_time': user.average_idle_time
+        }
+    }
+    
+    # Save to JSON file
+    user_data = {
+        'userId': user_id,
+        'attentiveness_score': score,
+        'topics': dict(user.attentive_topics),
+        'content_types': dict(user.preferred_content_types),
+        'active_time': user.average_active_time,
+        'idle_time': user.average_idle_time,
+        'recommendations': recommendations
+    }
+    append_event('user', user_data)
+    return response_data
+
 @app.route('/api/parse-screen-data', methods=['POST'])
 def parse_screen_data():
     """Parse screen data from terminal output and generate recommendations"""
     try:
         data = request.json
         user_id = data.get('user_id', 'student_001')
-        lines = data.get('terminal_output', '').splitlines()
+        lines = iter_lines(data.get('terminal_output', '').splitlines())
         
         # Parse the terminal output
-        screen_data = {
-            'topics': {},
-            'content_types': {},
-            'active_time': 0.0,
-            'idle_time': 0.0,
-            'engaged_apps': {},
-            'browse_time_irrelevant': 0.0
-        }
+        screen_data = parse_terminal_output(lines)
         
-        current_app = None
-        current_context = None
-        idle_time = 0.0
+        return jsonify(process_screen_data(user_id, screen_data))
         
-        for line in lines:
-            if 'Active App:' in line:
-                current_app = line.split('Active App:')[1].strip()
-                screen_data['engaged_apps'][current_app] = screen_data['engaged_apps'].get(current_app, 0) + 1
-            if 'Detected Context:' in line:
-                current_context = line.split('Detected Context:')[1].strip()
-                if current_context:
-                    screen_data['topics'][current_context.capitalize()] = 1.0
-            if 'Idle Time:' in line:
-                import re
-                match = re.search(r'Idle Time: ([\d\.]+)', line)
-                if match:
-                    idle_time = float(match.group(1))
-                    screen_data['idle_time'] += idle_time
-            if 'Context' in line and 'lasted' in line:
-                match = re.search(r'lasted ([\d\.]+) seconds', line)
-                if match:
-                    duration = float(match.group(1))
-                    if current_context == 'browsing':
-                        screen_data['browse_time_irrelevant'] += duration
-                    elif current_context == 'programming':
-                        screen_data['active_time'] += duration
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/parse-screen-log', methods=['POST'])
+def parse_screen_log():
+    """Parse only the analyzer log lines appended since this user's last call"""
+    try:
+        data = request.json or {}
+        user_id = data.get('user_id', 'student_001')
+        if user_id not in engine.users:
+            return jsonify({'success': False, 'error': 'User not found'}), 404
         
-        # Assume content type by context
-        if 'programming' in screen_data['topics']:
-            screen_data['content_types']['YouTube Video'] = 1.0
-        if 'browsing' in screen_data['topics']:
-            screen_data['content_types']['Blog Post'] = 1.0
+        with log_followers_lock:
+            follower = log_followers.get(user_id)
+            if follower is None:
+                follower = log_followers[user_id] = TailFollower(SCREEN_LOG_PATH)
+            new_lines = follower.poll()
+            screen_data = follower.parser.take()
+            offset = follower.offset
         
-        # Process the screen data with the recommendation engine
-        user = engine.users[user_id]
-        score = user.calculate_attentiveness_score(screen_data)
-        user.update_profile(screen_data, score)
+        if not new_lines:
+            return jsonify({'success': True, 'new_lines': 0, 'offset': offset})
         
-        # Generate recommendations
-        recommendations = engine.generate_recommendations(user_id, score)
+        response_data = process_screen_data(user_id, screen_data)
+        response_data['new_lines'] = new_lines
+        response_data['offset'] = offset
+        return jsonify(response_data)
         
-        # Get LLM recommendations
-        user_profile_str = build_user_profile_string(user)
-        content_list_str = build_content_list_string(engine.content_database)
-        llm_output = generate_gemini_recommendations(user_profile_str, content_list_str, top_n=3)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/content', methods=['POST'])
+def add_content():
+    """Add catalogue items and persist them as a snapshot delta"""
+    try:
+        data = request.json or {}
+        items = data.get('items', [])
+        if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+            return jsonify({'success': False, 'error': 'items must be a list of objects'}), 400
+        for position, item in enumerate(items):
+            missing = [field for field in CONTENT_REQUIRED_FIELDS if not item.get(field)]
+            if missing:
+                return jsonify({
+                    'success': False,
+                    'error': f"items[{position}] is missing {', '.join(missing)}"
+                }), 400
+        
+        with catalogue_lock:
+            report = engine.add_contents_bulk(items, replace=bool(data.get('replace', False)), progress=lambda r: None)
+            saved = engine.save_delta(CATALOGUE_PATH)
         
-        response_data = {
+        return jsonify({
             'success': True,
-            'recommendations': recommendations,
-            'llm_recommendations': llm_output,
-            'attentiveness_score': score,
-            'user_profile': {
-                'topics': dict(user.attentive_topics),
-                'content_types': dict(user.preferred_content_types),
-                'active_time': user.average_active_time,
-                'idle_time': user.average_idle_time
-            }
-        }
-        
-        # Save to JSON file
-        user_data = {
-            'userId': user_id,
-            'attentiveness_score': score,
-            'topics': dict(user.attentive_topics),
-            'content_types': dict(user.preferred_content_types),
-            'active_time': user.average_active_time,
-            'idle_time': user.average_idle_time,
-            'recommendations': recommendations
-        }
-        write_to_json_file('user', user_data)
-        
-        return jsonify(response_data)
-        
+            'added': report['added'],
+            'duplicates': report['duplicates'],
+            'failed': report['failed'],
+            'errors': report['errors'],
+            'saved': saved,
+            'catalogue_size': len(engine.content_database)
+        })
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/api/llm-cache-stats', methods=['GET'])
+def llm_cache_stats():
+    """Hit rate and time saved by the LLM response cache, and prompt tokens saved by prefiltering"""
+    return jsonify({**response_cache.stats(), 'prompts': prompt_stats.stats()})
+
 @app.route('/api/user-profile', methods=['GET'])
 def get_user_profile():
     """Get the current user profile"""
@@ -472,5 +493,5 @@ def reset_user():
         }), 500
 
 if __name__ == '__main__':
-    import re  # Make sure to import re for regex matching
+    start_compactor(['content', 'user'])
     app.run(debug=True, port=8080)
\ No newline at end of file
@@ -0,0 +1,94 @@
+# bench_catalogue.py
+#
+# API cold start: rebuilding the catalogue by re-running keyword extraction
+# against loading a memory-mapped snapshot, plus a check that the loaded
+# engine recommends exactly what the in-memory one does.
+#
+# Usage (from recc_engine/):
+#   python benchmarks/bench_catalogue.py [--items 100000] [--words 300] [--path /tmp/catalogue_bench]
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from catalogue import append_delta
+from content_extractors import LocalStubExtractor
+from core import ContentItem, process_text_for_keywords_and_topics
+from engine import RecommendationEngine
+from keywords import TOPIC_MAP
+
+TYPES = ["YouTube Video", "Blog Post", "Podcast", "Course"]
+WORDS = list(TOPIC_MAP) + [f"word{i}" for i in range(5000)]
+
+
+def synthetic_item(i, rng):
+    keywords = rng.sample(WORDS, 7)
+    topics = sorted({TOPIC_MAP[k] for k in keywords if k in TOPIC_MAP}) or ["General"]
+    return ContentItem(f"Item {i}", f"https://example.com/{i}", rng.choice(TYPES), keywords, topics,
+                       f"Description of item {i}", rng.choice([None, 5, 12.5]), rng.choice([None, 60.0]))
+
+
+def add_users(engine, count, rng):
+    topics = sorted(set(TOPIC_MAP.values())) + ["General"]
+    for u in range(count):
+        user_id = f"user_{u}"
+        engine.add_user(user_id)
+        for topic in rng.sample(topics, rng.randint(0, 3)):
+            engine.users[user_id].attentive_topics[topic] = rng.random()
+        for ctype in rng.sample(TYPES, rng.randint(0, 2)):
+            engine.users[user_id].preferred_content_types[ctype] = rng.random()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot load time vs re-extraction")
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--words', type=int, default=300, help="Words per document for the extraction estimate")
+    parser.add_argument('--path', default='/tmp/catalogue_bench')
+    parser.add_argument('--users', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    engine = RecommendationEngine()
+    for i in range(args.items):
+        engine.add_item(synthetic_item(i, rng))
+
+    # Re-extraction cost, measured on a sample (fetching not included)
+    stub = LocalStubExtractor(latency=0, words=args.words)
+    texts = [stub("Blog Post", f"https://example.com/{i}") for i in range(500)]
+    start = time.perf_counter()
+    for text in texts:
+        process_text_for_keywords_and_topics(text)
+    extract_s = (time.perf_counter() - start) / len(texts) * args.items
+    print(f"{args.items} items")
+    print(f"  re-extract keywords (estimated): {extract_s:8.2f} s  (+ fetching every transcript/page)")
+
+    start = time.perf_counter()
+    engine.save_snapshot(args.path)
+    print(f"  write snapshot:                  {time.perf_counter() - start:8.2f} s")
+
+    delta = [synthetic_item(args.items + i, rng) for i in range(1000)]
+    delta.append(synthetic_item(3, random.Random(99)))  # replaces an existing URL
+    append_delta(args.path, delta)
+    for content in delta:
+        engine.add_item(content)
+
+    loaded = RecommendationEngine()
+    start = time.perf_counter()
+    loaded.load_snapshot(args.path)
+    print(f"  load snapshot + 1 delta:         {time.perf_counter() - start:8.2f} s")
+
+    add_users(engine, args.users, random.Random(1))
+    add_users(loaded, args.users, random.Random(1))
+    start = time.perf_counter()
+    loaded_recs = [loaded.generate_recommendations(u, 0.0) for u in loaded.users]
+    rec_ms = (time.perf_counter() - start) / len(loaded.users) * 1000
+    same = sum(a == b for a, b in zip(loaded_recs, [engine.generate_recommendations(u, 0.0) for u in engine.users]))
+    print(f"  recommendations after load:      {rec_ms:8.2f} ms/user, {same}/{len(loaded.users)} identical")
+    print(f"  catalogue size: {len(loaded.content_database)} (in memory: {len(engine.content_database)})")
+
+
+if __name__ == '__main__':
+    main()
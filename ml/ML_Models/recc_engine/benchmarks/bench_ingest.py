@@ -0,0 +1,75 @@
+# bench_ingest.py
+#
+# Catalogue load time: one add_content-style item at a time against
+# add_contents_bulk, with LocalStubExtractor standing in for the network.
+#
+# Usage (from recc_engine/):
+#   python benchmarks/bench_ingest.py [--items 2000] [--latency 0.02] [--fetch-workers 32]
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import ContentItem, process_text_for_keywords_and_topics
+from content_extractors import LocalStubExtractor
+from engine import RecommendationEngine
+
+TYPES = ["YouTube Video", "Blog Post"]
+
+
+def catalogue(count, duplicate_every=20):
+    items = []
+    for i in range(count):
+        # A few repeated URLs, as in merged catalogue exports
+        n = i - 1 if duplicate_every and i % duplicate_every == 0 and i else i
+        items.append({
+            "title": f"Item {n}",
+            "url": f"https://example.com/{n}",
+            "content_type": TYPES[n % 2],
+            "description": f"Description {n}",
+        })
+    return items
+
+
+def serial_load(engine, items, extractor):
+    """What add_content does, one item after another"""
+    for item in items:
+        text = extractor(item["content_type"], item["url"])
+        keywords, topics = process_text_for_keywords_and_topics(text)
+        engine.add_item(ContentItem(item["title"], item["url"], item["content_type"], keywords, topics,
+                                    item["description"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial vs bulk catalogue ingestion")
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.02, help="Simulated fetch latency (s)")
+    parser.add_argument('--words', type=int, default=2000, help="Words per stub document")
+    parser.add_argument('--fetch-workers', type=int, default=32)
+    parser.add_argument('--extract-workers', type=int, default=None)
+    parser.add_argument('--serial-items', type=int, default=200,
+                        help="Items loaded serially; the rate is extrapolated")
+    args = parser.parse_args()
+
+    extractor = LocalStubExtractor(latency=args.latency, words=args.words)
+    items = catalogue(args.items)
+
+    serial_items = items[:args.serial_items]
+    engine = RecommendationEngine()
+    start = time.perf_counter()
+    serial_load(engine, serial_items, extractor)
+    serial_rate = len(serial_items) / (time.perf_counter() - start)
+    print(f"serial: {serial_rate:8.1f} items/s  ({len(items) / serial_rate:.1f} s for {len(items)} items)")
+
+    engine = RecommendationEngine()
+    report = engine.add_contents_bulk(items, extractor=extractor, fetch_workers=args.fetch_workers,
+                                      extract_workers=args.extract_workers, progress=lambda r: None)
+    print(f"bulk:   {report['items_per_second']:8.1f} items/s  ({report['seconds']:.1f} s, "
+          f"{report['added']} added, {report['duplicates']} duplicates, {report['failed']} failed)")
+    print(f"speedup: {report['items_per_second'] / serial_rate:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
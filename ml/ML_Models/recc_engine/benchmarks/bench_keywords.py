@@ -0,0 +1,103 @@
+# bench_keywords.py
+#
+# Documents per second of keyword/topic extraction (keywords.py) against the
+# original NLTK implementation, and how often the two agree.
+#
+# The NLTK side needs nltk with the punkt and stopwords data already
+# installed; without it only the new extractor is timed.
+#
+# Usage (from recc_engine/):
+#   python benchmarks/bench_keywords.py [--docs 2000] [--words 300] [--files notes/*.txt]
+
+import os
+import sys
+import time
+import random
+import argparse
+from collections import Counter
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from keywords import TOPIC_MAP, process_text, process_batch
+
+VOCAB = list(TOPIC_MAP) + [
+    "the", "a", "of", "and", "to", "in", "is", "this", "we", "you", "it", "for", "on", "with",
+    "student", "lesson", "example", "practice", "problem", "solution", "chapter", "video",
+    "tutorial", "course", "exercise", "theory", "model", "graph", "matrix", "cell", "energy",
+    "history", "language", "write", "read", "understand", "step", "result", "test", "class",
+]
+
+
+def nltk_process(text):
+    """The original core.process_text_for_keywords_and_topics"""
+    from nltk.corpus import stopwords
+    from nltk.tokenize import word_tokenize
+    stop_words = set(stopwords.words('english'))
+    tokens = word_tokenize(text.lower())
+    words = [w for w in tokens if w.isalpha() and w not in stop_words]
+    freq = Counter(words)
+    keywords = [word for word, count in freq.most_common(7)]
+    topic_map = dict(TOPIC_MAP)
+    topics = set()
+    for kw in keywords:
+        if kw in topic_map:
+            topics.add(topic_map[kw])
+    if not topics and keywords:
+        topics.add("General")
+    return keywords, list(topics)
+
+
+def synthetic_docs(count, words, seed=0):
+    rng = random.Random(seed)
+    docs = []
+    for _ in range(count):
+        sentence = []
+        for i in range(words):
+            word = rng.choice(VOCAB)
+            sentence.append(word.capitalize() if i % 12 == 0 else word)
+            if i % 12 == 11:
+                sentence[-1] += rng.choice([".", ",", "!", "?"])
+        docs.append(" ".join(sentence))
+    return docs
+
+
+def docs_per_second(fn, docs):
+    start = time.perf_counter()
+    fn(docs)
+    return len(docs) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword extraction throughput vs NLTK")
+    parser.add_argument('--docs', type=int, default=2000)
+    parser.add_argument('--words', type=int, default=300, help="Words per synthetic document")
+    parser.add_argument('--files', nargs='*', help="Text files to use instead of synthetic documents")
+    args = parser.parse_args()
+
+    if args.files:
+        docs = []
+        for path in args.files:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                docs.append(f.read())
+    else:
+        docs = synthetic_docs(args.docs, args.words)
+    print(f"{len(docs)} documents, {sum(len(d) for d in docs) / len(docs):.0f} chars on average")
+
+    single = docs_per_second(lambda ds: [process_text(d) for d in ds], docs)
+    batch = docs_per_second(process_batch, docs)
+    print(f"  keywords.process_text:  {single:10.0f} docs/s")
+    print(f"  keywords.process_batch: {batch:10.0f} docs/s")
+
+    try:
+        nltk_process(docs[0])
+    except (ImportError, LookupError) as e:
+        print(f"  nltk: skipped ({type(e).__name__}: install nltk with punkt and stopwords data to compare)")
+        return
+    old = docs_per_second(lambda ds: [nltk_process(d) for d in ds], docs)
+    same_keywords = sum(nltk_process(d)[0] == process_text(d)[0] for d in docs) / len(docs)
+    same_topics = sum(set(nltk_process(d)[1]) == set(process_text(d)[1]) for d in docs) / len(docs)
+    print(f"  nltk (original):        {old:10.0f} docs/s  (batch {batch / old:.1f}x faster)")
+    print(f"  same keywords: {same_keywords:.1%}, same topics: {same_topics:.1%}")
+
+
+if __name__ == '__main__':
+    main()
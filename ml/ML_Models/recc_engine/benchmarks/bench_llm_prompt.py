@@ -0,0 +1,62 @@
+# bench_llm_prompt.py
+#
+# Size and build time of the Gemini prompt when it lists the whole catalogue
+# against only the engine's top candidates, on a synthetic catalogue. Token
+# counts are llm_recommender's estimate (about 4 characters per token); no
+# LLM is called.
+#
+# Usage (from recc_engine/):
+#   python benchmarks/bench_llm_prompt.py [--sizes 100 1000 10000] [--users 20] [--candidates 20] [--budget 1500]
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault('LLM_BACKEND', 'fake')
+from bench_recommendations import build_engine
+from llm_recommender import (build_prompt, build_user_profile_string, build_content_list_string,
+                             build_candidate_list_string, estimate_tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-catalogue vs prefiltered LLM prompt size")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--candidates', type=int, default=20)
+    parser.add_argument('--budget', type=int, default=1500)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'items':>8} {'full tokens':>12} {'full ms':>9} {'top-K tokens':>13} {'top-K ms':>9} {'listed':>7}")
+    for size in args.sizes:
+        engine = build_engine(size, args.users, rng)
+        for content in engine.content_database.values():
+            content.keywords = rng.sample(["python", "loop", "algebra", "data", "neural", "network", "lesson"], 3)
+            content.description = f"An introduction to {', '.join(content.topics)} with worked examples."
+            content.length_minutes = rng.randint(3, 60)
+        users = list(engine.users.values())
+
+        start = time.perf_counter()
+        full = [build_prompt(build_user_profile_string(u), build_content_list_string(engine.content_database)) for u in users]
+        full_ms = (time.perf_counter() - start) / len(users) * 1000
+
+        start = time.perf_counter()
+        prefiltered = []
+        listed = 0
+        for user in users:
+            urls = engine.rank_content(user.user_id, args.candidates)
+            content_list, count = build_candidate_list_string((engine.content_database[url] for url in urls), args.budget)
+            prefiltered.append(build_prompt(build_user_profile_string(user), content_list))
+            listed += count
+        top_ms = (time.perf_counter() - start) / len(users) * 1000
+
+        full_tokens = sum(map(estimate_tokens, full)) // len(users)
+        top_tokens = sum(map(estimate_tokens, prefiltered)) // len(users)
+        print(f"{size:>8} {full_tokens:>12} {full_ms:>9.2f} {top_tokens:>13} {top_ms:>9.2f} {listed / len(users):>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
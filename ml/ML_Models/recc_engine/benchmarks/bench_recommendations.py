@@ -0,0 +1,85 @@
+# bench_recommendations.py
+#
+# Latency of generate_recommendations with the topic/type indexes against
+# the original full scan + sort, on a synthetic catalogue, and a check that
+# both return the same recommendations.
+#
+# Usage (from recc_engine/):
+#   python benchmarks/bench_recommendations.py [--sizes 1000 10000 100000] [--users 50]
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from core import ContentItem
+from engine import RecommendationEngine
+
+TOPICS = ["Programming", "Mathematics", "Science", "Data Science", "AI", "General",
+          "History", "Languages", "Art", "Economics", "Music", "Health"]
+TYPES = ["YouTube Video", "Blog Post", "Podcast", "Course"]
+
+
+def scan_recommendations(engine, user_id):
+    """The original implementation: score every item, full sort, take 5"""
+    user = engine.users.get(user_id)
+    recent_urls = set(engine.user_recent_content[user_id][-engine.recent_limit:])
+    attentive_topics = set([t for t, _ in user.get_attentive_topics()])
+    preferred_types = set([t for t, _ in sorted(user.preferred_content_types.items(), key=lambda x: x[1], reverse=True)])
+    scored = []
+    for url, content in engine.content_database.items():
+        if url in recent_urls:
+            continue
+        topic_overlap = len(attentive_topics.intersection(set(content.topics)))
+        type_boost = 1 if content.content_type in preferred_types else 0
+        scored.append((topic_overlap * 2 + type_boost, content))
+    scored.sort(reverse=True, key=lambda x: x[0])
+    return [content.url for _, content in scored[:5]]
+
+
+def build_engine(size, users, rng):
+    engine = RecommendationEngine()
+    for i in range(size):
+        topics = rng.sample(TOPICS, rng.randint(1, 3))
+        engine.add_item(ContentItem(f"Item {i}", f"https://example.com/{i}", rng.choice(TYPES),
+                                    [], topics))
+    for u in range(users):
+        user_id = f"user_{u}"
+        engine.add_user(user_id)
+        user = engine.users[user_id]
+        for topic in rng.sample(TOPICS, rng.randint(0, 4)):
+            user.attentive_topics[topic] = rng.random()
+        for ctype in rng.sample(TYPES, rng.randint(0, 2)):
+            user.preferred_content_types[ctype] = rng.random()
+        engine.user_recent_content[user_id] = [f"https://example.com/{rng.randrange(size)}" for _ in range(5)]
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexed vs full-scan recommendation latency")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--users', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'items':>8} {'scan ms':>9} {'indexed ms':>11} {'speedup':>8} {'same':>6}")
+    for size in args.sizes:
+        engine = build_engine(size, args.users, rng)
+        user_ids = list(engine.users)
+
+        start = time.perf_counter()
+        expected = [scan_recommendations(engine, u) for u in user_ids]
+        scan_ms = (time.perf_counter() - start) / len(user_ids) * 1000
+
+        start = time.perf_counter()
+        actual = [[r["url"] for r in engine.generate_recommendations(u, 0.0)] for u in user_ids]
+        indexed_ms = (time.perf_counter() - start) / len(user_ids) * 1000
+
+        same = sum(a == e for a, e in zip(actual, expected))
+        print(f"{size:>8} {scan_ms:>9.2f} {indexed_ms:>11.2f} {scan_ms / indexed_ms:>7.1f}x {same:>3}/{len(user_ids)}")
+
+
+if __name__ == '__main__':
+    main()
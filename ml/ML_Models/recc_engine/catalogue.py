@@ -0,0 +1,348 @@
+# catalogue.py
+#
+# On-disk snapshot of the content catalogue, so the API can start without
+# re-fetching and re-extracting every item.
+#
+# A snapshot is a directory of flat arrays that are memory-mapped on load;
+# items are only turned back into ContentItem objects when something asks
+# for them. Layout:
+#
+#   meta.json                        format version, item count, topic and
+#                                    content-type vocabularies, the engine's
+#                                    catalogue_version and content_list_chars
+#   title|url|description.bin        UTF-8 strings, one column each, with
+#   title|url|description.offsets.npy  int64 start offsets (n + 1 entries)
+#   description_null.npy             bool, True where description is None
+#   keyword_vocab.bin/.offsets.npy   keyword strings, indexed by keyword id
+#   content_type.npy                 int16 content-type id per item
+#   length_minutes.npy               float64, NaN for None
+#   readability_score.npy            float64, NaN for None
+#   keywords.indptr/.indices.npy     CSR: item row -> keyword ids (in order)
+#   topics.indptr/.indices.npy       CSR: item row -> topic ids (in order)
+#   topic_postings.indptr/.indices.npy  CSR: topic id -> item rows (the
+#   type_postings.indptr/.indices.npy   index RecommendationEngine ranks with)
+#   delta-000001.jsonl ...           items added since the snapshot was
+#                                    written, applied in order on load
+#
+# Usage (from recc_engine/):
+#   python catalogue.py build items.jsonl catalogue/ [--stub]
+#   python catalogue.py compact catalogue/
+#   python catalogue.py info catalogue/
+
+import os
+import sys
+import json
+import math
+import shutil
+import argparse
+from collections.abc import Mapping
+
+import numpy as np
+
+from core import ContentItem
+
+FORMAT_VERSION = 1
+STRING_COLUMNS = ("title", "url", "description")
+DELTA_PREFIX = "delta-"
+
+
+def _npy(path, name):
+    return os.path.join(path, f"{name}.npy")
+
+
+def write_strings(path, name, strings):
+    encoded = [s.encode('utf-8') if s is not None else b'' for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    with open(os.path.join(path, f"{name}.bin"), 'wb') as f:
+        f.write(b''.join(encoded))
+    np.save(_npy(path, f"{name}.offsets"), offsets)
+
+
+class StringColumn:
+    """Memory-mapped UTF-8 string column"""
+
+    def __init__(self, path, name):
+        self.offsets = np.load(_npy(path, f"{name}.offsets"), mmap_mode='r')
+        blob_path = os.path.join(path, f"{name}.bin")
+        if os.path.getsize(blob_path):
+            self.blob = np.memmap(blob_path, dtype=np.uint8, mode='r')
+        else:
+            self.blob = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        return self.blob[self.offsets[row]:self.offsets[row + 1]].tobytes().decode('utf-8')
+
+    def all(self):
+        """Every string, decoded in one pass"""
+        blob = self.blob.tobytes()
+        offsets = self.offsets.tolist()
+        return [blob[a:b].decode('utf-8') for a, b in zip(offsets, offsets[1:])]
+
+
+def write_csr(path, name, rows):
+    lengths = [len(row) for row in rows]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    indices = np.fromiter((i for row in rows for i in row), dtype=np.int32, count=int(indptr[-1]))
+    np.save(_npy(path, f"{name}.indptr"), indptr)
+    np.save(_npy(path, f"{name}.indices"), indices)
+
+
+class CsrColumn:
+    """Memory-mapped CSR rows of int32 ids"""
+
+    def __init__(self, path, name):
+        self.indptr = np.load(_npy(path, f"{name}.indptr"), mmap_mode='r')
+        self.indices = np.load(_npy(path, f"{name}.indices"), mmap_mode='r')
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def __getitem__(self, row):
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+
+def _postings(rows, size):
+    """Transpose CSR rows (item -> ids) into id -> item rows"""
+    postings = [[] for _ in range(size)]
+    for item_row, ids in enumerate(rows):
+        for i in dict.fromkeys(ids):
+            postings[i].append(item_row)
+    return postings
+
+
+def _optional_float(value):
+    return float(value) if value is not None else math.nan
+
+
+def write_snapshot(path, contents, catalogue_version=None, content_list_chars=None):
+    """
+    Write contents (ContentItems, in catalogue order) as a snapshot at path,
+    replacing whatever was there, including delta files
+    """
+    contents = list(contents)
+    keyword_ids, topic_ids, type_ids = {}, {}, {}
+    keyword_rows = [[keyword_ids.setdefault(k, len(keyword_ids)) for k in c.keywords] for c in contents]
+    topic_rows = [[topic_ids.setdefault(t, len(topic_ids)) for t in c.topics] for c in contents]
+    type_column = [type_ids.setdefault(c.content_type, len(type_ids)) for c in contents]
+
+    tmp = path.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    for name in STRING_COLUMNS:
+        write_strings(tmp, name, [getattr(c, name) for c in contents])
+    np.save(_npy(tmp, "description_null"), np.array([c.description is None for c in contents], dtype=bool))
+    write_strings(tmp, "keyword_vocab", list(keyword_ids))
+    np.save(_npy(tmp, "content_type"), np.array(type_column, dtype=np.int16))
+    np.save(_npy(tmp, "length_minutes"), np.array([_optional_float(c.length_minutes) for c in contents], dtype=np.float64))
+    np.save(_npy(tmp, "readability_score"), np.array([_optional_float(c.readability_score) for c in contents], dtype=np.float64))
+    write_csr(tmp, "keywords", keyword_rows)
+    write_csr(tmp, "topics", topic_rows)
+    write_csr(tmp, "topic_postings", _postings(topic_rows, len(topic_ids)))
+    write_csr(tmp, "type_postings", _postings([[t] for t in type_column], len(type_ids)))
+
+    with open(os.path.join(tmp, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump({
+            "version": FORMAT_VERSION,
+            "count": len(contents),
+            "topics": list(topic_ids),
+            "content_types": list(type_ids),
+            "catalogue_version": catalogue_version,
+            "content_list_chars": content_list_chars,
+        }, f)
+
+    # Swap the finished directory in; a reader never sees a half-written one
+    old = path.rstrip(os.sep) + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def content_to_record(content):
+    return {
+        "title": content.title,
+        "url": content.url,
+        "content_type": content.content_type,
+        "keywords": list(content.keywords),
+        "topics": list(content.topics),
+        "description": content.description,
+        "length_minutes": content.length_minutes,
+        "readability_score": content.readability_score,
+    }
+
+
+def record_to_content(record):
+    return ContentItem(record["title"], record["url"], record["content_type"], record["keywords"],
+                       record["topics"], record.get("description"), record.get("length_minutes"),
+                       record.get("readability_score"))
+
+
+def delta_files(path):
+    if not os.path.isdir(path):
+        return []
+    names = sorted(n for n in os.listdir(path) if n.startswith(DELTA_PREFIX) and n.endswith(".jsonl"))
+    return [os.path.join(path, n) for n in names]
+
+
+def append_delta(path, contents):
+    """Write contents as the next delta file of the snapshot at path; returns its path"""
+    contents = list(contents)
+    if not contents:
+        return None
+    existing = delta_files(path)
+    number = int(os.path.basename(existing[-1])[len(DELTA_PREFIX):-len(".jsonl")]) + 1 if existing else 1
+    target = os.path.join(path, f"{DELTA_PREFIX}{number:06d}.jsonl")
+    tmp = target + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for content in contents:
+            f.write(json.dumps(content_to_record(content)) + "\n")
+    os.replace(tmp, target)
+    return target
+
+
+def read_deltas(path):
+    """ContentItems from the snapshot's delta files, oldest first"""
+    for delta in delta_files(path):
+        with open(delta, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield record_to_content(json.loads(line))
+
+
+def is_snapshot(path):
+    return os.path.isfile(os.path.join(path, "meta.json"))
+
+
+class Snapshot:
+    """A snapshot directory opened with every array memory-mapped"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported catalogue snapshot version: {self.meta.get('version')}")
+        self.count = self.meta["count"]
+        self.topics = self.meta["topics"]
+        self.content_types = self.meta["content_types"]
+
+        self.columns = {name: StringColumn(path, name) for name in STRING_COLUMNS}
+        null_path = _npy(path, "description_null")
+        # Snapshots written before the mask existed stored None as ""
+        self.description_null = np.load(null_path, mmap_mode='r') if os.path.exists(null_path) else None
+        self.keyword_vocab = StringColumn(path, "keyword_vocab")
+        self.content_type = np.load(_npy(path, "content_type"), mmap_mode='r')
+        self.length_minutes = np.load(_npy(path, "length_minutes"), mmap_mode='r')
+        self.readability_score = np.load(_npy(path, "readability_score"), mmap_mode='r')
+        self.keywords = CsrColumn(path, "keywords")
+        self.item_topics = CsrColumn(path, "topics")
+        self.topic_postings = CsrColumn(path, "topic_postings")
+        self.type_postings = CsrColumn(path, "type_postings")
+
+    def content(self, row):
+        """ContentItem for one row"""
+        length = float(self.length_minutes[row])
+        readability = float(self.readability_score[row])
+        description = self.columns["description"][row]
+        if self.description_null is None:
+            description = description or None
+        elif self.description_null[row]:
+            description = None
+        return ContentItem(
+            self.columns["title"][row],
+            self.columns["url"][row],
+            self.content_types[self.content_type[row]],
+            [self.keyword_vocab[i] for i in self.keywords[row].tolist()],
+            [self.topics[i] for i in self.item_topics[row].tolist()],
+            description,
+            None if math.isnan(length) else length,
+            None if math.isnan(readability) else readability
+        )
+
+    def index(self, urls):
+        """(topic_index, type_index) as {key: {url: row}}, from the stored postings"""
+        topic_index = {}
+        for topic_id, topic in enumerate(self.topics):
+            rows = self.topic_postings[topic_id].tolist()
+            topic_index[topic] = dict(zip([urls[r] for r in rows], rows))
+        type_index = {}
+        for type_id, content_type in enumerate(self.content_types):
+            rows = self.type_postings[type_id].tolist()
+            type_index[content_type] = dict(zip([urls[r] for r in rows], rows))
+        return topic_index, type_index
+
+
+class CatalogueView(Mapping):
+    """
+    url -> ContentItem over a Snapshot, built on access. Assigned items are
+    kept in memory on top of it: replacing a snapshot URL keeps its place,
+    new URLs come after the snapshot rows, like a dict.
+    """
+
+    def __init__(self, snapshot, urls=None):
+        self.snapshot = snapshot
+        self.urls = urls if urls is not None else snapshot.columns["url"].all()
+        self.rows = dict(zip(self.urls, range(len(self.urls))))
+        self.overlay = {}
+
+    def __getitem__(self, url):
+        content = self.overlay.get(url)
+        if content is not None:
+            return content
+        return self.snapshot.content(self.rows[url])
+
+    def __setitem__(self, url, content):
+        self.overlay[url] = content
+
+    def __contains__(self, url):
+        return url in self.rows or url in self.overlay
+
+    def __iter__(self):
+        yield from self.urls
+        for url in self.overlay:
+            if url not in self.rows:
+                yield url
+
+    def __len__(self):
+        return len(self.rows) + sum(1 for url in self.overlay if url not in self.rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and maintain catalogue snapshots")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help="Ingest a JSONL file of add_content arguments into a snapshot")
+    build.add_argument('items')
+    build.add_argument('path')
+    build.add_argument('--stub', action='store_true', help="Use LocalStubExtractor instead of fetching")
+    compact = sub.add_parser('compact', help="Fold delta files into the snapshot")
+    compact.add_argument('path')
+    info = sub.add_parser('info', help="Show snapshot size and deltas")
+    info.add_argument('path')
+    args = parser.parse_args()
+
+    from engine import RecommendationEngine
+    engine = RecommendationEngine()
+
+    if args.command == 'build':
+        from content_extractors import LocalStubExtractor
+        with open(args.items, 'r', encoding='utf-8') as f:
+            items = [json.loads(line) for line in f if line.strip()]
+        engine.add_contents_bulk(items, extractor=LocalStubExtractor() if args.stub else None)
+        engine.save_snapshot(args.path)
+    elif args.command == 'compact':
+        engine.load_snapshot(args.path)
+        engine.save_snapshot(args.path)
+    snapshot = Snapshot(args.path)
+    print(f"{args.path}: {snapshot.count} items, {len(snapshot.topics)} topics, "
+          f"{len(snapshot.keyword_vocab)} keywords, {len(delta_files(args.path))} delta files")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,6 @@
+import time
+import random
+
 def extract_youtube_transcript(youtube_url):
     # Mocked transcript for demonstration
     return "This is a sample transcript about Python programming, loops, and variables."
@@ -5,3 +8,33 @@ def extract_youtube_transcript(youtube_url):
 def extract_blog_text(blog_url):
     # Mocked blog text for demonstration
     return "This blog post discusses algebra, equations, and statistics in mathematics."
+
+def extract_text(content_type, url):
+    """Transcript or article text for url, or None if the content type has no extractor"""
+    if content_type == "YouTube Video":
+        return extract_youtube_transcript(url)
+    elif content_type == "Blog Post":
+        return extract_blog_text(url)
+    return None
+
+class LocalStubExtractor:
+    """
+    Stands in for the network when loading large catalogues: each call waits
+    `latency` seconds (like a transcript or page fetch) and returns text made
+    up deterministically from the URL, so runs are repeatable offline.
+    """
+    VOCAB = (
+        "python java loop variable function algebra calculus equation statistics biology "
+        "chemistry experiment data machine learning neural network lesson example practice "
+        "problem solution chapter tutorial course theory model graph matrix history language"
+    ).split()
+
+    def __init__(self, latency=0.05, words=300):
+        self.latency = latency
+        self.words = words
+
+    def __call__(self, content_type, url):
+        if self.latency:
+            time.sleep(self.latency)
+        rng = random.Random(url)
+        return " ".join(rng.choices(self.VOCAB, k=self.words))
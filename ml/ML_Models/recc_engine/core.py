@@ -1,13 +1,9 @@
 # Import required libraries
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from collections import defaultdict, Counter
+from collections import defaultdict
 import string
 
-# Download NLTK resources if not already present
-nltk.download('punkt')
-nltk.download('stopwords')
+# Keyword extraction uses vendored resources loaded on first use (no downloads)
+from keywords import process_text, process_batch
 
 class StudentUser:
     def __init__(self, user_id):
@@ -65,35 +61,13 @@ class ContentItem:
         self.length_minutes = length_minutes
         self.readability_score = readability_score
 
+def content_list_entry(content):
+    """One item the way the full-catalogue LLM content list writes it"""
+    return f"Title: {content.title}\nURL: {content.url}\nType: {content.content_type}\nKeywords: {content.keywords}\nTopics: {content.topics}\nDescription: {content.description}\nLength (min): {content.length_minutes}\nReadability: {content.readability_score}\n---"
+
 def process_text_for_keywords_and_topics(text):
-    stop_words = set(stopwords.words('english'))
-    tokens = word_tokenize(text.lower())
-    words = [w for w in tokens if w.isalpha() and w not in stop_words]
-    freq = Counter(words)
-    keywords = [word for word, count in freq.most_common(7)]
-    topic_map = {
-        "python": "Programming",
-        "java": "Programming",
-        "algebra": "Mathematics",
-        "calculus": "Mathematics",
-        "biology": "Science",
-        "chemistry": "Science",
-        "loop": "Programming",
-        "variable": "Programming",
-        "function": "Programming",
-        "equation": "Mathematics",
-        "experiment": "Science",
-        "data": "Data Science",
-        "statistics": "Mathematics",
-        "machine": "AI",
-        "learning": "AI",
-        "neural": "AI",
-        "network": "AI"
-    }
-    topics = set()
-    for kw in keywords:
-        if kw in topic_map:
-            topics.add(topic_map[kw])
-    if not topics and keywords:
-        topics.add("General")
-    return keywords, list(topics)
+    return process_text(text)
+
+def process_texts_for_keywords_and_topics(texts):
+    """Batch version: [(keywords, topics), ...] in the order of texts"""
+    return process_batch(texts)
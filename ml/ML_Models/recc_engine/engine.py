@@ -1,6 +1,16 @@
+import os
+import time
+import heapq
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from functools import reduce
+from itertools import combinations, islice
 from collections import defaultdict
-from core import StudentUser, ContentItem, process_text_for_keywords_and_topics
-from content_extractors import extract_youtube_transcript, extract_blog_text
+from core import StudentUser, ContentItem, content_list_entry, process_text_for_keywords_and_topics
+from content_extractors import extract_youtube_transcript, extract_blog_text, extract_text
+from keywords import process_batch
+from catalogue import CatalogueView, Snapshot, append_delta, is_snapshot, read_deltas, write_snapshot
 
 class RecommendationEngine:
     def __init__(self):
@@ -9,6 +19,21 @@ class RecommendationEngine:
         self.user_recent_content = defaultdict(list)  # user_id: list of urls
         self.recommendation_threshold = 0.5
         self.recent_limit = 5
+        self.max_recommendations = 5
+        # Inverted indexes, kept up to date by add_item: key -> {url: insertion order}
+        self.topic_index = defaultdict(dict)
+        self.type_index = defaultdict(dict)
+        self._order = {}  # url: position in content_database
+        self._unsaved = {}  # urls added or replaced since the last snapshot/delta write
+        # Changes whenever an item is added or replaced; same items in the same order give the same version
+        self.catalogue_version = "empty"
+        # Length of the full-catalogue LLM content list, counting a newline
+        # after every entry, so the savings of prefiltering can be reported
+        # without building it
+        self.content_list_chars = 0
+        # Guards the catalogue and indexes: writers hold it while adding,
+        # ranking holds it while walking them (Flask serves requests on threads)
+        self.lock = threading.RLock()
 
     def add_user(self, user_id):
         if user_id not in self.users:
@@ -22,7 +47,229 @@ class RecommendationEngine:
                 transcript_or_text = extract_blog_text(url)
         keywords, topics = process_text_for_keywords_and_topics(transcript_or_text)
         content = ContentItem(title, url, content_type, keywords, topics, description, length_minutes, readability_score)
-        self.content_database[url] = content
+        self.add_item(content)
+
+    def add_contents_bulk(self, items, extractor=None, fetch_workers=16, extract_workers=None,
+                          chunk_size=256, replace=False, progress=None, report_every=1000):
+        """
+        Load many content items at once: texts are fetched on a thread pool,
+        keywords/topics extracted in chunks on a process pool, and the items
+        added in input order.
+
+        Args:
+            items: Iterable of dicts with add_content's keyword arguments
+            extractor: callable(content_type, url) -> text; defaults to the
+                content_extractors functions (LocalStubExtractor for offline runs)
+            fetch_workers: Threads fetching transcripts/texts
+            extract_workers: Processes extracting keywords (None = CPU count,
+                0 = extract on this thread)
+            chunk_size: Texts per extraction task
+            replace: Re-process URLs already in the catalogue instead of skipping them
+            progress: callable(report) called every report_every items and at the end
+            report_every: Items between progress reports
+
+        Returns:
+            dict: Counts (submitted, duplicates, fetched, failed, added), the
+            first few errors, elapsed seconds and items per second
+        """
+        extractor = extractor if extractor is not None else extract_text
+        progress = progress if progress is not None else print_ingest_progress
+        start = time.monotonic()
+        report = {"submitted": 0, "duplicates": 0, "fetched": 0, "extracted": 0,
+                  "failed": 0, "added": 0, "errors": [], "seconds": 0.0, "items_per_second": 0.0}
+
+        # Deduplicate by URL: first occurrence wins, known URLs are skipped unless replacing
+        unique = []
+        seen = set()
+        for item in items:
+            report["submitted"] += 1
+            url = item["url"]
+            if url in seen or (not replace and url in self.content_database):
+                report["duplicates"] += 1
+                continue
+            seen.add(url)
+            unique.append(item)
+
+        def update(done_key, count=1):
+            before = report[done_key]
+            report[done_key] += count
+            report["seconds"] = time.monotonic() - start
+            report["items_per_second"] = report["extracted"] / report["seconds"] if report["seconds"] else 0.0
+            if before // report_every != report[done_key] // report_every:
+                progress(dict(report, total=len(unique)))
+
+        def fail(item, error):
+            report["failed"] += 1
+            if len(report["errors"]) < 20:
+                report["errors"].append({"url": item["url"], "error": str(error)})
+
+        if extract_workers is None:
+            extract_workers = os.cpu_count() or 1
+        if extract_workers < 2 or len(unique) < chunk_size * 2:
+            # Not worth starting processes for one core or a small batch
+            extract_workers = 0
+
+        results = {}  # index in unique: (keywords, topics)
+        pending = []  # (index, text) waiting to fill a chunk
+        extract_futures = {}
+
+        def run_chunk(pool, chunk):
+            indexes = [index for index, _ in chunk]
+            texts = [text for _, text in chunk]
+            if pool is None:
+                for index, result in zip(indexes, process_batch(texts)):
+                    results[index] = result
+                update("extracted", len(chunk))
+            else:
+                extract_futures[pool.submit(process_batch, texts)] = indexes
+
+        def flush(final=False):
+            # Hand texts over in chunk_size pieces; the final flush also sends the remainder
+            nonlocal pending
+            while len(pending) >= chunk_size or (final and pending):
+                run_chunk(extract_pool, pending[:chunk_size])
+                pending = pending[chunk_size:]
+
+        extract_pool = ProcessPoolExecutor(extract_workers) if extract_workers else None
+        try:
+            with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool:
+                fetch_futures = {}
+                for index, item in enumerate(unique):
+                    text = item.get("transcript_or_text")
+                    if text is None:
+                        fetch_futures[fetch_pool.submit(extractor, item["content_type"], item["url"])] = index
+                    else:
+                        pending.append((index, text))
+                        flush()
+
+                for future in as_completed(fetch_futures):
+                    index = fetch_futures[future]
+                    try:
+                        text = future.result()
+                    except Exception as e:
+                        fail(unique[index], e)
+                        continue
+                    if text is None:
+                        fail(unique[index], f"No extractor for {unique[index]['content_type']}")
+                        continue
+                    update("fetched")
+                    pending.append((index, text))
+                    flush()
+            flush(final=True)
+
+            for future in as_completed(extract_futures):
+                indexes = extract_futures[future]
+                try:
+                    for index, result in zip(indexes, future.result()):
+                        results[index] = result
+                    update("extracted", len(indexes))
+                except Exception as e:
+                    for index in indexes:
+                        fail(unique[index], e)
+        finally:
+            if extract_pool is not None:
+                extract_pool.shutdown()
+
+        with self.lock:
+            for index, item in enumerate(unique):
+                if index not in results:
+                    continue
+                keywords, topics = results[index]
+                self.add_item(ContentItem(
+                    item["title"], item["url"], item["content_type"], keywords, topics,
+                    item.get("description"), item.get("length_minutes"), item.get("readability_score")
+                ))
+                report["added"] += 1
+
+        report["seconds"] = time.monotonic() - start
+        report["items_per_second"] = report["added"] / report["seconds"] if report["seconds"] else 0.0
+        progress(dict(report, total=len(unique)))
+        return report
+
+    def add_item(self, content):
+        """Add an already processed ContentItem to the catalogue and indexes"""
+        with self.lock:
+            old = self._index(content.url, content)
+            self._count_list_chars(old, content)
+            self.content_database[content.url] = content
+            self._unsaved[content.url] = None
+            self._bump_version(content)
+
+    def _count_list_chars(self, old, content):
+        if old is not None:
+            self.content_list_chars -= len(content_list_entry(old)) + 1
+        self.content_list_chars += len(content_list_entry(content)) + 1
+
+    def _bump_version(self, content):
+        digest = hashlib.blake2b(digest_size=8)
+        for part in (self.catalogue_version, content.url, content.title, content.content_type,
+                     content.description, content.length_minutes, content.readability_score):
+            digest.update(f"{part}\x1f".encode('utf-8'))
+        digest.update("|".join(content.keywords).encode('utf-8'))
+        digest.update("|".join(sorted(content.topics)).encode('utf-8'))
+        self.catalogue_version = digest.hexdigest()
+
+    def load_snapshot(self, path):
+        """
+        Replace the catalogue with the snapshot at path (see catalogue.py).
+        Arrays are memory-mapped and items built on access; the stored
+        topic/type postings become the indexes, then delta files are applied.
+        """
+        snapshot = Snapshot(path)
+        view = CatalogueView(snapshot)
+        topic_index, type_index = snapshot.index(view.urls)
+        with self.lock:
+            self.content_database = view
+            self._order = dict(view.rows)
+            self.topic_index = defaultdict(dict, topic_index)
+            self.type_index = defaultdict(dict, type_index)
+            self.catalogue_version = snapshot.meta.get("catalogue_version", "empty")
+            self.content_list_chars = snapshot.meta.get("content_list_chars")
+            if self.content_list_chars is None:
+                # Snapshot written before the size was stored: measure it once
+                self.content_list_chars = sum(len(content_list_entry(c)) + 1 for c in view.values())
+            for content in read_deltas(path):
+                self.add_item(content)
+            self._unsaved = {}
+            return len(self.content_database)
+
+    def save_snapshot(self, path):
+        """Write the whole catalogue as a fresh snapshot (folding in any deltas)"""
+        with self.lock:
+            write_snapshot(path, self.content_database.values(), self.catalogue_version, self.content_list_chars)
+            self._unsaved = {}
+
+    def save_delta(self, path):
+        """Append items added since the last save as a delta file; returns how many were written"""
+        with self.lock:
+            if not is_snapshot(path):
+                self.save_snapshot(path)
+                return len(self.content_database)
+            urls = list(self._unsaved)
+            contents = [self.content_database[url] for url in urls]
+            self._unsaved = {}
+        append_delta(path, contents)
+        return len(urls)
+
+    def _index(self, url, content):
+        old = self.content_database.get(url)
+        if old is not None:
+            for topic in set(old.topics):
+                self.topic_index[topic].pop(url, None)
+            self.type_index[old.content_type].pop(url, None)
+        # Replacing an item keeps its place, like the dict it lives in
+        order = self._order.setdefault(url, len(self._order))
+
+        buckets = [self.topic_index[topic] for topic in set(content.topics)]
+        buckets.append(self.type_index[content.content_type])
+        for bucket in buckets:
+            bucket[url] = order
+            if old is not None and len(bucket) > 1:
+                # Re-inserted at the end; restore insertion order
+                items = sorted(bucket.items(), key=lambda item: item[1])
+                bucket.clear()
+                bucket.update(items)
+        return old
 
     def process_screen_data(self, user_id, screen_analyzer_data):
         user = self.users.get(user_id)
@@ -34,26 +281,80 @@ class RecommendationEngine:
             return self.generate_recommendations(user_id, score)
         return []
 
+    def rank_content(self, user_id, limit):
+        """
+        URLs of the best `limit` catalogue items for user_id, best first
+
+        Returns:
+            list: URLs (empty for an unknown user)
+        """
+        with self.lock:
+            user = self.users.get(user_id)
+            if not user:
+                return []
+            recent_urls = set(self.user_recent_content[user_id][-self.recent_limit:])
+            attentive_topics = set([t for t, _ in user.get_attentive_topics()])
+            preferred_types = set(user.preferred_content_types)
+
+            # Same ranking as scoring every item (2 per attentive topic matched,
+            # +1 for a preferred type, ties in catalogue order), worked out tier
+            # by tier from the indexes so only the best few items are touched.
+            buckets = [self.topic_index[t] for t in attentive_topics if self.topic_index.get(t)]
+            # at_least[k]: items matching k or more attentive topics (k >= 2), built as needed
+            at_least = {}
+
+            chosen = []
+            for k in range(len(buckets), -1, -1):
+                if len(chosen) >= limit:
+                    break
+                if k >= 2:
+                    at_least[k] = set().union(*(
+                        reduce(lambda found, bucket: found & bucket.keys(), group[1:], group[0].keys())
+                        for group in combinations(buckets, k)
+                    ))
+                higher = at_least.get(k + 1, ()) if k else ()
+
+                for typed in ((True, False) if preferred_types else (False,)):
+                    need = limit - len(chosen)
+                    if need <= 0:
+                        break
+                    taken = set(chosen)
+
+                    def keep(url):
+                        if url in recent_urls or url in taken or url in higher:
+                            return False
+                        if k == 0 and any(url in bucket for bucket in buckets):
+                            return False
+                        return (self.content_database[url].content_type in preferred_types) == typed
+
+                    if k >= 2:
+                        chosen.extend(heapq.nsmallest(need, filter(keep, at_least[k]), key=self._order.__getitem__))
+                        continue
+                    # Buckets are in catalogue order, so the first matches in each are the earliest
+                    if k == 1:
+                        sources = buckets
+                    elif typed:
+                        sources = [self.type_index.get(ctype, {}) for ctype in preferred_types]
+                    else:
+                        sources = [self.content_database]
+                    found = set()
+                    for source in sources:
+                        found.update(islice(filter(keep, source), need))
+                    chosen.extend(sorted(found, key=self._order.__getitem__)[:need])
+            return chosen
+
     def generate_recommendations(self, user_id, current_attentiveness_score):
         user = self.users.get(user_id)
         if not user:
             return []
-        recent_urls = set(self.user_recent_content[user_id][-self.recent_limit:])
         attentive_topics = set([t for t, _ in user.get_attentive_topics()])
-        preferred_types = set([t for t, _ in sorted(user.preferred_content_types.items(), key=lambda x: x[1], reverse=True)])
-        scored = []
-        for url, content in self.content_database.items():
-            if url in recent_urls:
-                continue
-            topic_overlap = len(attentive_topics.intersection(set(content.topics)))
-            type_boost = 1 if content.content_type in preferred_types else 0
-            score = topic_overlap * 2 + type_boost
-            scored.append((score, content))
-        scored.sort(reverse=True, key=lambda x: x[0])
+        preferred_types = set(user.preferred_content_types)
+
         recommendations = []
-        for score, content in scored[:5]:
+        for url in self.rank_content(user_id, self.max_recommendations):
+            content = self.content_database[url]
             reason = []
-            if set(content.topics).intersection(attentive_topics):
+            if attentive_topics.intersection(content.topics):
                 reason.append("Matches your attentive topics")
             if content.content_type in preferred_types:
                 reason.append(f"Preferred content type: {content.content_type}")
@@ -70,3 +371,8 @@ class RecommendationEngine:
         print(f"Recommendations for user {user_id}:")
         for idx, rec in enumerate(recommendations, 1):
             print(f"{idx}. {rec['title']}\n   URL: {rec['url']}\n   Reason: {rec['reason']}\n")
+
+def print_ingest_progress(report):
+    print(f"Ingested {report['extracted']}/{report['total']} (fetched {report['fetched']}) "
+          f"({report['items_per_second']:.1f} items/s, {report['failed']} failed, "
+          f"{report['duplicates']} duplicates skipped)")
@@ -0,0 +1,96 @@
+# keywords.py
+#
+# Keyword and topic extraction for catalogue content, without NLTK.
+#
+# The English stopword list is vendored in data/stopwords_english.txt (the
+# same 179 words as NLTK's corpus) and read once, the first time it's needed,
+# so importing this module does no I/O and never touches the network. Words
+# are pulled out with one precompiled regex instead of word_tokenize(); like
+# the old isalpha() filter it keeps runs of letters only, so numbers,
+# punctuation and tokens such as "python3" are dropped.
+
+import os
+import re
+import threading
+from collections import Counter
+from types import MappingProxyType
+
+STOPWORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'stopwords_english.txt')
+
+TOP_KEYWORDS = 7
+
+# keyword: topic
+TOPIC_MAP = MappingProxyType({
+    "python": "Programming",
+    "java": "Programming",
+    "algebra": "Mathematics",
+    "calculus": "Mathematics",
+    "biology": "Science",
+    "chemistry": "Science",
+    "loop": "Programming",
+    "variable": "Programming",
+    "function": "Programming",
+    "equation": "Mathematics",
+    "experiment": "Science",
+    "data": "Data Science",
+    "statistics": "Mathematics",
+    "machine": "AI",
+    "learning": "AI",
+    "neural": "AI",
+    "network": "AI"
+})
+
+# Whole words made only of letters
+_WORD = re.compile(r"\b[^\W\d_]+\b")
+
+_stopwords = None
+_stopwords_lock = threading.Lock()
+
+
+def get_stopwords():
+    """Vendored English stopwords as a frozenset, loaded on first call"""
+    global _stopwords
+    if _stopwords is None:
+        with _stopwords_lock:
+            if _stopwords is None:
+                with open(STOPWORDS_PATH, 'r', encoding='utf-8') as f:
+                    _stopwords = frozenset(line.strip() for line in f if line.strip())
+    return _stopwords
+
+
+def tokenize(text):
+    """Lowercased letter-only words in text"""
+    return _WORD.findall(text.lower())
+
+
+def extract_keywords(text, top_n=TOP_KEYWORDS, stop_words=None):
+    """Most frequent non-stopwords, ties in order of first appearance"""
+    stop_words = stop_words if stop_words is not None else get_stopwords()
+    freq = Counter(word for word in tokenize(text) if word not in stop_words)
+    return [word for word, _ in freq.most_common(top_n)]
+
+
+def topics_for(keywords):
+    topics = {TOPIC_MAP[kw] for kw in keywords if kw in TOPIC_MAP}
+    if not topics and keywords:
+        topics.add("General")
+    return list(topics)
+
+
+def process_text(text):
+    """
+    Returns:
+        tuple: (keywords, topics) for one document
+    """
+    keywords = extract_keywords(text)
+    return keywords, topics_for(keywords)
+
+
+def process_batch(texts):
+    """(keywords, topics) for each of texts, sharing one stopword lookup"""
+    stop_words = get_stopwords()
+    results = []
+    for text in texts:
+        keywords = extract_keywords(text, stop_words=stop_words)
+        results.append((keywords, topics_for(keywords)))
+    return results
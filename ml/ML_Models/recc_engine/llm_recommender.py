@@ -1,15 +1,32 @@
 import os
-import google.generativeai as genai
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
 from engine import ContentItem
+from core import content_list_entry
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
+GEMINI_MODEL = "models/gemini-1.5-pro-latest"
 
-def generate_gemini_recommendations(user_profile, content_list, top_n=3):
+# How many of the engine's own top-ranked items the prompt offers the LLM,
+# and roughly how many tokens their listing may take
+LLM_CANDIDATES = int(os.environ.get('LLM_CANDIDATES', 20))
+LLM_PROMPT_TOKEN_BUDGET = int(os.environ.get('LLM_PROMPT_TOKEN_BUDGET', 1500))
+
+# Attentiveness scores of the profile that go into the prompt and cache key;
+# the full history grows with every screen update
+PROFILE_HISTORY = 3
+
+# Without calling the tokenizer: English averages about 4 characters per token
+CHARS_PER_TOKEN = 4
+
+def build_prompt(user_profile, content_list, top_n=3):
     # Build a system prompt for Gemini
-    system_prompt = f"""
+    return f"""
 You are an educational recommendation engine. Your job is to suggest the most relevant and engaging content for a student based on their profile and available content. 
 
 User Profile:
@@ -23,9 +40,68 @@ Instructions:
 - For each, provide the title, URL, and a short reason for recommendation.
 - Be concise and helpful.
 """
-    model = genai.GenerativeModel("models/gemini-1.5-pro-latest")
-    response = model.generate_content(system_prompt)
-    return response.text
+
+class GeminiLLM:
+    """Google Gemini; the SDK is imported and configured on first use"""
+    name = "gemini"
+
+    def __init__(self, model=GEMINI_MODEL):
+        self.model_name = model
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=GEMINI_API_KEY)
+                self._model = genai.GenerativeModel(self.model_name)
+            return self._model
+
+    def generate(self, prompt):
+        return self._get_model().generate_content(prompt).text
+
+class FakeLLM:
+    """
+    Local stand-in for tests and offline runs: answers after `latency`
+    seconds with the first top_n titles/URLs of the content list in the prompt
+    """
+    name = "fake"
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def generate(self, prompt):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        top_n = 3
+        titles, urls = [], []
+        for line in prompt.splitlines():
+            if line.startswith("- Recommend the top "):
+                top_n = int(line.split()[4])
+            elif line.startswith("Title: "):
+                titles.append(line[len("Title: "):])
+            elif line.startswith("URL: "):
+                urls.append(line[len("URL: "):])
+        picks = [f"{i}. {title} ({url}) - matches your recent activity"
+                 for i, (title, url) in enumerate(zip(titles, urls), 1)][:top_n]
+        return "\n".join(picks) if picks else "No content available to recommend."
+
+def create_llm(name=None):
+    """LLM backend from LLM_BACKEND ("gemini" or "fake")"""
+    name = (name or os.environ.get('LLM_BACKEND', 'gemini')).lower()
+    if name == "fake":
+        return FakeLLM(latency=float(os.environ.get('FAKE_LLM_LATENCY', 0)))
+    if name == "gemini":
+        return GeminiLLM()
+    raise ValueError(f"Unknown LLM backend: {name}")
+
+llm = create_llm()
+
+def generate_gemini_recommendations(user_profile, content_list, top_n=3):
+    return llm.generate(build_prompt(user_profile, content_list, top_n))
 
 def build_user_profile_string(user):
     return (
@@ -35,13 +111,231 @@ def build_user_profile_string(user):
         f"Average Active Time: {user.average_active_time}\n"
         f"Average Idle Time: {user.average_idle_time}\n"
         f"Engaged Apps: {dict(user.engaged_apps)}\n"
-        f"Historical Attentiveness Scores: {user.historical_attentiveness_scores}\n"
+        f"Recent Attentiveness Scores: {user.historical_attentiveness_scores[-PROFILE_HISTORY:]}\n"
     )
 
 def build_content_list_string(content_db):
+    return "\n".join(content_list_entry(content) for content in content_db.values())
+
+def tokens_for_chars(chars):
+    return (chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def estimate_tokens(text):
+    return tokens_for_chars(len(text))
+
+def _shorten(text, limit):
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+def compact_content_string(content, description_chars=160):
+    """One catalogue item in three lines: title, URL, then everything else"""
+    details = [content.content_type]
+    if content.length_minutes is not None:
+        details.append(f"{content.length_minutes:g} min")
+    if content.readability_score is not None:
+        details.append(f"readability {content.readability_score:g}")
+    if content.topics:
+        details.append("topics: " + ", ".join(content.topics))
+    if content.keywords:
+        details.append("keywords: " + ", ".join(content.keywords[:5]))
+    if content.description:
+        details.append(_shorten(content.description, description_chars))
+    return f"Title: {content.title}\nURL: {content.url}\n" + "; ".join(details)
+
+def build_candidate_list_string(contents, token_budget=LLM_PROMPT_TOKEN_BUDGET):
+    """
+    Compact listing of contents in the order given, stopping before it would
+    go over token_budget (the first item is always listed)
+
+    Returns:
+        tuple: (content list string, number of items listed)
+    """
     out = []
-    for url, content in content_db.items():
-        out.append(
-            f"Title: {content.title}\nURL: {content.url}\nType: {content.content_type}\nKeywords: {content.keywords}\nTopics: {content.topics}\nDescription: {content.description}\nLength (min): {content.length_minutes}\nReadability: {content.readability_score}\n---"
-        )
-    return "\n".join(out)
+    used = 0
+    for content in contents:
+        entry = compact_content_string(content)
+        cost = estimate_tokens(entry) + 1
+        if out and used + cost > token_budget:
+            break
+        out.append(entry)
+        used += cost
+    return "\n".join(out), len(out)
+
+def _quantize(value, step):
+    return round(round(value / step) * step, 6)
+
+def profile_fingerprint(user, score_step=0.05, time_step=5.0, history=PROFILE_HISTORY):
+    """
+    The parts of a user profile the LLM answer depends on, rounded so that
+    the small moving-average drift between requests doesn't change it
+    """
+    return json.dumps({
+        "user_id": user.user_id,
+        "topics": sorted((t, _quantize(v, score_step)) for t, v in user.attentive_topics.items() if _quantize(v, score_step)),
+        "content_types": sorted((t, _quantize(v, score_step)) for t, v in user.preferred_content_types.items() if _quantize(v, score_step)),
+        "active_time": _quantize(user.average_active_time, time_step),
+        "idle_time": _quantize(user.average_idle_time, time_step),
+        "apps": sorted((a, _quantize(v, 1.0)) for a, v in user.engaged_apps.items() if _quantize(v, 1.0)),
+        "recent_scores": [_quantize(s, score_step) for s in user.historical_attentiveness_scores[-history:]],
+    }, sort_keys=True)
+
+class LLMResponseCache:
+    def __init__(self, max_items=256, ttl=600.0, disk_dir=None):
+        """
+        Args:
+            max_items: Responses kept in memory, least recently used dropped first
+            ttl: Seconds a response stays valid (memory and disk)
+            disk_dir: Optional directory to also keep responses in, one JSON file each,
+                so they survive restarts
+        """
+        self.max_items = max_items
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self._items = OrderedDict()  # key: (stored_at, response, seconds the call took)
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        # Stats
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+
+    @staticmethod
+    def make_key(*parts):
+        return hashlib.sha256("\x1f".join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    self.seconds_saved += entry[2]
+                    return entry[1]
+                del self._items[key]
+
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+                if now - record["stored_at"] < self.ttl:
+                    with self._lock:
+                        self.disk_hits += 1
+                        self.seconds_saved += record.get("seconds", 0.0)
+                        self._store(key, record["stored_at"], record["response"], record.get("seconds", 0.0))
+                    return record["response"]
+                os.remove(self._disk_path(key))
+            except (OSError, ValueError, KeyError):
+                pass
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _store(self, key, stored_at, response, seconds):
+        self._items[key] = (stored_at, response, seconds)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def put(self, key, response, seconds=0.0):
+        """Store a response; seconds is how long it took, counted as saved on later hits"""
+        stored_at = time.time()
+        with self._lock:
+            self._store(key, stored_at, response, seconds)
+        if self.disk_dir:
+            tmp = self._disk_path(key) + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"stored_at": stored_at, "seconds": seconds, "response": response}, f)
+            os.replace(tmp, self._disk_path(key))
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "ttl": self.ttl,
+                "disk": self.disk_dir,
+                "seconds_saved": self.seconds_saved
+            }
+
+response_cache = LLMResponseCache(
+    max_items=int(os.environ.get('LLM_CACHE_SIZE', 256)),
+    ttl=float(os.environ.get('LLM_CACHE_TTL', 600)),
+    disk_dir=os.environ.get('LLM_CACHE_DIR') or None
+)
+
+class PromptStats:
+    """Running totals of prompt sizes sent with and saved by candidate prefiltering"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.prompt_tokens_saved = 0
+
+    def record(self, prompt_tokens, saved):
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.prompt_tokens_saved += saved
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "prompt_tokens_saved": self.prompt_tokens_saved,
+                "candidates": LLM_CANDIDATES,
+                "token_budget": LLM_PROMPT_TOKEN_BUDGET
+            }
+
+prompt_stats = PromptStats()
+
+def prefiltered_gemini_recommendations(engine, user, top_n=3, candidates=LLM_CANDIDATES, token_budget=LLM_PROMPT_TOKEN_BUDGET):
+    """
+    LLM recommendations choosing only among the engine's own top `candidates`
+    items for user, listed compactly within token_budget, instead of the whole
+    catalogue. The answer is reused while the (quantized) profile, the
+    catalogue version and the candidates are the same.
+
+    Returns:
+        tuple: (response, report) where report has the number of candidates
+            listed, the estimated prompt tokens and how many fewer that is
+            than listing the whole catalogue
+    """
+    urls = engine.rank_content(user.user_id, max(candidates, top_n))
+    content_list, listed = build_candidate_list_string((engine.content_database[url] for url in urls), token_budget)
+    urls = urls[:listed]
+    prompt = build_prompt(build_user_profile_string(user), content_list, top_n)
+
+    key = response_cache.make_key(llm.name, GEMINI_MODEL, profile_fingerprint(user), engine.catalogue_version, top_n, *urls)
+    response = response_cache.get(key)
+    if response is None:
+        start = time.time()
+        response = llm.generate(prompt)
+        response_cache.put(key, response, time.time() - start)
+
+    prompt_tokens = estimate_tokens(prompt)
+    # The engine keeps the size of the full listing up to date as items are added
+    full_tokens = prompt_tokens - estimate_tokens(content_list) + tokens_for_chars(max(engine.content_list_chars - 1, 0))
+    saved = max(full_tokens - prompt_tokens, 0)
+    prompt_stats.record(prompt_tokens, saved)
+    return response, {
+        "candidates": listed,
+        "prompt_tokens": prompt_tokens,
+        "prompt_tokens_saved": saved
+    }
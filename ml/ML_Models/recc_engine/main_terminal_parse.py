@@ -1,48 +1,7 @@
 import sys
-import re
 import json
 from recc_engine.engine import RecommendationEngine
-
-def parse_terminal_output(lines):
-    # Example parser for the provided sample
-    screen_data = {
-        'topics': {},
-        'content_types': {},
-        'active_time': 0.0,
-        'idle_time': 0.0,
-        'engaged_apps': {},
-        'browse_time_irrelevant': 0.0
-    }
-    current_app = None
-    current_context = None
-    idle_time = 0.0
-    for line in lines:
-        if 'Active App:' in line:
-            current_app = line.split('Active App:')[1].strip()
-            screen_data['engaged_apps'][current_app] = screen_data['engaged_apps'].get(current_app, 0) + 1
-        if 'Detected Context:' in line:
-            current_context = line.split('Detected Context:')[1].strip()
-            if current_context:
-                screen_data['topics'][current_context.capitalize()] = 1.0
-        if 'Idle Time:' in line:
-            match = re.search(r'Idle Time: ([\d\.]+)', line)
-            if match:
-                idle_time = float(match.group(1))
-                screen_data['idle_time'] += idle_time
-        if 'Context' in line and 'lasted' in line:
-            match = re.search(r'lasted ([\d\.]+) seconds', line)
-            if match:
-                duration = float(match.group(1))
-                if current_context == 'browsing':
-                    screen_data['browse_time_irrelevant'] += duration
-                elif current_context == 'programming':
-                    screen_data['active_time'] += duration
-    # Assume content type by context
-    if 'programming' in screen_data['topics']:
-        screen_data['content_types']['YouTube Video'] = 1.0
-    if 'browsing' in screen_data['topics']:
-        screen_data['content_types']['Blog Post'] = 1.0
-    return screen_data
+from recc_engine.terminal_parser import iter_lines, parse_terminal_output
 
 def main():
     engine = RecommendationEngine()
@@ -64,8 +23,7 @@ def main():
         readability_score=70.0
     )
     print("Paste terminal output, then press Ctrl+D (or Ctrl+Z on Windows) to process:")
-    lines = sys.stdin.read().splitlines()
-    screen_data = parse_terminal_output(lines)
+    screen_data = parse_terminal_output(iter_lines(sys.stdin))
     # Always trigger recommendations, skip attentiveness threshold
     recs = engine.generate_recommendations("student_001", 0.0)
     if recs:
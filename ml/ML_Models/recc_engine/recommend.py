@@ -1,14 +1,19 @@
 import json
 import os
+import sys
 import time
 import tkinter as tk
 from tkinter import ttk
 import webbrowser
 from threading import Thread
 
+# Recommendations are appended to ml/data through the shared event log
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../shared')))
+from event_log import read_records, last_modified
+
 class PopupClient:
     def __init__(self):
-        self.content_path = os.path.join(os.path.dirname(__file__), 'ml', 'data', 'content.json')
+        self.content_type = 'content'
         self.check_interval = 5  # seconds
         self.last_mtime = 0
         self.content_data = []
@@ -25,26 +30,25 @@ class PopupClient:
             time.sleep(self.check_interval)
 
     def check_for_recommendations(self):
-        if not os.path.exists(self.content_path):
-            print(f"File not found: {self.content_path}")
+        mtime = last_modified(self.content_type)
+        if mtime == 0:
+            print(f"No {self.content_type} data found")
             return
 
-        mtime = os.path.getmtime(self.content_path)
         if mtime == self.last_mtime:
-            # File not modified since last check
+            # Data not modified since last check
             return
 
         self.last_mtime = mtime
 
         try:
-            with open(self.content_path, 'r') as f:
-                self.content_data = json.load(f)
+            self.content_data = read_records(self.content_type)
         except Exception as e:
-            print(f"Error reading content.json: {e}")
+            print(f"Error reading content records: {e}")
             return
 
         if not isinstance(self.content_data, list):
-            print("content.json is not a list.")
+            print("content records are not a list.")
             return
 
         self.current_index = 0
@@ -0,0 +1,208 @@
+# terminal_parser.py
+#
+# Incremental parser for the screen analyzer's terminal output.
+#
+# test_live.py prints lines such as
+#   Active App: Code
+#   Detected Context: programming
+#   Idle Time: 12.5 seconds
+#   Context 'programming' lasted 42.0 seconds
+# and the recommendation engine turns them into the screen_data dict that
+# User.calculate_attentiveness_score() and update_profile() expect.
+#
+# TerminalParser consumes lines one at a time, so it works on a list, an
+# open file, a socket or stdin without loading everything first. TailFollower
+# remembers the byte offset it has read up to in a growing log and only
+# parses lines appended since the last poll.
+
+import os
+import re
+import time
+
+_IDLE_TIME = re.compile(r'Idle Time: ([\d\.]+)')
+_LASTED = re.compile(r'lasted ([\d\.]+) seconds')
+
+HEADER_PREFIX = "Live Screen Analyzer"
+
+
+def empty_screen_data():
+    return {
+        'topics': {},
+        'content_types': {},
+        'active_time': 0.0,
+        'idle_time': 0.0,
+        'engaged_apps': {},
+        'browse_time_irrelevant': 0.0
+    }
+
+
+def iter_lines(source, skip_header=False):
+    """
+    Yield stripped, non-empty text lines from source
+
+    Args:
+        source: Iterable of str/bytes lines, a file object or a connected socket
+        skip_header: Drop the analyzer's "Live Screen Analyzer" banner lines
+    """
+    if hasattr(source, 'makefile'):
+        source = source.makefile('rb')
+    for line in source:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', 'replace')
+        line = line.strip()
+        if not line or (skip_header and line.startswith(HEADER_PREFIX)):
+            continue
+        yield line
+
+
+class TerminalParser:
+    """Accumulates screen_data from analyzer output, a line at a time"""
+
+    def __init__(self):
+        self.current_app = None
+        self.current_context = None
+        self.lines = 0
+        self.screen_data = empty_screen_data()
+
+    def feed_line(self, line):
+        self.feed((line,))
+
+    def feed(self, lines):
+        screen_data = self.screen_data
+        engaged_apps = screen_data['engaged_apps']
+        topics = screen_data['topics']
+        current_context = self.current_context
+        count = 0
+
+        for line in lines:
+            count += 1
+            # Cheap rejection first: most lines are OCR text and carry no fields
+            if ':' not in line and 'lasted' not in line:
+                continue
+            if 'Active App:' in line:
+                self.current_app = line.split('Active App:')[1].strip()
+                engaged_apps[self.current_app] = engaged_apps.get(self.current_app, 0) + 1
+            if 'Detected Context:' in line:
+                current_context = line.split('Detected Context:')[1].strip()
+                if current_context:
+                    topics[current_context.capitalize()] = 1.0
+            if 'Idle Time:' in line:
+                match = _IDLE_TIME.search(line)
+                if match:
+                    screen_data['idle_time'] += float(match.group(1))
+            if 'lasted' in line and 'Context' in line:
+                match = _LASTED.search(line)
+                if match:
+                    # Durations count towards the last detected context
+                    duration = float(match.group(1))
+                    if current_context == 'browsing':
+                        screen_data['browse_time_irrelevant'] += duration
+                    elif current_context == 'programming':
+                        screen_data['active_time'] += duration
+
+        self.current_context = current_context
+        self.lines += count
+        return self
+
+    def result(self):
+        """screen_data for everything fed so far"""
+        screen_data = self.screen_data
+        result = {
+            'topics': dict(screen_data['topics']),
+            'content_types': dict(screen_data['content_types']),
+            'active_time': screen_data['active_time'],
+            'idle_time': screen_data['idle_time'],
+            'engaged_apps': dict(screen_data['engaged_apps']),
+            'browse_time_irrelevant': screen_data['browse_time_irrelevant']
+        }
+        # Assume content type by context
+        if 'programming' in result['topics']:
+            result['content_types']['YouTube Video'] = 1.0
+        if 'browsing' in result['topics']:
+            result['content_types']['Blog Post'] = 1.0
+        return result
+
+    def take(self):
+        """
+        Return result() and start a fresh screen_data. The current app and
+        context carry over, so a duration line in the next batch still counts
+        towards the context detected in this one.
+        """
+        result = self.result()
+        self.screen_data = empty_screen_data()
+        return result
+
+
+def parse_terminal_output(lines):
+    """screen_data for an iterable of analyzer output lines"""
+    return TerminalParser().feed(lines).result()
+
+
+def parse_file(path, skip_header=True):
+    """screen_data for an analyzer log, streamed rather than read into memory"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return parse_terminal_output(iter_lines(f, skip_header=skip_header))
+
+
+class TailFollower:
+    def __init__(self, path, parser=None, skip_header=True, chunk_size=65536):
+        """
+        Args:
+            path: Log file the analyzer appends to
+            parser: TerminalParser that poll() feeds (a new one if None)
+            skip_header: Drop the analyzer's banner lines
+            chunk_size: Bytes read per call while catching up
+        """
+        self.path = path
+        self.parser = parser if parser is not None else TerminalParser()
+        self.skip_header = skip_header
+        self.chunk_size = chunk_size
+
+        # Bytes up to the end of the last complete line read
+        self.offset = 0
+        self._inode = None
+
+    def _check_rotation(self, st):
+        # A different file or a shorter one means it was replaced or truncated
+        if (self._inode is not None and st.st_ino != self._inode) or st.st_size < self.offset:
+            self.offset = 0
+        self._inode = st.st_ino
+
+    def read_lines(self):
+        """Yield complete lines appended since the last call; a trailing partial line waits"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        self._check_rotation(st)
+        if st.st_size == self.offset:
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            pending = b''
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                lines = (pending + chunk).split(b'\n')
+                pending = lines.pop()
+                for raw in lines:
+                    self.offset += len(raw) + 1
+                    yield from iter_lines((raw,), skip_header=self.skip_header)
+
+    def poll(self):
+        """Feed newly appended lines to the parser; returns how many were read"""
+        before = self.parser.lines
+        self.parser.feed(self.read_lines())
+        return self.parser.lines - before
+
+    def follow(self, interval=1.0, stop=None):
+        """Yield new lines as they are appended until stop (an Event) is set"""
+        while stop is None or not stop.is_set():
+            yielded = False
+            for line in self.read_lines():
+                yielded = True
+                yield line
+            if not yielded:
+                time.sleep(interval)
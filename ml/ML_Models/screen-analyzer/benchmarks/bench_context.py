@@ -0,0 +1,126 @@
+# bench_context.py
+#
+# Speed and accuracy of the compiled context classifier against the
+# original substring scan.
+#
+# Accuracy is measured on the labelled screen texts below (or a JSON file of
+# {"text": ..., "context": ...} records passed with --samples, e.g. OCR
+# output saved from real sessions). Speed is measured on OCR-sized texts
+# built from those samples.
+#
+# Usage (from screen-analyzer/):
+#   python benchmarks/bench_context.py [--samples labelled.json] [--sizes 1000 10000 50000]
+
+import os
+import sys
+import json
+import timeit
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../shared')))
+from context import CONTEXT_RULES, ContextClassifier, detect_context, detect_context_substring
+
+SAMPLES = [
+    ("programming", "def main():\n    data = load()\n    for row in data:\n        print(row)\n    return data"),
+    ("programming", "import React, { useState } from 'react';\nconst App = () => {\n  const [count, setCount] = useState(0);\n  console.log(count);\n}"),
+    ("programming", "public class Main {\n  public static void main(String[] args) {\n    int x = 5;\n  }\n}"),
+    ("programming", "Traceback (most recent call last): File \"app.py\", line 12, in <module> debug mode on"),
+    ("video_lecture", "Lecture 4: Dynamic Programming  |  Slide 12 of 40  |  Duration 1:12:04  Next lesson"),
+    ("video_lecture", "MIT OpenCourseWare lecture video. Topic: eigenvalues. Chapter 3. Lesson notes in the description"),
+    ("video_lecture", "Watch the full lecture series. Subscribe to the channel for the next video in this topic"),
+    ("article", "Abstract. We present a study of attention in online classrooms. Keywords: engagement, attention. Introduction"),
+    ("article", "Journal of Learning Analytics. Author: J. Smith. DOI 10.1000/xyz123. Methodology and conclusion sections follow"),
+    ("article", "References [1] Anderson et al. publication 2019. Conclusion: our study shows"),
+    ("document", "Table of Contents  1 Introduction ... page 1  2 Background ... page 4  Appendix A ... page 30"),
+    ("document", "Figure 3 shows the results. See Section 2.1 and the heading below. Paragraph 4 of the notes"),
+    ("document", "Index  Chapter 7  Appendix B  Figure 12  Table 3"),
+    ("browsing", "Google Search  About 1,230,000 results (0.42 seconds)  Sign in  History"),
+    ("browsing", "YouTube  Home  Shorts  Subscriptions  Search  Login to like videos  homepage"),
+    ("browsing", "New tab  Enter URL or search  website  signup for free"),
+    ("unknown", "Hello! Are we still meeting tomorrow at 3? Let me know."),
+    ("unknown", "Weather: sunny 24C, light wind from the west"),
+    # Substring false positives the original scan tripped over
+    ("document", "Point 3 on page 2 of the printed handout, see the figure"),
+    ("browsing", "Printer settings: search for a website to print from, then login"),
+]
+
+
+def substring_classify(rules, text):
+    """The original substring scan, for an arbitrary rule set"""
+    text_lower = text.lower()
+    scores = {context: sum(1 for keyword in keywords if keyword in text_lower)
+              for context, keywords in rules.items()}
+    best_context = max(scores, key=scores.get)
+    return best_context if scores[best_context] > 0 else "unknown"
+
+
+def grown_rules(factor):
+    """CONTEXT_RULES plus made-up keywords, to see how cost grows with rule size"""
+    rules = {}
+    for context, keywords in CONTEXT_RULES.items():
+        extra = {f"{context[:4]}term{i}" for i in range(len(keywords) * (factor - 1))}
+        rules[context] = set(keywords) | extra
+    return rules
+
+
+def load_samples(path):
+    if not path:
+        return SAMPLES
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(r["context"], r["text"]) for r in json.load(f)]
+
+
+def accuracy(fn, samples):
+    return sum(fn(text) == label for label, text in samples) / len(samples)
+
+
+def time_per_call(fns, text, repeat, runs=5):
+    """Best-of-runs microseconds per call for each fn; runs alternate between
+    the fns so other load on the machine hits them alike"""
+    best = [float('inf')] * len(fns)
+    for _ in range(runs):
+        for i, fn in enumerate(fns):
+            best[i] = min(best[i], timeit.timeit(lambda: fn(text), number=repeat))
+    return [t / repeat * 1e6 for t in best]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Context classifier accuracy and speed vs the substring scan")
+    parser.add_argument('--samples', help="JSON list of {\"text\", \"context\"} records")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 2000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--rule-factors', type=int, nargs='+', default=[1, 5, 20],
+                        help="Rule-set sizes to time, as multiples of CONTEXT_RULES")
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    agree = sum(detect_context(t) == detect_context_substring(t) for _, t in samples) / len(samples)
+    print(f"{len(samples)} labelled samples")
+    print(f"  substring accuracy: {accuracy(detect_context_substring, samples):.1%}")
+    print(f"  compiled accuracy:  {accuracy(detect_context, samples):.1%}")
+    print(f"  agreement:          {agree:.1%}")
+    for label, text in samples:
+        old, new = detect_context_substring(text), detect_context(text)
+        if old != new:
+            print(f"    [{label}] substring={old} compiled={new}: {text[:60]!r}")
+
+    corpus = "\n".join(text for _, text in samples)
+    keywords = sum(len(k) for k in CONTEXT_RULES.values())
+    print(f"\n{'chars':>8} {'substring us':>13} {'compiled us':>12} {'speedup':>8}  (shipped rules, {keywords} keywords)")
+    for size in args.sizes:
+        text = (corpus * (size // len(corpus) + 1))[:size]
+        old, new = time_per_call([detect_context_substring, detect_context], text, args.repeat)
+        print(f"{size:>8} {old:>13.1f} {new:>12.1f} {old / new:>7.1f}x")
+
+    text = (corpus * (2000 // len(corpus) + 1))[:2000]
+    print(f"\n{'keywords':>8} {'substring us':>13} {'compiled us':>12} {'speedup':>8}  (2000 chars)")
+    for factor in args.rule_factors:
+        rules = grown_rules(factor)
+        classifier = ContextClassifier(rules)
+        old, new = time_per_call([lambda t: substring_classify(rules, t), classifier.classify], text, args.repeat)
+        keywords = sum(len(k) for k in rules.values())
+        print(f"{keywords:>8} {old:>13.1f} {new:>12.1f} {old / new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
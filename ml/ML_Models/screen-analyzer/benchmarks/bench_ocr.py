@@ -0,0 +1,134 @@
+# bench_ocr.py
+#
+# Speed and text recall of the OCR pipeline against the original
+# full-resolution pytesseract call, over a folder of stored screenshots.
+#
+# Recall is the fraction of words in the original output (counted with
+# multiplicity) that the pipeline also finds.
+#
+# A screenshot can have a sidecar <name>.json with the focused window,
+#   {"rect": [x, y, w, h], "screen": [screen_w, screen_h]}
+# in which case the "region" configuration OCRs only that window and is
+# compared against the original OCR of the same crop.
+#
+# Usage (from screen-analyzer/):
+#   python benchmarks/bench_ocr.py path/to/screenshots [--repeat 2]
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from collections import Counter
+
+import cv2
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../shared')))
+from ocr import OcrPipeline, extract_text_full
+from frame_gate import FrameGate
+
+WORD = re.compile(r"\w+")
+
+
+def recall(reference, text):
+    ref = Counter(WORD.findall(reference.lower()))
+    if not ref:
+        return 1.0
+    found = Counter(WORD.findall(text.lower()))
+    return sum((ref & found).values()) / sum(ref.values())
+
+
+def load_screenshots(folder):
+    shots = []
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith(('.png', '.jpg', '.jpeg')):
+            continue
+        image = cv2.imread(os.path.join(folder, name))
+        if image is None:
+            continue
+        region = None
+        sidecar = os.path.join(folder, os.path.splitext(name)[0] + '.json')
+        if os.path.exists(sidecar):
+            with open(sidecar) as f:
+                meta = json.load(f)
+            region = (tuple(meta['rect']), tuple(meta['screen']))
+        shots.append((name, image, region))
+    return shots
+
+
+def crop(image, region, pipeline):
+    """Full-resolution crop of the region, for the reference OCR"""
+    pipeline.set_region_provider(lambda: region)
+    box = pipeline._region(image)
+    if box is None:
+        return image
+    x0, y0, x1, y1 = box
+    return image[y0:y1, x0:x1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR pipeline ms/call and recall vs the original OCR")
+    parser.add_argument('folder')
+    parser.add_argument('--repeat', type=int, default=2,
+                        help="Times each screenshot is fed in a row (repeats exercise the FrameGate skip)")
+    args = parser.parse_args()
+
+    shots = load_screenshots(args.folder)
+    if not shots:
+        print(f"No screenshots found in {args.folder}")
+        sys.exit(1)
+
+    configs = {
+        "downscale": dict(use_region=False, backend='pytesseract'),
+        "downscale+persistent": dict(use_region=False),
+        "downscale+persistent+gate": dict(use_region=False),
+        "region+downscale+persistent": dict(use_region=True),
+    }
+    pipelines = {name: OcrPipeline(**kwargs) for name, kwargs in configs.items()}
+    # Configurations ending in "+gate" put a FrameGate in front of OCR, like the API
+    gates = {name: FrameGate.from_env() for name in configs if name.endswith('+gate')}
+
+    timings = {"original": []}
+    recalls = {}
+    for name in configs:
+        timings[name] = []
+        recalls[name] = []
+
+    for shot_name, image, region in shots:
+        start = time.perf_counter()
+        reference = extract_text_full(image)
+        timings["original"].append(time.perf_counter() - start)
+        region_reference = extract_text_full(crop(image, region, OcrPipeline())) if region else reference
+
+        for name, pipeline in pipelines.items():
+            uses_region = configs[name]['use_region']
+            if uses_region and region is None:
+                continue
+            pipeline.set_region_provider((lambda r=region: r) if uses_region else None)
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                if name in gates:
+                    text, _ = gates[name].analyze(image, pipeline.extract_text)
+                else:
+                    text = pipeline.extract_text(image)
+                timings[name].append(time.perf_counter() - start)
+            recalls[name].append(recall(region_reference if uses_region else reference, text))
+        print(f"  {shot_name}: {timings['original'][-1] * 1000:.0f} ms original")
+
+    print(f"\n{len(shots)} screenshots, each fed {args.repeat}x to the pipelines")
+    print(f"{'config':<30} {'ms/call':>9} {'recall':>8} {'skipped':>8} {'backend':>12}")
+    original_ms = sum(timings["original"]) * 1000 / len(timings["original"])
+    print(f"{'original':<30} {original_ms:>9.1f} {1.0:>8.3f} {'-':>8} {'pytesseract':>12}")
+    for name, pipeline in pipelines.items():
+        if not timings[name]:
+            print(f"{name:<30} {'(no screenshots with a region sidecar)':>40}")
+            continue
+        ms = sum(timings[name]) * 1000 / len(timings[name])
+        mean_recall = sum(recalls[name]) / len(recalls[name])
+        skipped = gates[name].hits if name in gates else 0
+        print(f"{name:<30} {ms:>9.1f} {mean_recall:>8.3f} {skipped:>8} {str(pipeline.stats()['backend']):>12}")
+
+
+if __name__ == '__main__':
+    main()
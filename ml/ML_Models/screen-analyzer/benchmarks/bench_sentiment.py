@@ -0,0 +1,108 @@
+# bench_sentiment.py
+#
+# Per-frame cost of the cached line-by-line sentiment scorer against one
+# VADER polarity_scores call over the whole OCR text.
+#
+# Frames are simulated as a block of UI chrome that stays the same plus a
+# few content lines that change each frame (--changed). Pass --frames with a
+# JSON list of OCR texts saved from real sessions to use those instead.
+#
+# Usage (from screen-analyzer/):
+#   python benchmarks/bench_sentiment.py [--frames ocr_frames.json] [--count 200] [--changed 5]
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../shared')))
+from sentiment import SentimentScorer, analyze_sentiment_whole, label_for
+
+CHROME = [
+    "File  Edit  View  History  Bookmarks  Profiles  Tab  Window  Help",
+    "Inbox (3)  |  Lecture 7 - Graph Algorithms  |  New Tab",
+    "Back  Forward  Reload  https://course.example.edu/cs201/week7",
+    "Home  Courses  Calendar  Grades  Messages  Settings  Sign out",
+    "Search the course",
+    "Week 7: Shortest paths",
+    "Announcements  Discussion  Assignments  Resources",
+    "Dijkstra's algorithm finds shortest paths from a single source.",
+    "Each edge weight must be non-negative for the algorithm to be correct.",
+    "Priority queue operations dominate the running time.",
+    "Bellman-Ford handles negative weights and detects negative cycles.",
+    "Problem set 4 is due Friday at 11:59 pm.",
+    "Office hours: Tuesday 2-4 pm, room 310.",
+    "Comments (12)",
+    "Privacy  Terms  Accessibility  Help centre",
+]
+
+CONTENT = [
+    "This lecture was really helpful, thanks!",
+    "I'm completely lost on question 3, this is frustrating.",
+    "Great explanation of relaxation, finally makes sense.",
+    "The autograder keeps failing and I hate it.",
+    "Can someone explain why the heap is needed here?",
+    "Awesome, got all the tests passing :)",
+    "This is the worst problem set so far, terrible instructions.",
+    "Reminder: quiz on Monday covers weeks 5-7.",
+    "Love the visualisations in these slides.",
+    "I'm worried I'll fail the midterm.",
+]
+
+
+def simulated_frames(count, changed, seed=0):
+    rng = random.Random(seed)
+    frames = []
+    for _ in range(count):
+        lines = CHROME + [rng.choice(CONTENT) + f" #{rng.randint(0, 30)}" for _ in range(changed)]
+        frames.append("\n".join(lines))
+    return frames
+
+
+def load_frames(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cached line sentiment vs whole-text VADER")
+    parser.add_argument('--frames', help="JSON list of OCR texts, one per frame")
+    parser.add_argument('--count', type=int, default=200, help="Simulated frames")
+    parser.add_argument('--changed', type=int, default=5, help="Changing lines per simulated frame")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames) if args.frames else simulated_frames(args.count, args.changed)
+    chars = sum(len(f) for f in frames) / len(frames)
+    print(f"{len(frames)} frames, {chars:.0f} chars on average")
+
+    start = time.perf_counter()
+    whole = [analyze_sentiment_whole(f) for f in frames]
+    whole_ms = (time.perf_counter() - start) / len(frames) * 1000
+
+    scorer = SentimentScorer()
+    start = time.perf_counter()
+    cached = [label_for(scorer.compound(f)) for f in frames]
+    cached_ms = (time.perf_counter() - start) / len(frames) * 1000
+
+    cold = SentimentScorer()
+    start = time.perf_counter()
+    for f in frames[:20]:
+        cold.clear()
+        cold.compound(f)
+    cold_ms = (time.perf_counter() - start) / min(20, len(frames)) * 1000
+
+    agree = sum(a == b for a, b in zip(whole, cached)) / len(frames)
+    stats = scorer.stats()
+    hit_rate = stats["hits"] / max(1, stats["hits"] + stats["misses"])
+    print(f"  whole text:          {whole_ms:8.3f} ms/frame")
+    print(f"  per line, no cache:  {cold_ms:8.3f} ms/frame")
+    print(f"  per line, cached:    {cached_ms:8.3f} ms/frame  ({whole_ms / cached_ms:.1f}x, {hit_rate:.0%} line hits)")
+    print(f"  label agreement:     {agree:.1%}")
+    for label in ("positive", "neutral", "negative"):
+        print(f"    {label:<9} whole={whole.count(label):>4} cached={cached.count(label):>4}")
+
+
+if __name__ == '__main__':
+    main()
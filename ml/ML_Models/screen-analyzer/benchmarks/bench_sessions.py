@@ -0,0 +1,68 @@
+# bench_sessions.py
+#
+# Per-request cost of the session store as the number of users grows.
+#
+# Simulates the session work /api/analyze-screen does on every request
+# (look up the user's session, record the context, store the screenshot,
+# copy the context log) for N distinct users hitting the server round-robin.
+# The cost per request should stay flat as N grows.
+#
+# Usage (from screen-analyzer/):
+#   python benchmarks/bench_sessions.py [--requests 200000]
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../shared')))
+from session_store import SessionStore
+
+CONTEXTS = ["programming", "video_lecture", "article", "document", "browsing", "unknown"]
+
+
+def simulate_request(sessions, user_id, context):
+    session = sessions.get(user_id)
+    with session.lock:
+        session.switch_context(context)
+        session.add_screenshot("2024-01-01T00:00:00", context, "Google Chrome")
+        return list(session.context_log)
+
+
+def run(user_count, requests, max_sessions):
+    sessions = SessionStore(max_sessions=max_sessions)
+    rng = random.Random(0)
+    user_ids = [f"user-{i}" for i in range(user_count)]
+    contexts = [rng.choice(CONTEXTS) for _ in range(1024)]
+
+    # Warm up so every user already has a session
+    for i, user_id in enumerate(user_ids):
+        simulate_request(sessions, user_id, contexts[i % 1024])
+
+    start = time.perf_counter()
+    for i in range(requests):
+        simulate_request(sessions, user_ids[i % user_count], contexts[i % 1024])
+    elapsed = time.perf_counter() - start
+    return elapsed / requests * 1e6, len(sessions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session store per-request cost vs user count")
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--users', type=int, nargs='+', default=[1, 10, 100, 1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'users':>8} {'sessions':>9} {'us/request':>11}")
+    for user_count in args.users:
+        us, held = run(user_count, args.requests, max_sessions=max(args.users))
+        print(f"{user_count:>8} {held:>9} {us:>11.2f}")
+
+    # With more users than max_sessions every request evicts one session
+    user_count = max(args.users)
+    us, held = run(user_count, args.requests, max_sessions=user_count // 10)
+    print(f"{user_count:>8} {held:>9} {us:>11.2f}  (LRU cap {user_count // 10})")
+
+
+if __name__ == '__main__':
+    main()
@@ -209,28 +209,40 @@ import sys
 import time
 from datetime import datetime
 import base64
-from io import BytesIO
-from PIL import Image
 import cv2
 import numpy as np
 import json
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 
 # Add shared directory to sys.path
 shared_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../shared'))
 sys.path.append(shared_path)
 
+# Add the ML_Models shared directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../shared')))
+from event_log import append_event, start_compactor
+
+from session_store import SessionStore
+from frame_gate import FrameGate
+from capture_worker import CaptureWorker
+from focus_events import create_focus_source
+from thumbnail import ThumbnailCache
+import main_loop
+
 # Import Mac-specific modules
 from mac_capture import capture_screen
-from mac_window import get_active_app
+from mac_window import get_active_app, get_focused_window_rect
+from desktop_bridge import bridge as desktop_bridge
 from idle_tracker import get_idle_time
 
 # Import shared modules
 try:
-    from ocr import extract_text
+    from ocr import extract_text, set_region_provider
+    # OCR only the focused window instead of the whole screen
+    set_region_provider(get_focused_window_rect)
     from context import detect_context
-    from sentiment import analyze_sentiment
+    from sentiment import analyze_sentiment, scorer as sentiment_scorer
     from chrome_tab import get_chrome_tab_info
 except ImportError:
     def extract_text(image):
@@ -239,61 +251,95 @@ except ImportError:
         return "unknown"
     def analyze_sentiment(text):
         return "neutral"
+    sentiment_scorer = None
     def get_chrome_tab_info():
         return "Unknown Tab", "Unknown URL"
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Store session data
-session_data = {
-    "start_time": time.time(),
-    "contexts": {},
-    "current_context": None,
-    "current_context_start": time.time(),
-    "last_context_duration": 0,
-    "context_log": [],
-    "screenshots": []
-}
-
-# Directory to save data
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'data')
-
-# Create data directory if it doesn't exist
-os.makedirs(DATA_DIR, exist_ok=True)
-
-def write_to_json_file(data_type, data):
-    """Write data to a JSON file in the data directory"""
-    try:
-        file_path = os.path.join(DATA_DIR, f"{data_type}.json")
-        
-        # Read existing data if available
-        existing_data = []
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                try:
-                    existing_data = json.load(f)
-                except json.JSONDecodeError:
-                    existing_data = []
-        
-        # Ensure existing_data is a list
-        if not isinstance(existing_data, list):
-            existing_data = []
-        
-        # Add timestamp to the data
-        data['timestamp'] = datetime.now().isoformat()
-        
-        # Append new data
-        existing_data.append(data)
-        
-        # Write updated data back to the file
-        with open(file_path, 'w') as f:
-            json.dump(existing_data, f, indent=2)
-            
-        return True
-    except Exception as e:
-        print(f"Error writing to JSON file: {e}")
-        return False
+# Reuse text/context/sentiment while the screen stays the same
+screen_gate = FrameGate.from_env()
+
+def analyze_content(screen):
+    """OCR the screen and classify the text"""
+    text = extract_text(screen)
+    return {
+        "text": text,
+        "context": detect_context(text),
+        "sentiment": analyze_sentiment(text)
+    }
+
+def sample_screen():
+    """Capture and analyse the screen once. Runs on the capture worker thread."""
+    # Capture screen, only re-analysing it if it changed since last time
+    captured_at = time.time()
+    screen = capture_screen()
+    content, _ = screen_gate.analyze(screen, analyze_content)
+    # Downsized JPEG, served separately from /api/screenshot/<id>
+    screenshot_id = thumbnails.add(screen)
+
+    # Get active app and Chrome tab info
+    app_name = get_active_app()
+    chrome_title, chrome_url = None, None
+    if "chrome" in app_name.lower():
+        chrome_title, chrome_url = get_chrome_tab_info()
+
+    # Samples back up the focus source, which may miss or not deliver events;
+    # emit() ignores the app if it's already current
+    focus_source.emit(app_name, captured_at)
+
+    return {
+        "timestamp": datetime.utcfromtimestamp(captured_at).isoformat(),
+        "captured_at": captured_at,
+        "screenshot_id": screenshot_id,
+        "text": content["text"],
+        "context": content["context"],
+        "sentiment": content["sentiment"],
+        "active_app": app_name,
+        "idle_time": get_idle_time(),
+        "chrome_title": chrome_title,
+        "chrome_url": chrome_url
+    }
+
+# Encoded screenshots, keyed by a hash of the downsized frame
+thumbnails = ThumbnailCache(
+    max_width=int(os.environ.get('SCREENSHOT_MAX_WIDTH', 640)),
+    quality=int(os.environ.get('SCREENSHOT_QUALITY', 30)),
+    max_items=int(os.environ.get('SCREENSHOT_CACHE_SIZE', 32))
+)
+
+# Samples the screen in the background; handlers serve the latest result
+capture_worker = CaptureWorker(sample_screen, interval=float(os.environ.get('SCREEN_CAPTURE_INTERVAL', 2.0)))
+# How long the first request after startup waits for the first sample
+FIRST_SAMPLE_TIMEOUT = 30
+# Upper bound for a long-poll request
+MAX_POLL_TIMEOUT = 60
+
+# Focus changes come from the focus source (NSWorkspace notifications on the
+# main run loop; get_app is only polled with FOCUS_BACKEND=poll) and from
+# every screen sample
+focus_source = create_focus_source(get_app=get_active_app)
+
+@focus_source.subscribe
+def on_focus_change(app_name, timestamp):
+    desktop_bridge.invalidate()
+    for session in sessions.all():
+        with session.lock:
+            session.switch_app(app_name, at=timestamp)
+    # Re-sample right away so the new context is picked up too
+    capture_worker.wake()
+
+def start_background():
+    """Start the capture worker and focus events on first use"""
+    capture_worker.start()
+    focus_source.start()
+
+# Session state per userId, so one server can track a whole lab
+sessions = SessionStore(
+    max_sessions=int(os.environ.get('SCREEN_MAX_SESSIONS', 1000)),
+    idle_timeout=int(os.environ.get('SCREEN_SESSION_IDLE_TIMEOUT', 0))
+)
 
 @app.route('/api/status', methods=['GET'])
 def get_status():
@@ -304,10 +350,10 @@ def get_status():
         title, url = None, None
         if "chrome" in app_name.lower():
             title, url = get_chrome_tab_info()
-        session_duration = time.time() - session_data["start_time"]
-        current_context_duration = 0
-        if session_data["current_context"]:
-            current_context_duration = time.time() - session_data["current_context_start"]
+        user_id = request.args.get('userId')
+        session = sessions.get(user_id or 'unknown')
+        session_duration = session.session_duration()
+        current_context_duration = session.current_context_duration()
             
         response_data = {
             "timestamp": timestamp,
@@ -316,12 +362,11 @@ def get_status():
             "chrome_title": title,
             "chrome_url": url,
             "session_duration": session_duration,
-            "current_context": session_data["current_context"],
+            "current_context": session.current_context,
             "context_duration": current_context_duration
         }
         
         # Save to JSON file if userId is provided
-        user_id = request.args.get('userId')
         if user_id:
             status_data = {
                 'userId': user_id,
@@ -329,9 +374,9 @@ def get_status():
                 'idle_time': idle_seconds,
                 'chrome_title': title,
                 'chrome_url': url,
-                'current_context': session_data["current_context"],
+                'current_context': session.current_context,
             }
-            write_to_json_file('status', status_data)
+            append_event('status', status_data)
             
         return jsonify(response_data)
     except Exception as e:
@@ -438,93 +483,65 @@ def get_status():
 #         return jsonify(response_data)
 #     except Exception as e:
 #         return jsonify({"error": str(e)}), 500
-@app.route('/api/analyze-screen', methods=['GET'])
-def analyze_screen():
-    try:
-        # Get user_id from request args with a default value
-        user_id = request.args.get('userId', 'unknown')
-        
-        # Capture screen
-        screen = capture_screen()
-        text = extract_text(screen)
-        context = detect_context(text)
-        sentiment = analyze_sentiment(text)
-        img_display = Image.fromarray(cv2.cvtColor(screen, cv2.COLOR_BGR2RGB))
-        buffered = BytesIO()
-        img_display.save(buffered, format="JPEG", quality=30)
-        img_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
-
-        # Get active app and Chrome tab info
-        app_name = get_active_app()
-        chrome_title, chrome_url = None, None
-        if "chrome" in app_name.lower():
-            chrome_title, chrome_url = get_chrome_tab_info()
-
-        # Get idle time
-        idle_seconds = get_idle_time()
-
-        # Track context changes and log
-        context_change_duration = 0
-        if session_data["current_context"] != context:
-            if session_data["current_context"]:
-                duration = time.time() - session_data["current_context_start"]
-                # Add to context durations
-                if session_data["current_context"] in session_data["contexts"]:
-                    session_data["contexts"][session_data["current_context"]] += duration
-                else:
-                    session_data["contexts"][session_data["current_context"]] = duration
-                session_data["last_context_duration"] = duration
-                context_change_duration = duration
-                # Log the context switch
-                session_data["context_log"].append({
-                    "context": session_data["current_context"],
-                    "duration": duration,
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-                # Limit log size
-                if len(session_data["context_log"]) > 10:
-                    session_data["context_log"].pop(0)
-            # Update current context
-            session_data["current_context"] = context
-            session_data["current_context_start"] = time.time()
-        else:
-            context_change_duration = session_data.get("last_context_duration", 0)
-
-        # Store screenshot (limited to last 5)
-        timestamp = datetime.utcnow().isoformat()
-        session_data["screenshots"].append({
-            "timestamp": timestamp,
-            "context": context,
-            "app": app_name
-        })
-        if len(session_data["screenshots"]) > 5:
-            session_data["screenshots"].pop(0)
-
-        # Generate insights
-        insights = []
-        if idle_seconds > 90:
-            insights.append("Long period of inactivity detected")
-        if sentiment == "negative":
-            insights.append("Negative sentiment detected in screen content")
-        if "youtube.com/watch" in text.lower():
-            insights.append("Video lecture or educational content detected")
-            
-        response_data = {
-            "timestamp": timestamp,
-            "screenshot": f"data:image/jpeg;base64,{img_base64}",
-            "text_sample": text[:500] + ("..." if len(text) > 500 else ""),
-            "context": context,
-            "sentiment": sentiment,
-            "active_app": app_name,
-            "idle_time": idle_seconds,
-            "insights": insights,
-            "chrome_title": chrome_title,
-            "chrome_url": chrome_url,
-            "context_change_duration": context_change_duration,
-            "context_log": session_data.get("context_log", [])
-        }
-
-        # Always save to screen.json file (not conditional on userId being provided)
+def screenshot_ref(screenshot_id, base_url, inline=False):
+    """Absolute URL of a screenshot, or the old inline data URL when inline is set"""
+    if inline:
+        jpeg = thumbnails.get(screenshot_id)
+        if jpeg is not None:
+            return f"data:image/jpeg;base64,{base64.b64encode(jpeg).decode('utf-8')}"
+    return f"{base_url}api/screenshot/{screenshot_id}"
+
+def build_screen_response(user_id, version, sample, base_url, inline=False):
+    """Apply a capture sample to the user's session and build the analyze-screen response"""
+    text = sample["text"]
+    context = sample["context"]
+    sentiment = sample["sentiment"]
+    app_name = sample["active_app"]
+    idle_seconds = sample["idle_time"]
+
+    # Track context changes and log (the session keeps the last 10 switches
+    # and the last 5 screenshots). A sample is only recorded once per user,
+    # however often they poll.
+    session = sessions.get(user_id)
+    with session.lock:
+        if session.current_app is None and focus_source.current_app is not None:
+            # New session: start its app timeline from the current focus
+            session.switch_app(focus_source.current_app, at=focus_source.current_since)
+        is_new = session.last_capture_version != version
+        context_change_duration = session.switch_context(context, at=sample["captured_at"])
+        if is_new:
+            session.add_screenshot(sample["timestamp"], context, app_name)
+            session.last_capture_version = version
+        context_log = list(session.context_log)
+
+    # Generate insights
+    insights = []
+    if idle_seconds > 90:
+        insights.append("Long period of inactivity detected")
+    if sentiment == "negative":
+        insights.append("Negative sentiment detected in screen content")
+    if "youtube.com/watch" in text.lower():
+        insights.append("Video lecture or educational content detected")
+
+    response_data = {
+        "timestamp": sample["timestamp"],
+        "version": version,
+        "screenshot": screenshot_ref(sample["screenshot_id"], base_url, inline),
+        "screenshot_id": sample["screenshot_id"],
+        "text_sample": text[:500] + ("..." if len(text) > 500 else ""),
+        "context": context,
+        "sentiment": sentiment,
+        "active_app": app_name,
+        "idle_time": idle_seconds,
+        "insights": insights,
+        "chrome_title": sample["chrome_title"],
+        "chrome_url": sample["chrome_url"],
+        "context_change_duration": context_change_duration,
+        "context_log": context_log
+    }
+
+    # Save each new sample to screen.json (not conditional on userId being provided)
+    if is_new:
         screen_data = {
             'userId': user_id,
             'context': context,
@@ -532,46 +549,131 @@ def analyze_screen():
             'active_app': app_name,
             'idle_time': idle_seconds,
             'insights': insights,
-            'chrome_title': chrome_title,
-            'chrome_url': chrome_url
+            'chrome_title': sample["chrome_title"],
+            'chrome_url': sample["chrome_url"]
         }
-        write_to_json_file('screen', screen_data)
-            
-        return jsonify(response_data)
+        append_event('screen', screen_data)
+
+    return response_data
+
+def no_sample_response():
+    return jsonify({"error": capture_worker.error or "No screen sample available yet"}), 503
+
+@app.route('/api/analyze-screen', methods=['GET'])
+def analyze_screen():
+    """Latest background capture, without waiting for capture or OCR"""
+    try:
+        # Get user_id from request args with a default value
+        user_id = request.args.get('userId', 'unknown')
+
+        start_background()
+        version, sample = capture_worker.get_latest()
+        if sample is None:
+            # Only the first request after startup has to wait
+            version, sample = capture_worker.wait_for(0, timeout=FIRST_SAMPLE_TIMEOUT)
+            if sample is None:
+                return no_sample_response()
+
+        inline = request.args.get('inline') in ('1', 'true')
+        return jsonify(build_screen_response(user_id, version, sample, request.host_url, inline))
     except Exception as e:
         print(f"Error in analyze_screen: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/analyze-screen/poll', methods=['GET'])
+def analyze_screen_poll():
+    """
+    Long-poll: wait until a sample newer than ?since=<version> exists (or
+    ?timeout= seconds pass) and return it. "changed" is false on timeout.
+    """
+    try:
+        user_id = request.args.get('userId', 'unknown')
+        since = int(request.args.get('since', 0))
+        timeout = min(float(request.args.get('timeout', 25)), MAX_POLL_TIMEOUT)
+
+        start_background()
+        version, sample = capture_worker.wait_for(since, timeout=timeout)
+        if sample is None:
+            return no_sample_response()
+
+        inline = request.args.get('inline') in ('1', 'true')
+        response_data = build_screen_response(user_id, version, sample, request.host_url, inline)
+        response_data["changed"] = version > since
+        return jsonify(response_data)
+    except Exception as e:
+        print(f"Error in analyze_screen_poll: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/analyze-screen/stream', methods=['GET'])
+def analyze_screen_stream():
+    """Server-sent events: one "data:" message per new capture sample"""
+    user_id = request.args.get('userId', 'unknown')
+    base_url = request.host_url
+    start_background()
+
+    def events():
+        version = 0
+        while True:
+            new_version, sample = capture_worker.wait_for(version, timeout=15)
+            if new_version == version or sample is None:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            version = new_version
+            payload = json.dumps(build_screen_response(user_id, version, sample, base_url))
+            yield f"id: {version}\ndata: {payload}\n\n"
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/screenshot/<screenshot_id>', methods=['GET'])
+def get_screenshot(screenshot_id):
+    """JPEG thumbnail of a capture. Ids are content hashes, so responses never change."""
+    jpeg = thumbnails.get(screenshot_id)
+    if jpeg is None:
+        return jsonify({"error": "Screenshot not found or expired"}), 404
+    return Response(jpeg, mimetype='image/jpeg',
+                    headers={'Cache-Control': 'public, max-age=3600, immutable'})
+
+@app.route('/api/cache-stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters for the unchanged-screen cache, plus capture worker and desktop lookup stats"""
+    return jsonify({
+        **screen_gate.stats(),
+        "capture_worker": capture_worker.stats(),
+        "desktop": desktop_bridge.stats(),
+        "focus": focus_source.stats(),
+        "thumbnails": thumbnails.stats(),
+        "sentiment": sentiment_scorer.stats() if sentiment_scorer else None
+    })
+
 @app.route('/api/session-stats', methods=['GET'])
 def get_session_stats():
     try:
-        contexts_with_current = dict(session_data["contexts"])
-        if session_data["current_context"]:
-            current_duration = time.time() - session_data["current_context_start"]
-            if session_data["current_context"] in contexts_with_current:
-                contexts_with_current[session_data["current_context"]] += current_duration
-            else:
-                contexts_with_current[session_data["current_context"]] = current_duration
-        context_list = [
-            {"context": k, "duration": v} 
-            for k, v in sorted(contexts_with_current.items(), key=lambda x: x[1], reverse=True)
-        ]
+        user_id = request.args.get('userId')
+        session = sessions.get(user_id or 'unknown')
+        with session.lock:
+            context_list = session.context_durations()
+            screenshot_history = list(session.screenshots)
+            app_list = session.app_durations()
+            app_switches = list(session.app_log)
         
         response_data = {
-            "session_duration": time.time() - session_data["start_time"],
+            "session_duration": session.session_duration(),
             "context_durations": context_list,
-            "screenshot_history": session_data["screenshots"]
+            "screenshot_history": screenshot_history,
+            "app_durations": app_list,
+            "app_switches": app_switches
         }
         
         # Save to JSON file if userId is provided
-        user_id = request.args.get('userId')
         if user_id:
             stats_data = {
                 'userId': user_id,
-                'session_duration': time.time() - session_data["start_time"],
+                'session_duration': session.session_duration(),
                 'context_durations': context_list
             }
-            write_to_json_file('session_stats', stats_data)
+            append_event('session_stats', stats_data)
             
         return jsonify(response_data)
     except Exception as e:
@@ -580,22 +682,15 @@ def get_session_stats():
 @app.route('/api/reset-session', methods=['POST'])
 def reset_session():
     try:
-        session_data["start_time"] = time.time()
-        session_data["contexts"] = {}
-        session_data["current_context"] = None
-        session_data["current_context_start"] = time.time()
-        session_data["last_context_duration"] = 0
-        session_data["context_log"] = []
-        session_data["screenshots"] = []
-        
         # Save reset event to JSON if userId is provided
         user_id = request.json.get('userId') if request.json else None
+        sessions.reset(user_id or 'unknown')
         if user_id:
             reset_data = {
                 'userId': user_id,
                 'action': 'reset_session'
             }
-            write_to_json_file('session_events', reset_data)
+            append_event('session_events', reset_data)
             
         return jsonify({
             "success": True,
@@ -607,4 +702,8 @@ def reset_session():
 if __name__ == '__main__':
     print("Screen Analysis API Server starting...")
     print("Running on macOS")
-    app.run(debug=True, port=5001)
\ No newline at end of file
+    start_compactor(['status', 'screen', 'session_stats', 'session_events'])
+    # threaded=True so long-poll and SSE clients don't block other requests.
+    # The server runs on a worker thread so the main thread can run the event
+    # loop the in-process app and Chrome tab lookups need (no reloader there)
+    main_loop.run(lambda: app.run(debug=True, port=5001, threaded=True, use_reloader=False))
\ No newline at end of file
@@ -1,10 +1,31 @@
 # mac_window.py
-import subprocess
+# Needs screen-analyzer/shared on sys.path (api.py and test_live.py add it)
+from desktop_bridge import bridge
 
 def get_active_app():
-    script = 'tell application "System Events" to name of first process where frontmost is true'
+    """Frontmost app name, looked up in-process and cached briefly by the desktop bridge"""
+    return bridge.get_active_app()
+
+def get_focused_window_rect():
+    """
+    Bounds of the frontmost app's main window as ((x, y, w, h), (screen_w, screen_h)),
+    both in screen points, or None if it can't be determined
+    """
     try:
-        app_name = subprocess.check_output(['osascript', '-e', script]).decode('utf-8').strip()
-        return app_name
+        import Quartz
+        from AppKit import NSWorkspace
+        pid = NSWorkspace.sharedWorkspace().frontmostApplication().processIdentifier()
+        windows = Quartz.CGWindowListCopyWindowInfo(
+            Quartz.kCGWindowListOptionOnScreenOnly | Quartz.kCGWindowListExcludeDesktopElements,
+            Quartz.kCGNullWindowID
+        )
+        # Front-to-back order, so the first normal window of the app is the focused one
+        for window in windows:
+            if window.get('kCGWindowOwnerPID') == pid and window.get('kCGWindowLayer') == 0:
+                bounds = window['kCGWindowBounds']
+                screen = Quartz.CGDisplayBounds(Quartz.CGMainDisplayID())
+                return ((bounds['X'], bounds['Y'], bounds['Width'], bounds['Height']),
+                        (screen.size.width, screen.size.height))
     except Exception as e:
-        return f"Unknown ({e})"
+        print(f"Focused window lookup error: {e}")
+    return None
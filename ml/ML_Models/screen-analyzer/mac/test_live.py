@@ -10,9 +10,10 @@ sys.path.append(shared_path)
 import time
 from datetime import datetime
 from mac_capture import capture_screen
-from ocr import extract_text
+from ocr import extract_text, set_region_provider
+from frame_gate import FrameGate
 from context import detect_context
-from mac_window import get_active_app
+from mac_window import get_active_app, get_focused_window_rect
 from chrome_tab import get_chrome_tab_info
 from sentiment import analyze_sentiment
 from idle_tracker import get_idle_time  # Mac idle tracker (Quartz)
@@ -20,6 +21,11 @@ from idle_tracker import get_idle_time  # Mac idle tracker (Quartz)
 def run_analyzer(interval=5):
     print("\nLive Screen Analyzer - MacOS (Ctrl+C to stop)\n")
 
+    # OCR only the focused window instead of the whole screen
+    set_region_provider(get_focused_window_rect)
+    # Only OCR screens that changed since the last one
+    ocr_gate = FrameGate.from_env()
+
     last_context = None
     context_start_time = time.time()
 
@@ -27,7 +33,7 @@ def run_analyzer(interval=5):
         timestamp = datetime.utcnow().isoformat()
         app = get_active_app()
         frame = capture_screen()
-        text = extract_text(frame)
+        text, _ = ocr_gate.analyze(frame, extract_text)
         context = detect_context(text)
         sentiment = analyze_sentiment(text)
         idle_seconds = get_idle_time()
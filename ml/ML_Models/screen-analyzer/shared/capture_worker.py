@@ -0,0 +1,114 @@
+# capture_worker.py
+#
+# Run the screen capture + analysis pipeline off the request path.
+#
+# A CaptureWorker thread samples the screen every `interval` seconds and
+# publishes each result with an increasing version number. Request handlers
+# read the latest result without waiting for capture or OCR, and long-poll
+# or streaming handlers block on wait_for() until a newer version appears.
+
+import time
+import threading
+
+
+class CaptureWorker:
+    def __init__(self, sample_fn, interval=2.0):
+        """
+        Args:
+            sample_fn: Callable that captures and analyses the screen, returning a dict
+            interval: Seconds between the start of consecutive samples
+        """
+        self.sample_fn = sample_fn
+        self.interval = interval
+
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self.version = 0
+        self.latest = None
+        self.error = None
+
+        # Stats
+        self.samples = 0
+        self.errors = 0
+        self.last_sample_seconds = 0.0
+
+    def start(self):
+        """Start the sampling thread if it isn't running yet"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='capture-worker', daemon=True)
+                self._thread.start()
+        return self
+
+    def wake(self):
+        """Take the next sample now instead of waiting out the interval"""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def _run(self):
+        while not self._stop.is_set():
+            start = time.monotonic()
+            try:
+                result = self.sample_fn()
+                error = None
+            except Exception as e:
+                print(f"Error in capture worker: {e}")
+                result, error = None, str(e)
+
+            with self._cond:
+                self.last_sample_seconds = time.monotonic() - start
+                if error is None:
+                    self.latest = result
+                    self.error = None
+                    self.samples += 1
+                    self.version += 1
+                else:
+                    self.error = error
+                    self.errors += 1
+                self._cond.notify_all()
+
+            self._wake.wait(max(0.0, self.interval - (time.monotonic() - start)))
+            self._wake.clear()
+
+    def get_latest(self):
+        """Return (version, result) for the newest sample; (0, None) before the first one"""
+        with self._cond:
+            return self.version, self.latest
+
+    def wait_for(self, since_version=0, timeout=None):
+        """
+        Block until a sample newer than since_version exists or timeout runs out
+
+        Returns:
+            tuple: (version, result); version == since_version means nothing new arrived
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self.version <= since_version and not self._stop.is_set():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self.version, self.latest
+
+    def stats(self):
+        with self._cond:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "interval": self.interval,
+                "version": self.version,
+                "samples": self.samples,
+                "errors": self.errors,
+                "last_error": self.error,
+                "last_sample_ms": self.last_sample_seconds * 1000
+            }
@@ -1,5 +1,9 @@
 # context.py
 
+import os
+import json
+import string
+
 # Expanded keywords for more accurate classification
 CONTEXT_RULES = {
     "programming": {
@@ -24,7 +28,151 @@ CONTEXT_RULES = {
     }
 }
 
+# Punctuation and whitespace separate words; "_" stays part of a word
+# (snake_case). ASCII letters are lowercased in the same pass.
+_PUNCTUATION = set(string.punctuation.encode()) - {ord('_')}
+_WHITESPACE = set(string.whitespace.encode())
+_SEPARATORS = bytes(32 if i in _PUNCTUATION or i in _WHITESPACE else ord(chr(i).lower()) if i < 128 else i
+                    for i in range(256))
+
+# From SCAN_MIN_BYTES of text up, a rule set of at most SCAN_MAX_WORDS words
+# is cheaper to find with one substring search per word than by tokenizing
+SCAN_MIN_BYTES = 5000
+SCAN_MAX_WORDS = 80
+
+
+def _word_bytes(text):
+    """text lowercased, as bytes with every separator mapped to a space"""
+    if not text.isascii():
+        text = text.lower()
+    return text.encode('utf-8', 'replace').translate(_SEPARATORS)
+
+
+def tokenize(text):
+    """Split text into lowercased word tokens (bytes), punctuation dropped"""
+    return _word_bytes(text).split()
+
+
+class ContextClassifier:
+    """
+    Keyword classifier compiled once from a rule set.
+
+    The text is lowercased and its punctuation mapped to spaces in one
+    bytes.translate pass. Short texts, and any text under a large rule set,
+    are then split into tokens once and intersected with a hashed set of
+    all keywords, so the cost doesn't grow with the number of keywords.
+    Long texts under a small rule set skip the per-token objects: each
+    word is found with one substring search for " word ".
+
+    Keywords match whole words ("int" no longer matches "print"),
+    multi-word keywords ("machine learning") match consecutive words, and
+    symbol keywords ("{") match anywhere. Like the original scan, each
+    keyword counts once no matter how often it appears, and ties go to the
+    context listed first.
+    """
+
+    def __init__(self, rules=None, default="unknown"):
+        """
+        Args:
+            rules: {context: keywords}, where keywords is a set/list (weight 1 each)
+                   or a {keyword: weight} dict. Defaults to CONTEXT_RULES.
+            default: Returned when no keyword matches
+        """
+        rules = CONTEXT_RULES if rules is None else rules
+        self.default = default
+        self.contexts = list(rules)
+
+        index = {}    # single word: [(context index, weight), ...]
+        phrases = {}  # b" multi word ": [...]
+        symbols = {}  # keyword made only of punctuation: [...]
+        for i, context in enumerate(self.contexts):
+            keywords = rules[context]
+            if not isinstance(keywords, dict):
+                keywords = {keyword: 1 for keyword in keywords}
+            for keyword, weight in keywords.items():
+                keyword = keyword.lower()
+                tokens = tokenize(keyword)
+                if not tokens:
+                    target, key = symbols, keyword.strip()
+                elif len(tokens) == 1:
+                    target, key = index, tokens[0]
+                else:
+                    target, key = phrases, b" " + b" ".join(tokens) + b" "
+                if key:
+                    target.setdefault(key, []).append((i, weight))
+
+        self._index = index
+        self._words = frozenset(index)
+        # str needles: "in" on str costs less per call than on bytes. The
+        # latin-1 round trip maps each byte to one char, so matches are exact
+        self._padded = [((b" " + word + b" ").decode('latin-1'), hits) for word, hits in index.items()]
+        self._phrases = list(phrases.items())
+        self._symbols = list(symbols.items())
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """
+        Load rules from a JSON file:
+            {"programming": ["def", "class", ...], "article": {"abstract": 2, "doi": 3}, ...}
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), **kwargs)
+
+    def scores(self, text):
+        """Score of every context for text, in rule order"""
+        data = _word_bytes(text)
+        totals = [0] * len(self.contexts)
+
+        def add(hits):
+            for i, weight in hits:
+                totals[i] += weight
+
+        # Both paths give presence semantics: each keyword counts once
+        if len(data) >= SCAN_MIN_BYTES and len(self._padded) <= SCAN_MAX_WORDS:
+            padded = (b" " + data + b" ").decode('latin-1')
+            for word, hits in self._padded:
+                if word in padded:
+                    add(hits)
+        else:
+            for word in self._words.intersection(data.split()):
+                add(self._index[word])
+        if self._phrases:
+            joined = b" " + b" ".join(data.split()) + b" "
+            for phrase, hits in self._phrases:
+                if phrase in joined:
+                    add(hits)
+        # Symbols are punctuation, which has no case
+        for symbol, hits in self._symbols:
+            if symbol in text:
+                add(hits)
+
+        return dict(zip(self.contexts, totals))
+
+    def classify(self, text):
+        scores = self.scores(text)
+        if not scores:
+            return self.default
+        best_context = max(scores, key=scores.get)
+        return best_context if scores[best_context] > 0 else self.default
+
+
+def _load_default_classifier():
+    # CONTEXT_RULES_FILE points at a JSON rule file that replaces CONTEXT_RULES
+    rules_file = os.environ.get('CONTEXT_RULES_FILE')
+    if rules_file:
+        return ContextClassifier.from_file(rules_file)
+    return ContextClassifier()
+
+
+classifier = _load_default_classifier()
+
+
 def detect_context(text):
+    return classifier.classify(text)
+
+
+def detect_context_substring(text):
+    """The original substring scan, kept for comparison"""
     text_lower = text.lower()
     scores = {context: 0 for context in CONTEXT_RULES}
 
@@ -0,0 +1,207 @@
+# desktop_bridge.py
+#
+# Active app and Chrome tab lookups without a process per call.
+#
+# get_active_app() and get_chrome_tab_info() used to fork `osascript` on
+# every call (30-80 ms each). On macOS the PyObjC backend asks NSWorkspace
+# for the frontmost app and runs a pre-compiled NSAppleScript for Chrome,
+# all in-process. Both need the main thread's run loop (NSWorkspace only
+# updates through it, NSAppleScript is main-thread only), so lookups are
+# handed to it with main_loop.call_on_main(); the Mac API starts its server
+# through main_loop.run() for that. Until that loop runs, the PyObjC backend
+# falls back to osascript. The fake backend lets the rest of the analyzer
+# run (and be tested) on Linux.
+#
+# DesktopBridge puts a short TTL cache in front of whichever backend is
+# active, since /api/status and /api/analyze-screen often ask for the same
+# thing within the same second.
+
+import os
+import sys
+import time
+import threading
+import subprocess
+
+import main_loop
+
+CHROME_TAB_SCRIPT = '''
+tell application "Google Chrome"
+    if not (exists window 1) then return ""
+    set tabTitle to title of active tab of front window
+    set tabURL to URL of active tab of front window
+    return tabTitle & linefeed & tabURL
+end tell
+'''
+
+ACTIVE_APP_SCRIPT = 'tell application "System Events" to name of first process where frontmost is true'
+
+
+def _parse_tab(output):
+    """Split "title\\nurl" script output into (title, url), or (None, None)"""
+    parts = (output or "").strip().split("\n")
+    if len(parts) == 2:
+        return parts[0].strip(), parts[1].strip()
+    return None, None
+
+
+class OsascriptBackend:
+    """One osascript process per lookup; the fallback without PyObjC or a main loop"""
+    name = "osascript"
+
+    def active_app(self):
+        return subprocess.check_output(['osascript', '-e', ACTIVE_APP_SCRIPT]).decode('utf-8').strip()
+
+    def chrome_tab(self):
+        result = subprocess.run(["osascript", "-e", CHROME_TAB_SCRIPT], capture_output=True, text=True)
+        return _parse_tab(result.stdout)
+
+
+class PyObjCBackend:
+    """
+    NSWorkspace and a compiled NSAppleScript, both in-process and only ever
+    touched on the main thread's run loop. Lookups go through osascript
+    while that loop isn't running.
+    """
+    name = "pyobjc"
+
+    def __init__(self):
+        from AppKit import NSWorkspace
+        from Foundation import NSAppleScript
+        self._workspace = NSWorkspace.sharedWorkspace()
+        self._script_class = NSAppleScript
+        self._chrome_script = None
+        self._fallback = OsascriptBackend()
+
+    def _frontmost_app(self):
+        app = self._workspace.frontmostApplication()
+        return str(app.localizedName()) if app is not None else "Unknown"
+
+    def _run_chrome_script(self):
+        if self._chrome_script is None:
+            # Compile once; every lookup after that just runs it
+            self._chrome_script = self._script_class.alloc().initWithSource_(CHROME_TAB_SCRIPT)
+            self._chrome_script.compileAndReturnError_(None)
+        result, error = self._chrome_script.executeAndReturnError_(None)
+        if error is not None or result is None:
+            raise RuntimeError(f"AppleScript error: {error}")
+        return _parse_tab(result.stringValue())
+
+    def active_app(self):
+        if not main_loop.is_running():
+            return self._fallback.active_app()
+        return main_loop.call_on_main(self._frontmost_app)
+
+    def chrome_tab(self):
+        if not main_loop.is_running():
+            return self._fallback.chrome_tab()
+        return main_loop.call_on_main(self._run_chrome_script)
+
+
+class FakeBackend:
+    """Returns whatever was set; used on Linux and in tests"""
+    name = "fake"
+
+    def __init__(self, app_name="Unknown", tab=(None, None)):
+        self.app_name = app_name
+        self.tab = tab
+        self.calls = 0
+
+    def set_active_app(self, app_name, tab=None):
+        self.app_name = app_name
+        if tab is not None:
+            self.tab = tab
+
+    def active_app(self):
+        self.calls += 1
+        return self.app_name
+
+    def chrome_tab(self):
+        self.calls += 1
+        return self.tab
+
+
+BACKENDS = {
+    "pyobjc": PyObjCBackend,
+    "osascript": OsascriptBackend,
+    "fake": FakeBackend,
+}
+
+
+def create_backend(name=None):
+    """
+    Backend from DESKTOP_BACKEND ("auto", "pyobjc", "osascript" or "fake").
+    "auto" uses PyObjC on macOS (osascript if it isn't installed) and the
+    fake backend everywhere else.
+    """
+    name = (name or os.environ.get('DESKTOP_BACKEND', 'auto')).lower()
+    if name == "auto":
+        if sys.platform != "darwin":
+            return FakeBackend()
+        name = "pyobjc"
+    if name == "pyobjc":
+        try:
+            return PyObjCBackend()
+        except Exception as e:
+            print(f"PyObjC unavailable ({e}), falling back to osascript")
+            return OsascriptBackend()
+    return BACKENDS[name]()
+
+
+class DesktopBridge:
+    def __init__(self, backend=None, ttl=1.0):
+        """
+        Args:
+            backend: Object with active_app() and chrome_tab(); created from env if None
+            ttl: Seconds a lookup result is reused (0 disables caching)
+        """
+        self.backend = backend if backend is not None else create_backend()
+        self.ttl = ttl
+        self._cache = {}  # key: (expires_at, value)
+        self._lock = threading.Lock()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, key, lookup):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > now:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        value = lookup()
+        with self._lock:
+            self._cache[key] = (now + self.ttl, value)
+        return value
+
+    def invalidate(self):
+        """Drop cached lookups, e.g. right after a focus change"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_active_app(self):
+        try:
+            return self._cached("active_app", self.backend.active_app)
+        except Exception as e:
+            return f"Unknown ({e})"
+
+    def get_chrome_tab_info(self):
+        try:
+            return self._cached("chrome_tab", self.backend.chrome_tab)
+        except Exception as e:
+            print(f"Chrome tab fetch error: {e}")
+            return None, None
+
+    def stats(self):
+        return {
+            "backend": self.backend.name,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Shared bridge used by mac_window and chrome_tab
+bridge = DesktopBridge(ttl=float(os.environ.get('DESKTOP_CACHE_TTL', 1.0)))
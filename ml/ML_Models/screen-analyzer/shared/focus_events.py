@@ -0,0 +1,343 @@
+# focus_events.py
+#
+# Window focus changes as events instead of polling.
+#
+# A FocusEventSource calls its subscribers with (app_name, timestamp) each
+# time the frontmost app changes, so session timelines get the exact switch
+# time instead of whenever the next poll happened to notice. Backends:
+#
+#   nsworkspace - macOS NSWorkspaceDidActivateApplicationNotification (PyObjC),
+#                 observed on the main-thread run loop (main_loop.run)
+#   winevent    - Windows EVENT_SYSTEM_FOREGROUND through SetWinEventHook (ctypes)
+#   x11         - Linux/X11 _NET_ACTIVE_WINDOW property changes (python-xlib)
+#   poll        - calls a get_active_app() function every `interval` seconds;
+#                 opt-in only
+#   fake        - emit() by hand, for tests and where nothing else is available
+#
+# create_focus_source() picks one from FOCUS_BACKEND (default "auto").
+# emit() ignores repeats of the current app, so callers that sample the
+# frontmost app anyway can feed it too without double-counting switches.
+
+import os
+import sys
+import time
+import select
+import threading
+
+import main_loop
+
+
+class FocusEventSource:
+    """Common interface: subscribe(callback), start(), stop(), current_app"""
+    name = "base"
+
+    def __init__(self):
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.current_app = None
+        self.current_since = None
+        self.switches = 0
+
+    def subscribe(self, callback):
+        """callback(app_name, timestamp) runs on every focus change"""
+        self._listeners.append(callback)
+        return callback
+
+    def emit(self, app_name, timestamp=None):
+        """Report the frontmost app; listeners only hear about actual changes"""
+        timestamp = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            if app_name == self.current_app:
+                return False
+            self.current_app = app_name
+            self.current_since = timestamp
+            self.switches += 1
+        for callback in list(self._listeners):
+            try:
+                callback(app_name, timestamp)
+            except Exception as e:
+                print(f"Focus listener error: {e}")
+        return True
+
+    def start(self):
+        """Start delivering events (no-op if already running)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f'focus-{self.name}', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        raise NotImplementedError
+
+    def stats(self):
+        return {
+            "backend": self.name,
+            "current_app": self.current_app,
+            "current_since": self.current_since,
+            "switches": self.switches
+        }
+
+
+class FakeFocusSource(FocusEventSource):
+    """Events only arrive through emit()"""
+    name = "fake"
+
+    def start(self):
+        return self
+
+
+class PollingFocusSource(FocusEventSource):
+    """Polls get_app() and emits when the answer changes"""
+    name = "poll"
+
+    def __init__(self, get_app, interval=0.5):
+        super().__init__()
+        self.get_app = get_app
+        self.interval = interval
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.emit(self.get_app())
+            except Exception as e:
+                print(f"Focus poll error: {e}")
+            self._stop.wait(self.interval)
+
+
+_observer_class = None
+
+
+def _get_observer_class():
+    # PyObjC class names are global, so the class is only defined once
+    global _observer_class
+    if _observer_class is None:
+        from Foundation import NSObject
+        from AppKit import NSWorkspaceApplicationKey
+
+        class FocusObserver(NSObject):
+            def initWithSource_(self, source):
+                self = self.init()
+                if self is not None:
+                    self.source = source
+                return self
+
+            def appActivated_(self, notification):
+                app = notification.userInfo()[NSWorkspaceApplicationKey]
+                self.source.emit(str(app.localizedName()))
+
+        _observer_class = FocusObserver
+    return _observer_class
+
+
+class NSWorkspaceFocusSource(FocusEventSource):
+    """
+    macOS app activation notifications. NSWorkspace delivers them through
+    the main thread's run loop, so the observer is registered there with
+    main_loop.call_on_main() and needs no thread of its own; the server has
+    to be started with main_loop.run(). Without that loop no notification
+    arrives and switches only come in through emit().
+    """
+    name = "nsworkspace"
+
+    def __init__(self):
+        super().__init__()
+        # Fail at construction, not on first use, if PyObjC is missing
+        import AppKit  # noqa: F401
+        self._observer = None
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return self
+            if not main_loop.is_running():
+                print("Main run loop not running; focus switches only come from screen samples")
+                return self
+            self._started = True
+        main_loop.call_on_main(self._observe)
+        return self
+
+    def stop(self):
+        with self._lock:
+            started, self._started = self._started, False
+        if started and main_loop.is_running():
+            main_loop.call_on_main(self._unobserve)
+
+    def _observe(self):
+        from AppKit import NSWorkspace, NSWorkspaceDidActivateApplicationNotification
+
+        workspace = NSWorkspace.sharedWorkspace()
+        self._observer = _get_observer_class().alloc().initWithSource_(self)
+        workspace.notificationCenter().addObserver_selector_name_object_(
+            self._observer, 'appActivated:', NSWorkspaceDidActivateApplicationNotification, None
+        )
+        front = workspace.frontmostApplication()
+        if front is not None:
+            self.emit(str(front.localizedName()))
+
+    def _unobserve(self):
+        from AppKit import NSWorkspace
+
+        if self._observer is not None:
+            NSWorkspace.sharedWorkspace().notificationCenter().removeObserver_(self._observer)
+            self._observer = None
+
+
+class WinEventFocusSource(FocusEventSource):
+    """
+    Windows foreground window changes from SetWinEventHook. The hook is out
+    of context, so Windows calls back on this source's thread while it pumps
+    messages; stop() posts WM_QUIT to end the loop. App names are window
+    titles, like win_window.get_active_app().
+    """
+    name = "winevent"
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WM_QUIT = 0x0012
+
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        from ctypes import wintypes
+
+        self._ctypes = ctypes
+        self._wintypes = wintypes
+        # Raises off Windows, at construction rather than on the thread
+        self._user32 = user32 = ctypes.WinDLL('user32')
+        self._kernel32 = ctypes.WinDLL('kernel32')
+        self._thread_id = None
+
+        self._proc_type = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+        )
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = [wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, self._proc_type,
+                                           wintypes.DWORD, wintypes.DWORD, wintypes.DWORD]
+        user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+        user32.GetForegroundWindow.restype = wintypes.HWND
+        user32.GetWindowTextLengthW.argtypes = [wintypes.HWND]
+        user32.GetWindowTextW.argtypes = [wintypes.HWND, wintypes.LPWSTR, ctypes.c_int]
+        user32.GetMessageW.argtypes = [ctypes.POINTER(wintypes.MSG), wintypes.HWND, wintypes.UINT, wintypes.UINT]
+        user32.PostThreadMessageW.argtypes = [wintypes.DWORD, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+
+    def _window_title(self, hwnd):
+        if not hwnd:
+            return "Unknown"
+        length = self._user32.GetWindowTextLengthW(hwnd)
+        buffer = self._ctypes.create_unicode_buffer(length + 1)
+        self._user32.GetWindowTextW(hwnd, buffer, length + 1)
+        return buffer.value or "Unknown"
+
+    def stop(self):
+        super().stop()
+        if self._thread_id is not None:
+            self._user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+
+    def _run(self):
+        ctypes, user32 = self._ctypes, self._user32
+
+        def on_foreground(hook, event, hwnd, id_object, id_child, thread_id, time_ms):
+            self.emit(self._window_title(hwnd))
+
+        # Keep a reference to the callback for as long as the hook exists
+        callback = self._proc_type(on_foreground)
+        hook = user32.SetWinEventHook(self.EVENT_SYSTEM_FOREGROUND, self.EVENT_SYSTEM_FOREGROUND, None,
+                                      callback, 0, 0, self.WINEVENT_OUTOFCONTEXT)
+        if not hook:
+            print("SetWinEventHook failed; focus switches only come from posted samples")
+            return
+        self._thread_id = self._kernel32.GetCurrentThreadId()
+        self.emit(self._window_title(user32.GetForegroundWindow()))
+
+        msg = self._wintypes.MSG()
+        try:
+            while not self._stop.is_set() and user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            user32.UnhookWinEvent(hook)
+            self._thread_id = None
+
+
+class X11FocusSource(FocusEventSource):
+    """Listens for _NET_ACTIVE_WINDOW changes on the X11 root window"""
+    name = "x11"
+
+    def __init__(self):
+        super().__init__()
+        from Xlib import X, display
+        self._X = X
+        self._display = display.Display()
+        self._root = self._display.screen().root
+        self._active_atom = self._display.intern_atom('_NET_ACTIVE_WINDOW')
+
+    def _active_app(self):
+        prop = self._root.get_full_property(self._active_atom, self._X.AnyPropertyType)
+        if not prop or not prop.value or not prop.value[0]:
+            return "Unknown"
+        window = self._display.create_resource_object('window', prop.value[0])
+        try:
+            wm_class = window.get_wm_class()
+            if wm_class:
+                return wm_class[1]
+            return window.get_wm_name() or "Unknown"
+        except Exception:
+            return "Unknown"
+
+    def _run(self):
+        X = self._X
+        self._root.change_attributes(event_mask=X.PropertyChangeMask)
+        self.emit(self._active_app())
+        while not self._stop.is_set():
+            # next_event() blocks, so wait on the socket with a timeout to notice stop()
+            if not self._display.pending_events():
+                readable, _, _ = select.select([self._display.fileno()], [], [], 0.5)
+                if not readable:
+                    continue
+            event = self._display.next_event()
+            if event.type == X.PropertyNotify and event.atom == self._active_atom:
+                self.emit(self._active_app())
+
+
+def create_focus_source(get_app=None, name=None, interval=None):
+    """
+    Focus source from FOCUS_BACKEND ("auto", "nsworkspace", "winevent", "x11",
+    "poll" or "fake"). "auto" uses NSWorkspace on macOS, WinEvents on Windows
+    and X11 when $DISPLAY is set on Linux. If that isn't available it falls
+    back to the fake source, which callers feed from their screen samples;
+    nothing is polled unless FOCUS_BACKEND=poll.
+    """
+    name = (name or os.environ.get('FOCUS_BACKEND', 'auto')).lower()
+    interval = interval if interval is not None else float(os.environ.get('FOCUS_POLL_INTERVAL', 0.5))
+
+    if name == "nsworkspace":
+        return NSWorkspaceFocusSource()
+    if name == "winevent":
+        return WinEventFocusSource()
+    if name == "x11":
+        return X11FocusSource()
+    if name == "poll":
+        return PollingFocusSource(get_app, interval)
+    if name == "fake":
+        return FakeFocusSource()
+
+    try:
+        if sys.platform == "darwin":
+            return NSWorkspaceFocusSource()
+        if sys.platform == "win32":
+            return WinEventFocusSource()
+        if sys.platform.startswith("linux") and os.environ.get("DISPLAY"):
+            return X11FocusSource()
+    except Exception as e:
+        print(f"Focus events unavailable ({e}), falling back")
+    return FakeFocusSource()
@@ -0,0 +1,137 @@
+# frame_gate.py
+#
+# Skip re-analysing screens that haven't changed.
+#
+# Someone reading the same page produces a stream of near-identical
+# captures. FrameGate keeps a grayscale thumbnail of the last analysed frame
+# at roughly text resolution (256px wide, so a line of code is still a few
+# pixels tall) and, when no 8x8 tile of the next frame's thumbnail differs
+# from it by more than a small threshold, returns the cached analysis
+# instead of running OCR, context detection and sentiment again. Comparing
+# tile by tile, rather than the whole frame, means one added line or a
+# one-line scroll still counts as a change. A cached analysis older than
+# max_age seconds is never reused. This is the only unchanged-screen check;
+# OcrPipeline always runs OCR on what it's given.
+
+import os
+import time
+import threading
+
+import cv2
+import numpy as np
+
+
+def thumbnail(frame, width=256):
+    """
+    Grayscale thumbnail of a BGR frame, `width` pixels wide. Captures more
+    than four times that width are subsampled first, so a 5K frame costs a
+    few milliseconds.
+    """
+    step = max(1, frame.shape[1] // (width * 4))
+    if step > 1:
+        frame = np.ascontiguousarray(frame[::step, ::step])
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def max_tile_diff(a, b, tile=8):
+    """Largest mean absolute difference (0-255) over the tile x tile blocks of a and b"""
+    if a.shape != b.shape:
+        return 255.0
+    diff = np.abs(a - b).astype(np.float32)
+    rows, cols = -(-diff.shape[0] // tile), -(-diff.shape[1] // tile)
+    # INTER_AREA to an exact 1/tile scale averages each block; pad the edges
+    # so partial tiles at the border count too
+    diff = cv2.copyMakeBorder(diff, 0, rows * tile - diff.shape[0], 0, cols * tile - diff.shape[1],
+                              cv2.BORDER_REFLECT)
+    return float(cv2.resize(diff, (cols, rows), interpolation=cv2.INTER_AREA).max())
+
+
+class FrameGate:
+    def __init__(self, diff_threshold=2.5, max_age=30.0, width=256, tile=8):
+        """
+        Args:
+            diff_threshold: Largest mean absolute difference (0-255) of any thumbnail tile
+                            for a frame to count as unchanged
+            max_age: Seconds a cached analysis may be reused for (0 = no limit)
+            width: Thumbnail width in pixels
+            tile: Tile size in thumbnail pixels
+        """
+        self.diff_threshold = diff_threshold
+        self.max_age = max_age
+        self.width = width
+        self.tile = tile
+        self._last = None  # (thumbnail, result, analysed_at)
+        self._lock = threading.Lock()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @classmethod
+    def from_env(cls):
+        """Gate configured from SCREEN_GATE_DIFF and SCREEN_GATE_MAX_AGE"""
+        return cls(
+            diff_threshold=float(os.environ.get('SCREEN_GATE_DIFF', 2.5)),
+            max_age=float(os.environ.get('SCREEN_GATE_MAX_AGE', 30.0))
+        )
+
+    def signature(self, frame):
+        return thumbnail(frame, self.width)
+
+    def is_same(self, signature, other):
+        return max_tile_diff(signature, other, self.tile) <= self.diff_threshold
+
+    def lookup(self, signature):
+        """Cached result for a frame with this signature, or None"""
+        with self._lock:
+            last = self._last
+        if last is None:
+            return None
+        if self.max_age and time.monotonic() - last[2] > self.max_age:
+            self.expired += 1
+            return None
+        if self.is_same(signature, last[0]):
+            return last[1]
+        return None
+
+    def store(self, signature, result):
+        with self._lock:
+            self._last = (signature, result, time.monotonic())
+
+    def analyze(self, frame, analyze_fn):
+        """
+        Return analyze_fn(frame), or the cached result if frame looks the same
+        as the last frame analyze_fn ran on and that was under max_age ago
+
+        Returns:
+            tuple: (result, hit)
+        """
+        signature = self.signature(frame)
+        cached = self.lookup(signature)
+        if cached is not None:
+            self.hits += 1
+            return cached, True
+
+        self.misses += 1
+        result = analyze_fn(frame)
+        self.store(signature, result)
+        return result, False
+
+    def invalidate(self):
+        with self._lock:
+            self._last = None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "expired": self.expired,
+            "diff_threshold": self.diff_threshold,
+            "max_age": self.max_age
+        }
@@ -0,0 +1,83 @@
+# main_loop.py
+#
+# The macOS main-thread run loop, for the parts of AppKit that need one.
+#
+# NSWorkspace only keeps frontmostApplication current and delivers app
+# activation notifications through the main thread's run loop, and
+# NSAppleScript is main-thread only. app.run() would otherwise own the main
+# thread, so run(serve) starts the server on a worker thread and runs the
+# Cocoa event loop on the main thread until the server exits, and
+# call_on_main() hands work to that loop. Anywhere else (not macOS, no
+# PyObjC) run() just calls serve() and is_running() stays False, so callers
+# keep their fallbacks.
+
+import sys
+import threading
+from concurrent.futures import Future, TimeoutError
+
+_running = threading.Event()
+
+
+def is_running():
+    """True once run() has the main-thread event loop going"""
+    return _running.is_set()
+
+
+def run(serve):
+    """
+    Run serve() (e.g. a blocking app.run) with the event loop on the main
+    thread. Must be called from the main thread; returns when serve() does.
+    serve() runs on a worker thread, so it can't install signal handlers
+    (no Flask reloader).
+    """
+    try:
+        if sys.platform != "darwin":
+            raise ImportError("not macOS")
+        from PyObjCTools import AppHelper
+    except ImportError:
+        return serve()
+
+    def serve_then_stop():
+        try:
+            serve()
+        finally:
+            # stopEventLoop() has to run on the loop's own thread
+            AppHelper.callAfter(AppHelper.stopEventLoop)
+
+    # Set before the server starts, so its first lookups already use the
+    # loop; anything they queue runs once the loop below picks it up
+    _running.set()
+    thread = threading.Thread(target=serve_then_stop, name='server', daemon=True)
+    thread.start()
+    try:
+        AppHelper.runConsoleEventLoop(installInterrupt=True)
+    finally:
+        _running.clear()
+
+
+def call_on_main(fn, timeout=5.0):
+    """
+    Run fn() on the main-thread event loop and return its result (or raise
+    its exception). Only valid while is_running(); called from the main
+    thread itself, fn just runs.
+    """
+    if threading.current_thread() is threading.main_thread():
+        return fn()
+    from PyObjCTools import AppHelper
+
+    future = Future()
+
+    def call():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn())
+        except Exception as e:
+            future.set_exception(e)
+
+    AppHelper.callAfter(call)
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
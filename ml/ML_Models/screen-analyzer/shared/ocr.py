@@ -1,11 +1,195 @@
 # ocr.py
+#
+# OCR pipeline for screen captures.
+#
+# A full-resolution grab of a Retina/5K screen is far more pixels than
+# tesseract needs, and pytesseract starts a new tesseract process per call.
+# The pipeline below cuts both costs:
+#   - restrict OCR to the focused window when a region provider is set
+#   - downscale to a target DPI / maximum width before thresholding
+#   - keep one tesseract handle alive (tesserocr) instead of a process per
+#     call, falling back to pytesseract when tesserocr isn't installed
+#
+# Every step is configurable through OcrPipeline or the OCR_* environment
+# variables; extract_text(image) keeps its old signature. Skipping frames
+# that haven't changed is FrameGate's job (frame_gate.py), in front of OCR.
+
+import os
+import threading
+import time
+
 import cv2
-import pytesseract
+import numpy as np
+
+try:
+    import tesserocr
+    from PIL import Image
+except ImportError:
+    tesserocr = None
+
+try:
+    import pytesseract
+except ImportError:
+    # Still an import error when there's no OCR engine at all, so callers
+    # can fall back the way they always have
+    if tesserocr is None:
+        raise
+    pytesseract = None
+
+TESSERACT_CONFIG = '--oem 3 --psm 6'
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def to_bgr(image):
+    """Accept a BGR numpy frame or a PIL image (as returned by win_capture)"""
+    if isinstance(image, np.ndarray):
+        return image
+    rgb = np.asarray(image.convert('RGB'))
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+
+
+class TesseractHandle:
+    """
+    One long-lived tesseract engine. tesserocr keeps the language data loaded
+    between calls; without it each call goes through the pytesseract
+    subprocess like before.
+    """
+
+    def __init__(self, backend='auto'):
+        self._api = None
+        self._lock = threading.Lock()
+        if backend in ('auto', 'tesserocr') and tesserocr is not None:
+            self._api = tesserocr.PyTessBaseAPI(psm=tesserocr.PSM.SINGLE_BLOCK, oem=tesserocr.OEM.DEFAULT)
+        elif backend == 'tesserocr':
+            raise ImportError("tesserocr is not installed")
+        self.name = 'tesserocr' if self._api is not None else 'pytesseract'
+
+    def image_to_string(self, binary):
+        if self._api is None:
+            return pytesseract.image_to_string(binary, config=TESSERACT_CONFIG)
+        # The engine is not thread-safe
+        with self._lock:
+            self._api.SetImage(Image.fromarray(binary))
+            return self._api.GetUTF8Text()
+
+
+class OcrPipeline:
+    def __init__(self, max_width=None, target_dpi=None, screen_dpi=None,
+                 use_region=True, backend=None):
+        """
+        Args:
+            max_width: Downscale wider images to this width (0 disables)
+            target_dpi, screen_dpi: If both are set, scale by target_dpi / screen_dpi instead
+            use_region: OCR only the rectangle returned by the region provider
+            backend: 'auto', 'tesserocr' or 'pytesseract'
+        """
+        self.max_width = int(max_width if max_width is not None else _env_float('OCR_MAX_WIDTH', 2560))
+        self.target_dpi = target_dpi if target_dpi is not None else _env_float('OCR_TARGET_DPI', 0)
+        self.screen_dpi = screen_dpi if screen_dpi is not None else _env_float('OCR_SCREEN_DPI', 0)
+        self.use_region = use_region and os.environ.get('OCR_USE_REGION', '1') != '0'
+        self.backend = backend or os.environ.get('OCR_BACKEND', 'auto')
+
+        self.region_provider = None
+        self._handle = None
+        self._handle_lock = threading.Lock()
+
+        # Stats
+        self.calls = 0
+        self.ocr_seconds = 0.0
+
+    @property
+    def handle(self):
+        # Created lazily so importing ocr never starts tesseract
+        if self._handle is None:
+            with self._handle_lock:
+                if self._handle is None:
+                    self._handle = TesseractHandle(self.backend)
+        return self._handle
+
+    def set_region_provider(self, provider):
+        """
+        provider() returns ((x, y, w, h), (screen_w, screen_h)) for the focused
+        window in screen points, or None when it can't tell. The rectangle is
+        scaled to the capture's pixel size, so Retina captures line up.
+        """
+        self.region_provider = provider
+
+    def _region(self, image):
+        if not self.use_region or self.region_provider is None:
+            return None
+        try:
+            found = self.region_provider()
+        except Exception as e:
+            print(f"OCR region lookup error: {e}")
+            return None
+        if not found:
+            return None
+        (x, y, w, h), (screen_w, screen_h) = found
+        img_h, img_w = image.shape[:2]
+        sx, sy = img_w / float(screen_w), img_h / float(screen_h)
+        x0, y0 = max(0, int(x * sx)), max(0, int(y * sy))
+        x1, y1 = min(img_w, int((x + w) * sx)), min(img_h, int((y + h) * sy))
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            return None
+        return x0, y0, x1, y1
+
+    def _scale(self, width):
+        if self.target_dpi and self.screen_dpi:
+            return min(1.0, self.target_dpi / self.screen_dpi)
+        if self.max_width and width > self.max_width:
+            return self.max_width / float(width)
+        return 1.0
+
+    def preprocess(self, image):
+        """Crop, grayscale and downscale a frame. Returns (gray, region)"""
+        image = to_bgr(image)
+        region = self._region(image)
+        if region is not None:
+            x0, y0, x1, y1 = region
+            image = image[y0:y1, x0:x1]
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        scale = self._scale(gray.shape[1])
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return gray, region
+
+    def extract_text(self, image):
+        self.calls += 1
+        gray, _ = self.preprocess(image)
+
+        start = time.perf_counter()
+        _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        text = self.handle.image_to_string(thresh).strip()
+        self.ocr_seconds += time.perf_counter() - start
+        return text
+
+    def stats(self):
+        return {
+            "backend": self._handle.name if self._handle else None,
+            "calls": self.calls,
+            "avg_ocr_ms": self.ocr_seconds * 1000 / self.calls if self.calls else 0.0
+        }
+
+
+# Default pipeline used by extract_text, configured from OCR_* env vars
+pipeline = OcrPipeline()
+
+
+def set_region_provider(provider):
+    pipeline.set_region_provider(provider)
+
 
 def extract_text(image):
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return pipeline.extract_text(image)
+
+
+def extract_text_full(image):
+    """The original full-resolution, whole-screen, one-process-per-call OCR"""
+    gray = cv2.cvtColor(to_bgr(image), cv2.COLOR_BGR2GRAY)
     _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    
-    config = '--oem 3 --psm 6'
-    text = pytesseract.image_to_string(thresh, config=config)
+    text = pytesseract.image_to_string(thresh, config=TESSERACT_CONFIG)
     return text.strip()
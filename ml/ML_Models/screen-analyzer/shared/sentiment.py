@@ -1,16 +1,108 @@
 # sentiment.py
+#
+# Screen sentiment from OCR text, scored a line at a time.
+#
+# Most of a frame's text is menus, tabs and other UI chrome that is the same
+# from one capture to the next. SentimentScorer runs VADER on each line once,
+# keeps the line's score in an LRU keyed by a hash of the line, and
+# combines the line scores into one compound, so a new frame only costs
+# VADER calls for the lines that changed.
+#
+# VADER's compound is normalize(sum of word valences). Each line's compound
+# is mapped back to its valence sum, the sums are added up and normalized
+# once, which stays close to scoring the whole text in one call (an average
+# of line compounds would not: long text would almost always be "neutral").
 
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import os
+import math
+import hashlib
+import threading
+from collections import OrderedDict
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer, normalize
 
 analyzer = SentimentIntensityAnalyzer()
 
-def analyze_sentiment(text):
-    scores = analyzer.polarity_scores(text)
-    compound = scores['compound']
+POSITIVE_THRESHOLD = 0.4
+NEGATIVE_THRESHOLD = -0.4
+VADER_ALPHA = 15
+
+
+def valence_sum(compound):
+    """Inverse of VADER's normalize(): the valence sum a compound came from"""
+    compound = max(-0.9999, min(0.9999, compound))
+    return compound * math.sqrt(VADER_ALPHA / (1.0 - compound * compound))
+
 
-    if compound >= 0.4:
+def label_for(compound):
+    if compound >= POSITIVE_THRESHOLD:
         return "positive"
-    elif compound <= -0.4:
+    elif compound <= NEGATIVE_THRESHOLD:
         return "negative"
     else:
         return "neutral"
+
+
+class SentimentScorer:
+    def __init__(self, max_lines=4096):
+        """
+        Args:
+            max_lines: Line scores kept, least recently used dropped first
+        """
+        self.max_lines = max_lines
+        self._scores = OrderedDict()  # line hash: valence sum
+        self._lock = threading.Lock()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+
+    def score_line(self, line):
+        key = hashlib.blake2b(line.encode('utf-8', 'replace'), digest_size=8).digest()
+        with self._lock:
+            score = self._scores.get(key)
+            if score is not None:
+                self._scores.move_to_end(key)
+                self.hits += 1
+                return score
+
+        score = valence_sum(analyzer.polarity_scores(line)['compound'])
+        with self._lock:
+            self.misses += 1
+            self._scores[key] = score
+            while len(self._scores) > self.max_lines:
+                self._scores.popitem(last=False)
+        return score
+
+    def compound(self, text):
+        """Compound score (-1 to 1) of text, from its non-empty lines"""
+        total = 0.0
+        for line in text.splitlines():
+            line = line.strip()
+            if line:
+                total += self.score_line(line)
+        return normalize(total, VADER_ALPHA) if total else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._scores.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "lines": len(self._scores),
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+scorer = SentimentScorer(max_lines=int(os.environ.get('SENTIMENT_CACHE_SIZE', 4096)))
+
+
+def analyze_sentiment(text):
+    return label_for(scorer.compound(text))
+
+
+def analyze_sentiment_whole(text):
+    """The original single VADER call over the whole text, kept for comparison"""
+    return label_for(analyzer.polarity_scores(text)['compound'])
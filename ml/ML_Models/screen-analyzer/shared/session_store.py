@@ -0,0 +1,199 @@
+# session_store.py
+#
+# Per-user session state for the screen analyzer APIs.
+#
+# Each userId gets its own Session (context timeline, context durations,
+# recent screenshots) so one API process can serve many users. Recent
+# history is kept in bounded deques, and the store drops the least recently
+# used sessions once it holds max_sessions, or once a session has been idle
+# for longer than idle_timeout seconds.
+
+import time
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+
+MAX_CONTEXT_LOG = 10
+MAX_SCREENSHOTS = 5
+
+
+class Session:
+    def __init__(self, user_id, max_context_log=MAX_CONTEXT_LOG, max_screenshots=MAX_SCREENSHOTS):
+        now = time.time()
+        self.user_id = user_id
+        self.start_time = now
+        self.contexts = {}  # context: total seconds spent in it
+        self.current_context = None
+        self.current_context_start = now
+        self.last_context_duration = 0
+        self.context_log = deque(maxlen=max_context_log)
+        self.screenshots = deque(maxlen=max_screenshots)
+        # Frontmost app timeline, fed by focus events
+        self.apps = {}  # app: total seconds in front
+        self.current_app = None
+        self.current_app_start = now
+        self.app_log = deque(maxlen=max_context_log)
+        self.last_seen = now
+        # Version of the last background capture recorded in this session
+        self.last_capture_version = 0
+        # Held by request handlers while they update the session
+        self.lock = threading.Lock()
+
+    def add_context_time(self, context, duration):
+        self.contexts[context] = self.contexts.get(context, 0) + duration
+
+    def switch_context(self, context, at=None):
+        """
+        Record the context seen in the latest frame
+
+        Args:
+            context: Detected context
+            at: When the frame was captured (epoch seconds, default now)
+
+        Returns:
+            float: How long the previous context lasted if the context changed,
+                   otherwise the duration of the last completed context
+        """
+        if self.current_context == context:
+            return self.last_context_duration
+
+        now = max(at if at is not None else time.time(), self.current_context_start)
+        duration = 0
+        if self.current_context:
+            duration = now - self.current_context_start
+            self.add_context_time(self.current_context, duration)
+            self.last_context_duration = duration
+            # Log the context switch
+            self.context_log.append({
+                "context": self.current_context,
+                "duration": duration,
+                "timestamp": datetime.utcfromtimestamp(now).isoformat()
+            })
+        self.current_context = context
+        self.current_context_start = now
+        return duration
+
+    def switch_app(self, app_name, at=None):
+        """
+        Record that app_name came to the front at `at` (epoch seconds, default now)
+
+        Returns:
+            float: How long the previous app was in front (0 if unchanged)
+        """
+        if self.current_app == app_name:
+            return 0
+
+        now = max(at if at is not None else time.time(), self.current_app_start)
+        duration = 0
+        if self.current_app is not None:
+            duration = now - self.current_app_start
+            self.apps[self.current_app] = self.apps.get(self.current_app, 0) + duration
+            self.app_log.append({
+                "app": self.current_app,
+                "duration": duration,
+                "timestamp": datetime.utcfromtimestamp(now).isoformat()
+            })
+        self.current_app = app_name
+        self.current_app_start = now
+        return duration
+
+    def add_screenshot(self, timestamp, context, app_name):
+        self.screenshots.append({
+            "timestamp": timestamp,
+            "context": context,
+            "app": app_name
+        })
+
+    def current_context_duration(self):
+        if not self.current_context:
+            return 0
+        return time.time() - self.current_context_start
+
+    def session_duration(self):
+        return time.time() - self.start_time
+
+    def context_durations(self):
+        """Time per context including the running one, longest first"""
+        return _durations(self.contexts, self.current_context, self.current_context_start, "context")
+
+    def app_durations(self):
+        """Time per frontmost app including the current one, longest first"""
+        return _durations(self.apps, self.current_app, self.current_app_start, "app")
+
+
+def _durations(totals, current, current_start, key):
+    with_current = dict(totals)
+    if current is not None:
+        with_current[current] = with_current.get(current, 0) + (time.time() - current_start)
+    return [
+        {key: k, "duration": v}
+        for k, v in sorted(with_current.items(), key=lambda x: x[1], reverse=True)
+    ]
+
+
+class SessionStore:
+    def __init__(self, max_sessions=1000, idle_timeout=0, **session_kwargs):
+        """
+        Args:
+            max_sessions: Most sessions kept in memory, least recently used dropped first
+            idle_timeout: Seconds without requests before a session is dropped (0 keeps them)
+            session_kwargs: Passed to every new Session (max_context_log, max_screenshots)
+        """
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.session_kwargs = session_kwargs
+        self._sessions = OrderedDict()  # user_id: Session, least recently used first
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def get(self, user_id):
+        """Return the session for user_id, creating it if needed"""
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session is None:
+                session = Session(user_id, **self.session_kwargs)
+                self._sessions[user_id] = session
+            else:
+                self._sessions.move_to_end(user_id)
+            session.last_seen = now
+            self._evict(now)
+            return session
+
+    def reset(self, user_id):
+        """Start a fresh session for user_id"""
+        with self._lock:
+            session = Session(user_id, **self.session_kwargs)
+            self._sessions[user_id] = session
+            self._sessions.move_to_end(user_id)
+            return session
+
+    def _evict(self, now):
+        # Sessions are ordered by last use, so only the front needs checking
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+        if self.idle_timeout:
+            while self._sessions:
+                oldest = next(iter(self._sessions.values()))
+                if now - oldest.last_seen <= self.idle_timeout:
+                    break
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+
+    def all(self):
+        """Snapshot of every live session"""
+        with self._lock:
+            return list(self._sessions.values())
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "idle_timeout": self.idle_timeout,
+                "evicted": self.evicted
+            }
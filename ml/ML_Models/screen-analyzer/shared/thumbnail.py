@@ -0,0 +1,83 @@
+# thumbnail.py
+#
+# Small JPEG screenshots for the dashboard.
+#
+# A full 5K capture is shrunk to max_width before encoding, encoded by
+# OpenCV straight from the BGR array (no RGB conversion or PIL copy), and
+# the JPEG bytes are kept in a small LRU keyed by a hash of the shrunk
+# pixels. The hash doubles as the screenshot id the API serves them under,
+# so an unchanged screen is never re-encoded and clients can cache it.
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import cv2
+
+
+class ThumbnailCache:
+    def __init__(self, max_width=640, quality=30, max_items=32):
+        """
+        Args:
+            max_width: Frames wider than this are downsized before encoding (0 keeps full size)
+            quality: JPEG quality (0-100)
+            max_items: Encoded thumbnails kept, least recently used dropped first
+        """
+        self.max_width = max_width
+        self.quality = quality
+        self.max_items = max_items
+        self._items = OrderedDict()  # id: jpeg bytes
+        self._lock = threading.Lock()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+
+    def resize(self, frame):
+        height, width = frame.shape[:2]
+        if not self.max_width or width <= self.max_width:
+            return frame
+        scale = self.max_width / float(width)
+        return cv2.resize(frame, (self.max_width, max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+
+    def add(self, frame):
+        """
+        Thumbnail a BGR frame and cache the JPEG
+
+        Returns:
+            str: Id to fetch the JPEG with get()
+        """
+        small = self.resize(frame)
+        thumb_id = hashlib.blake2b(small.tobytes(), digest_size=12).hexdigest()
+
+        with self._lock:
+            if thumb_id in self._items:
+                self._items.move_to_end(thumb_id)
+                self.hits += 1
+                return thumb_id
+
+        ok, jpeg = cv2.imencode('.jpg', small, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise ValueError("Could not encode screenshot")
+
+        with self._lock:
+            self.misses += 1
+            self._items[thumb_id] = jpeg.tobytes()
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return thumb_id
+
+    def get(self, thumb_id):
+        """JPEG bytes for thumb_id, or None if it was never added or has been evicted"""
+        with self._lock:
+            return self._items.get(thumb_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "hits": self.hits,
+                "misses": self.misses,
+                "max_width": self.max_width,
+                "quality": self.quality
+            }
@@ -247,58 +247,36 @@ import platform
 import json
 import datetime
 import os
+import sys
 from datetime import datetime
 
+# Add the ML_Models shared directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../shared')))
+from event_log import append_event, start_compactor
+
+# screen-analyzer/shared
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../shared')))
+from session_store import SessionStore
+from focus_events import create_focus_source
+
 app = Flask(__name__)
 CORS(app)
 
-# Global variables to store session data
-session_data = {
-    "start_time": time.time(),
-    "contexts": {},
-    "current_context": None,
-    "current_context_start": time.time(),
-    "screenshots": []
-}
-
-# Directory to save data
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'data')
+# Session state per userId, so one server can track a whole lab
+sessions = SessionStore(
+    max_sessions=int(os.environ.get('SCREEN_MAX_SESSIONS', 1000)),
+    idle_timeout=int(os.environ.get('SCREEN_SESSION_IDLE_TIMEOUT', 0))
+)
 
-# Create data directory if it doesn't exist
-os.makedirs(DATA_DIR, exist_ok=True)
+# Focus changes come from foreground-window events (SetWinEventHook) and
+# from the app name in every posted update
+focus_source = create_focus_source()
 
-def write_to_json_file(data_type, data):
-    """Write data to a JSON file in the data directory"""
-    try:
-        file_path = os.path.join(DATA_DIR, f"{data_type}.json")
-        
-        # Read existing data if available
-        existing_data = []
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                try:
-                    existing_data = json.load(f)
-                except json.JSONDecodeError:
-                    existing_data = []
-        
-        # Ensure existing_data is a list
-        if not isinstance(existing_data, list):
-            existing_data = []
-        
-        # Add timestamp to the data
-        data['timestamp'] = datetime.now().isoformat()
-        
-        # Append new data
-        existing_data.append(data)
-        
-        # Write updated data back to the file
-        with open(file_path, 'w') as f:
-            json.dump(existing_data, f, indent=2)
-            
-        return True
-    except Exception as e:
-        print(f"Error writing to JSON file: {e}")
-        return False
+@focus_source.subscribe
+def on_focus_change(app_name, timestamp):
+    for session in sessions.all():
+        with session.lock:
+            session.switch_app(app_name, at=timestamp)
 
 @app.route('/api/update-context', methods=['POST'])
 def update_context():
@@ -309,31 +287,33 @@ def update_context():
         app_name = data.get('app_name', 'unknown')
         idle_seconds = data.get('idle_seconds', 0)
         user_id = data.get('userId', 'unknown')
-        
-        # Update context if changed
-        if session_data["current_context"] != context and session_data["current_context"] is not None:
-            # Calculate duration of the previous context
-            duration = time.time() - session_data["current_context_start"]
-            if session_data["current_context"] not in session_data["contexts"]:
-                session_data["contexts"][session_data["current_context"]] = 0
-            session_data["contexts"][session_data["current_context"]] += duration
-            context_change_duration = duration
-        else:
-            context_change_duration = 0
-            
-        # Update current context
-        session_data["current_context"] = context
-        session_data["current_context_start"] = time.time()
-        
-        # Store screenshot info (limited to last 5)
-        timestamp = datetime.now().isoformat()
-        session_data["screenshots"].append({
-            "timestamp": timestamp,
-            "context": context,
-            "app": app_name
-        })
-        if len(session_data["screenshots"]) > 5:
-            session_data["screenshots"].pop(0)
+
+        # Started on first use; emit() ignores the app if it's already current
+        focus_source.start()
+        if app_name != 'unknown':
+            focus_source.emit(app_name)
+
+        session = sessions.get(user_id)
+        with session.lock:
+            if session.current_app is None and focus_source.current_app is not None:
+                # New session: start its app timeline from the current focus
+                session.switch_app(focus_source.current_app, at=focus_source.current_since)
+            # Update context if changed
+            if session.current_context != context and session.current_context is not None:
+                # Calculate duration of the previous context
+                duration = time.time() - session.current_context_start
+                session.add_context_time(session.current_context, duration)
+                context_change_duration = duration
+            else:
+                context_change_duration = 0
+
+            # Update current context
+            session.current_context = context
+            session.current_context_start = time.time()
+
+            # Store screenshot info (the session keeps the last 5)
+            timestamp = datetime.now().isoformat()
+            session.add_screenshot(timestamp, context, app_name)
             
         # Generate insights based on context and app
         insights = []
@@ -366,7 +346,7 @@ def update_context():
             'idle_seconds': idle_seconds,
             'insights': insights
         }
-        write_to_json_file('screen', screen_data)
+        append_event('screen', screen_data)
         
         return jsonify(response_data)
         
@@ -377,26 +357,21 @@ def update_context():
 def session_summary():
     """Get a summary of the current session"""
     try:
-        # Calculate the duration of the current context
-        current_duration = time.time() - session_data["current_context_start"]
+        session = sessions.get(request.args.get('userId', 'unknown'))
         
-        # Create a copy of contexts that includes the current context
-        contexts_with_current = session_data["contexts"].copy()
-        if session_data["current_context"] is not None:
-            if session_data["current_context"] in contexts_with_current:
-                contexts_with_current[session_data["current_context"]] += current_duration
-            else:
-                contexts_with_current[session_data["current_context"]] = current_duration
-                
-        context_list = [
-            {"context": k, "duration": v}
-            for k, v in sorted(contexts_with_current.items(), key=lambda x: x[1], reverse=True)
-        ]
+        # Context and app durations including the current ones
+        with session.lock:
+            context_list = session.context_durations()
+            screenshot_history = list(session.screenshots)
+            app_list = session.app_durations()
+            app_switches = list(session.app_log)
         
         return jsonify({
-            "session_duration": time.time() - session_data["start_time"],
+            "session_duration": session.session_duration(),
             "context_durations": context_list,
-            "screenshot_history": session_data["screenshots"]
+            "screenshot_history": screenshot_history,
+            "app_durations": app_list,
+            "app_switches": app_switches
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -406,11 +381,8 @@ def reset_session():
     """Reset the session data"""
     try:
         # Reset session data
-        session_data["start_time"] = time.time()
-        session_data["contexts"] = {}
-        session_data["current_context"] = None
-        session_data["current_context_start"] = time.time()
-        session_data["screenshots"] = []
+        data = request.get_json(silent=True) or {}
+        sessions.reset(data.get('userId', 'unknown'))
         return jsonify({
             "success": True,
             "message": "Session data reset successfully"
@@ -421,4 +393,5 @@ def reset_session():
 if __name__ == '__main__':
     print("Screen Analysis API Server starting...")
     print(f"Running on {platform.system()}")
+    start_compactor(['screen'])
     app.run(debug=True, port=5001)  # Use port 5001 to avoid conflicts
\ No newline at end of file
@@ -11,10 +11,11 @@ import time
 from datetime import datetime
 
 from win_capture import capture_screen
-from win_window import get_active_app
+from win_window import get_active_app, get_focused_window_rect
 from idle_tracker_win import get_idle_time
 
-from ocr import extract_text
+from ocr import extract_text, set_region_provider, to_bgr
+from frame_gate import FrameGate
 from context import detect_context
 from sentiment import analyze_sentiment
 from chrome_tab import get_chrome_tab_info
@@ -22,14 +23,19 @@ from chrome_tab import get_chrome_tab_info
 def run_analyzer(interval=5):
     print("\nLive Screen Analyzer - Windows (Ctrl+C to stop)\n")
 
+    # OCR only the focused window instead of the whole screen
+    set_region_provider(get_focused_window_rect)
+    # Only OCR screens that changed since the last one
+    ocr_gate = FrameGate.from_env()
+
     last_context = None
     context_start_time = time.time()
 
     while True:
         timestamp = datetime.utcnow().isoformat()
         app = get_active_app()
-        frame = capture_screen()
-        text = extract_text(frame)
+        frame = to_bgr(capture_screen())
+        text, _ = ocr_gate.analyze(frame, extract_text)
         context = detect_context(text)
         sentiment = analyze_sentiment(text)
         idle_seconds = get_idle_time()
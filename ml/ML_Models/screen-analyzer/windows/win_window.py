@@ -4,3 +4,20 @@ def get_active_app():
     window = win32gui.GetForegroundWindow()
     app_name = win32gui.GetWindowText(window)
     return app_name if app_name else "Unknown"
+
+def get_focused_window_rect():
+    """
+    Bounds of the foreground window as ((x, y, w, h), (screen_w, screen_h)),
+    or None if it can't be determined
+    """
+    try:
+        import win32api
+        window = win32gui.GetForegroundWindow()
+        if not window:
+            return None
+        left, top, right, bottom = win32gui.GetWindowRect(window)
+        screen = (win32api.GetSystemMetrics(0), win32api.GetSystemMetrics(1))
+        return (left, top, right - left, bottom - top), screen
+    except Exception as e:
+        print(f"Focused window lookup error: {e}")
+    return None
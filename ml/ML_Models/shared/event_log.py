@@ -0,0 +1,263 @@
+# event_log.py
+#
+# Append-only storage for the records every service writes to ml/data.
+#
+# Each data type lives in two files:
+#   <type>.json   - compacted history, a JSON array (same format as before)
+#   <type>.jsonl  - newly appended records, one JSON object per line
+#
+# Appends only ever touch the .jsonl file, so they cost O(1) no matter how
+# long the history is. A compaction job periodically folds the .jsonl lines
+# back into the .json array. Readers call read_records() to get the usual
+# list-of-dicts view over both files.
+#
+# Several processes append to some types (e.g. video), so appends and the
+# renames done by compaction hold an exclusive lock on <type>.lock. Readers
+# hold a shared one only while opening the files, and parse them after it is
+# released, so neither side waits on an O(history) read or rewrite.
+
+import os
+import sys
+import json
+import time
+import datetime
+import threading
+from contextlib import contextmanager, ExitStack
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Directory to save data (ml/data)
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data')
+
+# Compact a type once its pending log grows beyond this many bytes
+COMPACT_THRESHOLD_BYTES = 1024 * 1024
+
+
+def _json_path(data_type, data_dir):
+    return os.path.join(data_dir, f"{data_type}.json")
+
+
+def _log_path(data_type, data_dir):
+    return os.path.join(data_dir, f"{data_type}.jsonl")
+
+
+def _lock_path(data_type, data_dir):
+    return os.path.join(data_dir, f"{data_type}.lock")
+
+
+@contextmanager
+def _locked(data_type, data_dir, shared=False):
+    """Hold the cross-process lock for data_type (exclusive unless shared)"""
+    with open(_lock_path(data_type, data_dir), 'a+b') as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            # No shared locks on Windows; lock the first byte exclusively
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _open_if_exists(file_path):
+    """Open file_path for reading, or return None if it doesn't exist"""
+    try:
+        return open(file_path, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        return None
+
+
+def _load_json_array(f):
+    """Load a compacted JSON array from f, treating missing or corrupt files as empty"""
+    if f is None:
+        return []
+    try:
+        data = json.load(f)
+    except json.JSONDecodeError:
+        return []
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return [data]
+    return []
+
+
+def _iter_log_records(f):
+    """Yield records from an open .jsonl file, skipping partial or corrupt lines"""
+    if f is None:
+        return
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(record, dict):
+            yield record
+
+
+def append_event(data_type, data, data_dir=DATA_DIR):
+    """Append one record to the log for data_type. Returns True on success."""
+    try:
+        os.makedirs(data_dir, exist_ok=True)
+
+        # Add timestamp to the data
+        data['timestamp'] = datetime.datetime.now().isoformat()
+
+        # One write() per record on an O_APPEND handle keeps lines whole; the
+        # lock keeps compaction from renaming the log between open and write
+        line = json.dumps(data, default=str) + "\n"
+        with _locked(data_type, data_dir):
+            with open(_log_path(data_type, data_dir), 'a', encoding='utf-8') as f:
+                f.write(line)
+
+        return True
+    except Exception as e:
+        print(f"Error writing to event log: {e}")
+        return False
+
+
+def read_records(data_type, data_dir=DATA_DIR):
+    """Return every record for data_type as a list of dicts, oldest first"""
+    if not os.path.isdir(data_dir):
+        return []
+    log_path = _log_path(data_type, data_dir)
+    with ExitStack() as stack:
+        # Open all three files under the shared lock so they come from the
+        # same side of a compaction's swap; an open handle keeps reading the
+        # file it was opened on even after compaction replaces or removes it
+        with _locked(data_type, data_dir, shared=True):
+            files = [_open_if_exists(path) for path in
+                     (_json_path(data_type, data_dir), log_path + '.compacting', log_path)]
+            for f in files:
+                if f is not None:
+                    stack.enter_context(f)
+        json_file, pending_file, log_file = files
+        records = _load_json_array(json_file)
+        records.extend(_iter_log_records(pending_file))
+        records.extend(_iter_log_records(log_file))
+    return records
+
+
+def last_modified(data_type, data_dir=DATA_DIR):
+    """Latest mtime across the files backing data_type (0 if none exist)"""
+    mtime = 0
+    log_path = _log_path(data_type, data_dir)
+    for path in (_json_path(data_type, data_dir), log_path, log_path + '.compacting'):
+        if os.path.exists(path):
+            mtime = max(mtime, os.path.getmtime(path))
+    return mtime
+
+
+def compact(data_type, data_dir=DATA_DIR):
+    """
+    Fold the pending .jsonl records for data_type into its .json array.
+
+    The log is renamed to .compacting under the exclusive lock, so appends
+    start a fresh log. The merge and the write of the new .json to a temp
+    file happen outside the lock; only the final swap (replace the .json,
+    remove .compacting) takes it again, so readers never see a record in
+    both files. A crash part-way leaves the .compacting file to be merged on
+    the next run, and nothing is lost.
+
+    Returns:
+        int: Number of records moved out of the log
+    """
+    log_path = _log_path(data_type, data_dir)
+    pending_path = log_path + '.compacting'
+    json_path = _json_path(data_type, data_dir)
+
+    if not os.path.isdir(data_dir):
+        return 0
+
+    with _locked(data_type, data_dir):
+        if os.path.exists(log_path) and not os.path.exists(pending_path):
+            os.replace(log_path, pending_path)
+
+    # Only this process writes the .json and .compacting files, so they
+    # can be read and merged without holding the lock
+    if not os.path.exists(pending_path):
+        return 0
+    with open(pending_path, 'r', encoding='utf-8') as f:
+        pending = list(_iter_log_records(f))
+    tmp_path = json_path + '.tmp'
+    if pending:
+        records = []
+        if os.path.exists(json_path):
+            with open(json_path, 'r', encoding='utf-8') as f:
+                records = _load_json_array(f)
+        records.extend(pending)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, indent=2)
+
+    # On Windows the replace fails while a reader still has the .json open;
+    # .compacting is then left in place and merged again on the next run
+    with _locked(data_type, data_dir):
+        if pending:
+            os.replace(tmp_path, json_path)
+        os.remove(pending_path)
+    return len(pending)
+
+
+def compact_all(data_types=None, data_dir=DATA_DIR, threshold_bytes=0):
+    """
+    Compact data types whose pending log is at least threshold_bytes.
+
+    Only one process should compact a given type, so services pass the
+    types they own. With data_types=None every log in data_dir is compacted.
+    """
+    compacted = {}
+    if not os.path.isdir(data_dir):
+        return compacted
+    if data_types is None:
+        data_types = [name[:-len('.jsonl')] for name in os.listdir(data_dir) if name.endswith('.jsonl')]
+    for data_type in data_types:
+        log_path = _log_path(data_type, data_dir)
+        if not os.path.exists(log_path) or os.path.getsize(log_path) < threshold_bytes:
+            continue
+        try:
+            compacted[data_type] = compact(data_type, data_dir)
+        except Exception as e:
+            print(f"Error compacting {data_type} log: {e}")
+    return compacted
+
+
+def start_compactor(data_types, interval=60, data_dir=DATA_DIR, threshold_bytes=COMPACT_THRESHOLD_BYTES):
+    """Start a daemon thread that compacts large logs every `interval` seconds"""
+    def run():
+        while True:
+            time.sleep(interval)
+            compact_all(data_types, data_dir, threshold_bytes)
+
+    thread = threading.Thread(target=run, name='event-log-compactor', daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    # Usage: python event_log.py [data_type ...]
+    # Compacts the given types (or every type) right away, e.g. from cron
+    types = sys.argv[1:]
+    if types:
+        for t in types:
+            print(f"{t}: {compact(t)} records compacted")
+    else:
+        for t, n in compact_all().items():
+            print(f"{t}: {n} records compacted")
@@ -0,0 +1,147 @@
+# face_tracker.py
+#
+# Cheaper face detection for video streams.
+#
+# Running a Haar cascade over the whole frame is the most expensive step in
+# the video pipelines. Between frames a face barely moves, so once a face is
+# found FaceTracker only searches an expanded window around the last box.
+# A full-frame detection still runs every `detect_every` frames, and
+# immediately whenever the face is lost.
+
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+class FaceTracker:
+    def __init__(self, cascade, detect_every=10, roi_margin=0.5,
+                 scale_factor=1.1, min_neighbors=5, min_size=(30, 30)):
+        """
+        Args:
+            cascade: cv2.CascadeClassifier for faces
+            detect_every: Frames between forced full-frame detections
+            roi_margin: How far to grow the last box on each side (fraction of its size)
+            scale_factor, min_neighbors, min_size: detectMultiScale parameters
+        """
+        self.cascade = cascade
+        self.detect_every = detect_every
+        self.roi_margin = roi_margin
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+
+        self.last_box = None
+        self.frames_since_full = 0
+
+        # Stats
+        self.full_detections = 0
+        self.roi_detections = 0
+
+    def reset(self):
+        self.last_box = None
+        self.frames_since_full = 0
+
+    def detect(self, gray):
+        """
+        Detect faces in a grayscale frame
+
+        Args:
+            gray: Grayscale image
+
+        Returns:
+            np.array of face rectangles (x, y, w, h), empty if none found
+        """
+        if self.last_box is not None and self.frames_since_full < self.detect_every:
+            faces = self._detect_near_last_box(gray)
+            if len(faces) > 0:
+                self.frames_since_full += 1
+                self.last_box = self._largest(faces)
+                return faces
+
+        # No track yet, track lost, or time for a refresh
+        faces = self._detect_full(gray)
+        self.frames_since_full = 0
+        self.last_box = self._largest(faces) if len(faces) > 0 else None
+        return faces
+
+    def _detect_full(self, gray):
+        self.full_detections += 1
+        faces = self.cascade.detectMultiScale(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=self.min_size,
+            flags=cv2.CASCADE_SCALE_IMAGE
+        )
+        return np.array(faces, dtype=int).reshape(-1, 4)
+
+    def _detect_near_last_box(self, gray):
+        self.roi_detections += 1
+        x, y, w, h = self.last_box
+        frame_h, frame_w = gray.shape[:2]
+
+        # Expand the last box and clamp it to the frame
+        mx, my = int(w * self.roi_margin), int(h * self.roi_margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(frame_w, x + w + mx), min(frame_h, y + h + my)
+        roi = gray[y0:y1, x0:x1]
+
+        # The face can't have changed size much since the last frame,
+        # so only scan a narrow band of scales
+        min_side = max(self.min_size[0], int(min(w, h) * 0.7))
+        max_side = int(max(w, h) * 1.4)
+        faces = self.cascade.detectMultiScale(
+            roi,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=(min_side, min_side),
+            maxSize=(max_side, max_side),
+            flags=cv2.CASCADE_SCALE_IMAGE
+        )
+        faces = np.array(faces, dtype=int).reshape(-1, 4)
+        if len(faces) > 0:
+            # Back to full-frame coordinates
+            faces[:, 0] += x0
+            faces[:, 1] += y0
+        return faces
+
+    @staticmethod
+    def _largest(faces):
+        return tuple(int(v) for v in max(faces, key=lambda f: f[2] * f[3]))
+
+
+class FaceTrackerPool:
+    """One FaceTracker per stream (e.g. per userId), least recently used evicted"""
+
+    def __init__(self, cascade, max_tracks=256, **tracker_kwargs):
+        self.cascade = cascade
+        self.max_tracks = max_tracks
+        self.tracker_kwargs = tracker_kwargs
+        self._trackers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            tracker = self._trackers.get(key)
+            if tracker is None:
+                tracker = FaceTracker(self.cascade, **self.tracker_kwargs)
+                self._trackers[key] = tracker
+                if len(self._trackers) > self.max_tracks:
+                    self._trackers.popitem(last=False)
+            else:
+                self._trackers.move_to_end(key)
+            return tracker
+
+    def detect(self, key, gray):
+        return self.get(key).detect(gray)
+
+    def stats(self):
+        with self._lock:
+            trackers = list(self._trackers.values())
+        return {
+            "tracks": len(trackers),
+            "full_detections": sum(t.full_detections for t in trackers),
+            "roi_detections": sum(t.roi_detections for t in trackers),
+        }
@@ -125,8 +125,6 @@
 
 import cv2
 import numpy as np
-from keras.models import load_model
-from keras.preprocessing.image import img_to_array
 import imutils
 import os
 import json
@@ -136,6 +134,13 @@ from flask_cors import CORS
 import base64
 import sys
 
+# Add the ML_Models shared directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../shared')))
+from event_log import append_event, start_compactor
+from face_tracker import FaceTrackerPool
+from batcher import MicroBatcher
+from inference_backend import load_backend
+
 app = Flask(__name__)
 #CORS(app, origins=["http://localhost:5173"], supports_credentials=True)
 CORS(app, resources={r"/*": {"origins": "*"}})
@@ -145,30 +150,42 @@ HAAR_FACE = os.path.join('haarcascades', 'haarcascade_frontalface_default.xml')
 HAAR_EYE = os.path.join('haarcascades', 'haarcascade_eye.xml')
 MODEL_PATH = os.path.join('models', 'model_num.hdf5')
 
-# Directory to save data
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
-
-# Create data directory if it doesn't exist
-os.makedirs(DATA_DIR, exist_ok=True)
-
 # Debug: Check if Haar cascade XML files exist
 print("Face cascade path:", HAAR_FACE)
 print("Exists?", os.path.exists(HAAR_FACE))
 print("Eye cascade path:", HAAR_EYE)
 print("Exists?", os.path.exists(HAAR_EYE))
-print("Data directory:", DATA_DIR)
-print("Exists?", os.path.exists(DATA_DIR))
 
 # Load Haarcascades
 face_cascade = cv2.CascadeClassifier(HAAR_FACE)
 eye_cascade = cv2.CascadeClassifier(HAAR_EYE)
 
-# Load emotion model with error handling
-if not os.path.exists(MODEL_PATH):
-    print(f"ERROR: Model file '{MODEL_PATH}' not found. Please add your trained model to this path.")
+# Per-user face tracks: search near the last face, full-frame detection every N frames
+FACE_DETECT_EVERY = int(os.environ.get('FACE_DETECT_EVERY', 10))
+face_trackers = FaceTrackerPool(face_cascade, detect_every=FACE_DETECT_EVERY)
+
+# Load emotion model with error handling. EMOTION_BACKEND picks ONNX Runtime,
+# TFLite or Keras; "auto" prefers an exported .onnx/.tflite next to MODEL_PATH
+try:
+    try:
+        emotion_classifier = load_backend(MODEL_PATH)
+    except ImportError as e:
+        # EMOTION_BACKEND named a runtime that isn't installed
+        print(f"Emotion backend runtime not installed ({e}), falling back to Keras")
+        emotion_classifier = load_backend(MODEL_PATH, "keras")
+except (FileNotFoundError, ValueError) as e:
+    print(f"ERROR: {e}. Please add your trained model to this path.")
     sys.exit(1)
-else:
-    emotion_classifier = load_model(MODEL_PATH, compile=False)
+print("Emotion model backend:", emotion_classifier.name)
+
+# Face ROIs from concurrent requests are grouped into one forward pass
+EMOTION_BATCH_SIZE = int(os.environ.get('EMOTION_BATCH_SIZE', 32))
+EMOTION_BATCH_WAIT_MS = float(os.environ.get('EMOTION_BATCH_WAIT_MS', 5))
+emotion_batcher = MicroBatcher(
+    emotion_classifier.predict,
+    max_batch_size=EMOTION_BATCH_SIZE,
+    max_wait_ms=EMOTION_BATCH_WAIT_MS
+)
 
 EMOTIONS = ["angry", "disgust", "fear", "happy", "sad", "surprised", "neutral"]
 
@@ -184,50 +201,82 @@ EMOTION_MAP = {
 }
 TARGET_EMOTIONS = ["bored", "confused", "frustrated", "focused"]
 
-def write_to_json_file(data_type, data):
-    """Write data to a JSON file in the data directory"""
-    try:
-        file_path = os.path.join(DATA_DIR, f"{data_type}.json")
-        
-        # Read existing data if available
-        existing_data = []
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                try:
-                    existing_data = json.load(f)
-                except json.JSONDecodeError:
-                    existing_data = []
-        
-        # Ensure existing_data is a list
-        if not isinstance(existing_data, list):
-            existing_data = []
-        
-        # Add timestamp to the data
-        data['timestamp'] = datetime.datetime.now().isoformat()
-        
-        # Append new data
-        existing_data.append(data)
-        
-        # Write updated data back to the file
-        with open(file_path, 'w') as f:
-            json.dump(existing_data, f, indent=2)
-            
-        return True
-    except Exception as e:
-        print(f"Error writing to JSON file: {e}")
-        return False
-
-def analyze_image(image_data):
-    """Analyze a single image and return engagement metrics"""
-    # Decode base64 image
-    img_bytes = base64.b64decode(image_data.split(',')[1])
-    nparr = np.frombuffer(img_bytes, np.uint8)
+# Side length of the face crops the emotion model expects
+FACE_SIZE = 48
+
+def decode_frame(image_data):
+    """Decode a base64 data URL or raw JPEG/PNG bytes into a BGR frame"""
+    if isinstance(image_data, str):
+        # Decode base64 image
+        image_data = base64.b64decode(image_data.split(',')[1])
+    nparr = np.frombuffer(image_data, np.uint8)
     frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Could not decode image")
+    return frame
+
+def decode_face(face_data):
+    """
+    Decode a pre-cropped grayscale face: either FACE_SIZE*FACE_SIZE raw
+    uint8 pixels or an encoded JPEG/PNG image of the crop
+    """
+    if isinstance(face_data, str):
+        face_data = base64.b64decode(face_data.split(',')[-1])
+    if len(face_data) == FACE_SIZE * FACE_SIZE:
+        return np.frombuffer(face_data, np.uint8).reshape(FACE_SIZE, FACE_SIZE)
+    face = cv2.imdecode(np.frombuffer(face_data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if face is None:
+        raise ValueError("Could not decode face image")
+    return face
+
+def classify_face(roi, is_attentive):
+    """Run the emotion model on a grayscale face crop and score engagement"""
+    # Analyze emotion
+    roi_resized = cv2.resize(roi, (FACE_SIZE, FACE_SIZE))
+    roi_resized = roi_resized.astype("float") / 255.0
+    # (48, 48) -> (48, 48, 1) float32, what img_to_array used to produce
+    roi_resized = np.expand_dims(roi_resized, axis=-1).astype(np.float32)
+    # Shares a batched forward pass with other in-flight requests
+    preds = emotion_batcher.predict(roi_resized)
+    # Map probabilities to 4 target emotions
+    mapped_probs = {e: 0.0 for e in TARGET_EMOTIONS}
+    for i, prob in enumerate(preds):
+        mapped_emotion = EMOTION_MAP[EMOTIONS[i]]
+        mapped_probs[mapped_emotion] += prob
+    dominant_emotion = max(mapped_probs, key=mapped_probs.get)
+    
+    # Calculate engagement score based on attention and mapped emotion
+    # Higher score for attentive and positive emotions like happy or neutral
+    base_score = 0.5 if is_attentive else 0.2
+    emotion_multiplier = {
+        "focused": 1.5,
+        "confused": 1.1,
+        "bored": 0.8,
+        "frustrated": 0.6
+    }
+    engagement_score = min(1.0, base_score * emotion_multiplier.get(dominant_emotion, 1.0))
+    
+    return {
+        "attentive": is_attentive,
+        "emotion": dominant_emotion,
+        "engagement_score": float(engagement_score),
+        "emotions_data": {emotion: float(mapped_probs[emotion]) for emotion in TARGET_EMOTIONS}
+    }
+
+def analyze_image(image_data, user_id=None):
+    """
+    Analyze a single image (data URL or encoded bytes) and return engagement metrics.
+    Frames from a known user reuse that user's face track.
+    """
+    frame = decode_frame(image_data)
     
     # Process the image
     frame = imutils.resize(frame, width=400)
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30), flags=cv2.CASCADE_SCALE_IMAGE)
+    if user_id and user_id != 'unknown':
+        faces = face_trackers.detect(user_id, gray)
+    else:
+        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30), flags=cv2.CASCADE_SCALE_IMAGE)
     
     # Default response when no faces detected
     if len(faces) == 0:
@@ -243,49 +292,47 @@ def analyze_image(image_data):
         roi = gray[y:y + h, x:x + w]
         eyes = eye_cascade.detectMultiScale(roi)
         
-        # Analyze emotion
-        roi_resized = cv2.resize(roi, (48, 48))
-        roi_resized = roi_resized.astype("float") / 255.0
-        roi_resized = img_to_array(roi_resized)
-        roi_resized = np.expand_dims(roi_resized, axis=0)
-        preds = emotion_classifier.predict(roi_resized)[0]
-        # Map probabilities to 4 target emotions
-        mapped_probs = {e: 0.0 for e in TARGET_EMOTIONS}
-        for i, prob in enumerate(preds):
-            mapped_emotion = EMOTION_MAP[EMOTIONS[i]]
-            mapped_probs[mapped_emotion] += prob
-        dominant_emotion = max(mapped_probs, key=mapped_probs.get)
-        is_attentive = len(eyes) >= 1
-        
-        # Calculate engagement score based on attention and mapped emotion
-        # Higher score for attentive and positive emotions like happy or neutral
-        base_score = 0.5 if is_attentive else 0.2
-        emotion_multiplier = {
-            "focused": 1.5,
-            "confused": 1.1,
-            "bored": 0.8,
-            "frustrated": 0.6
-        }
-        engagement_score = min(1.0, base_score * emotion_multiplier.get(dominant_emotion, 1.0))
-        
         # Return data for the first face detected
-        return {
-            "attentive": is_attentive,
-            "emotion": dominant_emotion,
-            "engagement_score": float(engagement_score),
-            "emotions_data": {emotion: float(mapped_probs[emotion]) for emotion in TARGET_EMOTIONS}
-        }
+        return classify_face(roi, len(eyes) >= 1)
+
+def analyze_face(face_data, is_attentive=True):
+    """
+    Analyze a face the client already detected and cropped. Eyes can't be
+    found reliably at 48x48, so attentiveness comes from the client.
+    """
+    return classify_face(decode_face(face_data), is_attentive)
+
+def read_upload():
+    """
+    Pull the frame and userId out of the request. Supports:
+      - JSON {"image": "data:image/jpeg;base64,...", "userId": ...}
+      - multipart/form-data with an "image" file part
+      - a raw JPEG/PNG (or 48x48 face) body with any non-JSON content type
+    For the binary modes userId comes from the form or query string.
+    """
+    if 'image' in request.files:
+        user_id = request.form.get('userId', request.args.get('userId', 'unknown'))
+        return request.files['image'].read(), user_id
+
+    payload = request.get_json(silent=True)
+    if payload is not None:
+        return payload.get('image'), payload.get('userId', 'unknown')
+
+    return request.get_data() or None, request.args.get('userId', 'unknown')
 
 @app.route('/api/analyze-engagement', methods=['POST'])
 def analyze_engagement():
-    if not request.json or 'image' not in request.json:
+    image_data, user_id = read_upload()
+    if not image_data:
         return jsonify({'error': 'No image provided'}), 400
     
     try:
-        image_data = request.json['image']
-        user_id = request.json.get('userId', 'unknown')
-        
-        result = analyze_image(image_data)
+        # ?mode=face sends a pre-cropped grayscale face instead of a full frame
+        if request.args.get('mode') == 'face':
+            is_attentive = request.args.get('attentive', 'true').lower() in ('1', 'true', 'yes')
+            result = analyze_face(image_data, is_attentive)
+        else:
+            result = analyze_image(image_data, user_id)
         
         # Store the result in the video.json file
         video_data = {
@@ -297,12 +344,19 @@ def analyze_engagement():
         }
         
         # Write to JSON file
-        write_to_json_file('video', video_data)
+        append_event('video', video_data)
         
         return jsonify(result)
     except Exception as e:
         print(f"Error in analyze_engagement: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/batch-stats', methods=['GET'])
+def batch_stats():
+    """How well concurrent requests are being grouped into batches"""
+    return jsonify({**emotion_batcher.stats(), "backend": emotion_classifier.name, "face_tracking": face_trackers.stats()})
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    start_compactor(['video'])
+    # threaded=True so concurrent requests can share a batch
+    app.run(debug=True, port=5000, threaded=True)
\ No newline at end of file
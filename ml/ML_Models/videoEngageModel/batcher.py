@@ -0,0 +1,83 @@
+"""
+Micro-batching wrapper for model inference.
+
+Requests from concurrent Flask threads each submit one input. A single
+background worker collects inputs for up to `max_wait_ms` (or until
+`max_batch_size` are queued), runs one batched forward pass and hands each
+row of the output back to the request that submitted it.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5):
+        """
+        Args:
+            predict_fn: Callable taking a stacked batch (N, ...) and returning N outputs
+            max_batch_size: Largest batch sent to predict_fn
+            max_wait_ms: How long the first queued input waits for company
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+
+        # Stats
+        self.batches_run = 0
+        self.items_run = 0
+
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        """Queue one input and return a Future for its output row"""
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def predict(self, item, timeout=None):
+        """Blocking helper: submit one input and wait for its output row"""
+        return self.submit(item).result(timeout=timeout)
+
+    def stats(self):
+        return {
+            "batches": self.batches_run,
+            "items": self.items_run,
+            "avg_batch_size": self.items_run / self.batches_run if self.batches_run else 0.0,
+        }
+
+    def _collect_batch(self):
+        # Block until there is at least one input
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+            try:
+                outputs = self.predict_fn(np.stack(items))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            self.batches_run += 1
+            self.items_run += len(batch)
+            for future, output in zip(futures, outputs):
+                future.set_result(output)
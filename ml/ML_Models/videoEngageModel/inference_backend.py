@@ -0,0 +1,172 @@
+"""
+Pluggable inference backends for the face emotion model.
+
+The model is a small 48x48 CNN, but loading it through Keras imports all of
+TensorFlow. The same weights can be exported once to ONNX or TFLite and
+served through ONNX Runtime or the TFLite interpreter on CPU instead:
+
+    python inference_backend.py convert models/model_num.hdf5
+
+Every backend exposes predict(batch) -> np.ndarray of shape (N, 7), so the
+MicroBatcher in api.py doesn't care which one is active. The backend is
+picked with EMOTION_BACKEND ("auto", "onnx", "tflite" or "keras"). "auto"
+uses an exported .onnx or .tflite file next to the .hdf5 when one exists and
+falls back to Keras otherwise. TensorFlow is only imported by the Keras
+backend and the converters.
+"""
+import os
+import sys
+
+import numpy as np
+
+BACKENDS = ("onnx", "tflite", "keras")
+
+# Exported model files sit next to the Keras one with these extensions
+BACKEND_EXTENSIONS = {
+    "onnx": ".onnx",
+    "tflite": ".tflite",
+    "keras": ".hdf5",
+}
+
+
+class KerasBackend:
+    """The original keras.models.load_model path, kept as the fallback"""
+    name = "keras"
+
+    def __init__(self, model_path):
+        from keras.models import load_model
+        self.model = load_model(model_path, compile=False)
+
+    def predict(self, batch):
+        return np.asarray(self.model.predict(batch, verbose=0))
+
+
+class OnnxBackend:
+    """ONNX Runtime session on the CPU execution provider"""
+    name = "onnx"
+
+    def __init__(self, model_path, intra_op_threads=None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class TFLiteBackend:
+    """
+    TFLite interpreter. Uses the standalone tflite_runtime package when it is
+    installed and tf.lite otherwise. The interpreter is not thread-safe, which
+    is fine behind the MicroBatcher's single worker thread.
+    """
+    name = "tflite"
+
+    def __init__(self, model_path, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.input_index = self.interpreter.get_input_details()[0]["index"]
+        self.output_index = self.interpreter.get_output_details()[0]["index"]
+        self._batch_size = None
+
+    def predict(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        # Re-allocating tensors is only needed when the batch size changes
+        if batch.shape[0] != self._batch_size:
+            self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+            self.interpreter.allocate_tensors()
+            self._batch_size = batch.shape[0]
+        self.interpreter.set_tensor(self.input_index, batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index).copy()
+
+
+BACKEND_CLASSES = {
+    "onnx": OnnxBackend,
+    "tflite": TFLiteBackend,
+    "keras": KerasBackend,
+}
+
+
+def model_path_for(model_path, backend):
+    """Path of the model file a backend reads, derived from the .hdf5 path"""
+    return os.path.splitext(model_path)[0] + BACKEND_EXTENSIONS[backend]
+
+
+def load_backend(model_path, backend=None):
+    """
+    Load the emotion model through the configured backend
+
+    Args:
+        model_path: Path to the Keras .hdf5 model; exported files are looked up next to it
+        backend: "auto", "onnx", "tflite" or "keras" (default: EMOTION_BACKEND env var, then "auto")
+
+    Returns:
+        Backend instance with predict(batch) and a `name` attribute
+    """
+    backend = (backend or os.environ.get("EMOTION_BACKEND", "auto")).lower()
+
+    if backend == "auto":
+        for candidate in BACKENDS:
+            path = model_path_for(model_path, candidate)
+            if not os.path.exists(path):
+                continue
+            try:
+                return BACKEND_CLASSES[candidate](path)
+            except ImportError as e:
+                # Exported file is there but its runtime isn't installed
+                print(f"Skipping {candidate} backend: {e}")
+        raise FileNotFoundError(f"No loadable emotion model found for '{model_path}'")
+
+    if backend not in BACKEND_CLASSES:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {('auto',) + BACKENDS}")
+    path = model_path_for(model_path, backend)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model file '{path}' not found for the {backend} backend")
+    return BACKEND_CLASSES[backend](path)
+
+
+def convert_to_onnx(keras_path, onnx_path=None, opset=13):
+    """Export a Keras model to ONNX with a dynamic batch dimension (needs tf2onnx)"""
+    import tensorflow as tf
+    import tf2onnx
+    from keras.models import load_model
+
+    onnx_path = onnx_path or model_path_for(keras_path, "onnx")
+    model = load_model(keras_path, compile=False)
+    spec = (tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=onnx_path)
+    return onnx_path
+
+
+def convert_to_tflite(keras_path, tflite_path=None):
+    """Export a Keras model to a float32 TFLite flatbuffer"""
+    import tensorflow as tf
+    from keras.models import load_model
+
+    tflite_path = tflite_path or model_path_for(keras_path, "tflite")
+    model = load_model(keras_path, compile=False)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    with open(tflite_path, "wb") as f:
+        f.write(converter.convert())
+    return tflite_path
+
+
+if __name__ == "__main__":
+    # Usage: python inference_backend.py convert <model.hdf5> [onnx|tflite ...]
+    if len(sys.argv) < 3 or sys.argv[1] != "convert":
+        print("Usage: python inference_backend.py convert <model.hdf5> [onnx|tflite ...]")
+        sys.exit(1)
+    keras_path = sys.argv[2]
+    targets = sys.argv[3:] or ["onnx", "tflite"]
+    converters = {"onnx": convert_to_onnx, "tflite": convert_to_tflite}
+    for target in targets:
+        print(f"{target}: wrote {converters[target](keras_path)}")
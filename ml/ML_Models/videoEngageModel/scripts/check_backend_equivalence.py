@@ -0,0 +1,128 @@
+"""
+Check that the exported ONNX / TFLite emotion models match Keras.
+
+Face crops are pulled from the sample videos the same way api.py does it,
+run through every available backend, and compared against the Keras output.
+Fails (exit code 1) if any backend's probabilities differ by more than
+--atol or its predicted emotion disagrees with Keras. Exits with code 2
+(SKIP) if no exported model could be compared at all, so a missing export
+or runtime doesn't pass as a successful check.
+
+Usage (from scripts/):
+    python check_backend_equivalence.py [--frames-per-video 50] [--atol 1e-4] [--random 0]
+
+--random N adds N random 48x48 crops, useful when the sample videos are
+missing or contain no faces.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import imutils
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from inference_backend import BACKENDS, load_backend, model_path_for
+
+# Paths (relative to project root)
+HAAR_FACE = os.path.join('..', 'haarcascades', 'haarcascade_frontalface_default.xml')
+MODEL_PATH = os.path.join('..', 'models', 'model_num.hdf5')
+SAMPLES_DIR = os.path.join('..', 'samples')
+FACE_SIZE = 48
+
+
+def preprocess(roi):
+    """Same preprocessing as classify_face in api.py"""
+    roi = cv2.resize(roi, (FACE_SIZE, FACE_SIZE)).astype("float") / 255.0
+    return np.expand_dims(roi, axis=-1).astype(np.float32)
+
+
+def collect_faces(face_cascade, frames_per_video):
+    """Collect preprocessed face crops from every sample video"""
+    faces = []
+    for video_path in sorted(glob.glob(os.path.join(SAMPLES_DIR, '*.mp4'))):
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            print(f"  {os.path.basename(video_path)}: could not open, skipped")
+            continue
+        found = 0
+        frames = 0
+        while found < frames_per_video:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames += 1
+            frame = imutils.resize(frame, width=400)
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            rects = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30),
+                                                  flags=cv2.CASCADE_SCALE_IMAGE)
+            for (x, y, w, h) in rects[:1]:
+                faces.append(preprocess(gray[y:y + h, x:x + w]))
+                found += 1
+        cap.release()
+        print(f"  {os.path.basename(video_path)}: {found} faces from {frames} frames")
+    return faces
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--frames-per-video', type=int, default=50)
+    parser.add_argument('--atol', type=float, default=1e-4)
+    parser.add_argument('--random', type=int, default=0)
+    args = parser.parse_args()
+
+    print("Collecting face crops from samples:")
+    faces = collect_faces(cv2.CascadeClassifier(HAAR_FACE), args.frames_per_video)
+    if args.random:
+        rng = np.random.default_rng(0)
+        faces.extend(rng.random((args.random, FACE_SIZE, FACE_SIZE, 1), dtype=np.float32))
+    if not faces:
+        print("No inputs to compare. Add sample videos with faces or pass --random N.")
+        sys.exit(1)
+    batch = np.stack(faces)
+
+    reference = load_backend(MODEL_PATH, "keras")
+    expected = reference.predict(batch)
+    print(f"\nCompared {len(batch)} crops against Keras (atol={args.atol})")
+
+    failed = False
+    compared = 0
+    for backend in BACKENDS:
+        if backend == "keras":
+            continue
+        if not os.path.exists(model_path_for(MODEL_PATH, backend)):
+            print(f"  {backend}: no exported model, run inference_backend.py convert first")
+            continue
+        try:
+            candidate = load_backend(MODEL_PATH, backend)
+        except ImportError as e:
+            print(f"  {backend}: runtime not installed ({e})")
+            continue
+
+        start = time.perf_counter()
+        # One crop at a time, then as a batch, since both paths are used in api.py
+        single = np.concatenate([candidate.predict(batch[i:i + 1]) for i in range(len(batch))])
+        single_ms = (time.perf_counter() - start) * 1000 / len(batch)
+        batched = candidate.predict(batch)
+
+        max_diff = max(np.abs(single - expected).max(), np.abs(batched - expected).max())
+        agree = np.mean(np.argmax(batched, axis=1) == np.argmax(expected, axis=1))
+        ok = max_diff <= args.atol and agree == 1.0
+        failed |= not ok
+        compared += 1
+        print(f"  {backend}: max |diff| {max_diff:.2e}, argmax agreement {agree:.1%}, "
+              f"{single_ms:.2f} ms/crop -> {'OK' if ok else 'MISMATCH'}")
+
+    if failed:
+        sys.exit(1)
+    if not compared:
+        print("SKIP: no exported model was compared; nothing was checked")
+        sys.exit(2)
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
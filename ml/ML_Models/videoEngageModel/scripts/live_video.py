@@ -9,6 +9,11 @@ from keras.models import load_model
 from keras.preprocessing.image import img_to_array
 import imutils
 import os
+import sys
+
+# Add the ML_Models shared directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'shared')))
+from face_tracker import FaceTracker
 
 # Paths (relative to project root)
 HAAR_FACE = os.path.join('..', 'haarcascades', 'haarcascade_frontalface_default.xml')
@@ -26,6 +31,9 @@ print("Exists?", os.path.exists(HAAR_EYE))
 face_cascade = cv2.CascadeClassifier(HAAR_FACE)
 eye_cascade = cv2.CascadeClassifier(HAAR_EYE)
 
+# Search near the last face, with a full-frame detection every 10 frames
+FACE_DETECT_EVERY = 10
+
 # Load emotion model
 emotion_classifier = load_model(MODEL_PATH, compile=False)
 EMOTIONS = ["angry", "disgust", "fear", "happy", "sad", "surprised", "neutral"]
@@ -53,13 +61,14 @@ while True:
     if not cap.isOpened():
         print("Error: Could not open video source.")
         break
+    face_tracker = FaceTracker(face_cascade, detect_every=FACE_DETECT_EVERY)
     while True:
         ret, frame = cap.read()
         if not ret:
             break
         frame = imutils.resize(frame, width=400)
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30), flags=cv2.CASCADE_SCALE_IMAGE)
+        faces = face_tracker.detect(gray)
         canvas = np.zeros((350, 400, 3), dtype="uint8")
         if len(faces) == 0:
             cv2.putText(frame, "Not-Attentive (student unavailable)", (10, 23), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 0, 255), 2)
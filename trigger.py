@@ -1,24 +1,19 @@
 import json
 from datetime import datetime
 import os
+import sys
 
-# Helper to load all entries from a list of dicts in a JSON file
-def load_all_entries(filepath):
-    if not os.path.exists(filepath):
-        return []
-    with open(filepath, 'r', encoding='utf-8') as f:
-        try:
-            data = json.load(f)
-        except json.JSONDecodeError:
-            return []
-        if isinstance(data, list):
-            # Sort by timestamp if available
-            if data and 'timestamp' in data[0]:
-                data = sorted(data, key=lambda x: x['timestamp'])
-            return data
-        elif isinstance(data, dict):
-            return [data]
-        return []
+# Services append to ml/data through the shared event log
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ml', 'ML_Models', 'shared'))
+from event_log import read_records
+
+# Helper to load all entries for a data type (compacted .json plus pending .jsonl)
+def load_all_entries(data_type):
+    data = read_records(data_type)
+    # Sort by timestamp if available
+    if data and 'timestamp' in data[0]:
+        data = sorted(data, key=lambda x: x['timestamp'])
+    return data
 
 def get_trigger_action(outputs, user_preference):
     # Preference-based suffixes
@@ -54,9 +49,9 @@ def get_trigger_action(outputs, user_preference):
     return {'type': 'none', 'message': 'No action needed at this time. No intervention required.'}
 
 # Load all data
-video_entries = load_all_entries('ml/data/video.json')
-audio_entries = load_all_entries('ml/data/audio.json')
-screen_entries = load_all_entries('ml/data/screen.json')
+video_entries = load_all_entries('video')
+audio_entries = load_all_entries('audio')
+screen_entries = load_all_entries('screen')
 
 # Try to load user data from user.json, then user.txt, else fallback to empty dict
 user = {}